@@ -49,8 +49,8 @@ const Battle = () => {
 
   useEffect(() => {
     if (status === "in_game" && question) {
-      if (myProgress.tests_passed === question.testCases.length || 
-          opponentProgress.tests_passed === question.testCases.length) {
+      if (myProgress.tests_passed === question.total_tests || 
+          opponentProgress.tests_passed === question.total_tests) {
         useGameStore.getState().setStatus("ended");
       }
     }
@@ -98,7 +98,7 @@ const Battle = () => {
                     className="bg-white/5 border-white/10 px-4 py-2 text-sm hover:bg-white/10 transition-all cursor-default"
                 >
                     <span className="font-medium">
-                        {question.testCases.length} total tests
+                        {question.total_tests} total tests
                     </span>
                 </Badge>
             </div>
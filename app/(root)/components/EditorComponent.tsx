@@ -52,8 +52,12 @@ interface TestResult {
   total: number;
   errors: string[];
   test_results: Array<{
+    test_id: string;
     passed: boolean;
     error?: string;
+    wall_ms?: number | null;
+    cpu_ms?: number | null;
+    peak_rss_kb?: number | null;
   }>;
 }
 
@@ -101,11 +105,13 @@ const EditorComponent: React.FC<EditorProps> = ({
     // Set up socket listeners
     socket.on('code_results', handleCodeResults);
     socket.on('error', handleExecutionError);
+    socket.on('submission_rejected', handleExecutionError);
 
     // Cleanup listeners on unmount
     return () => {
       socket.off('code_results', handleCodeResults);
       socket.off('error', handleExecutionError);
+      socket.off('submission_rejected', handleExecutionError);
     };
   }, [socket, updateProgress]);
 
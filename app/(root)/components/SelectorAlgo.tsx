@@ -15,7 +15,7 @@ import useGameStore from "../stores/gamestore";
 
 const AlgorithmSelector = () => {
     const { user } = useUser();
-    const { initializeSocket, socket, status, setStatus } = useGameStore();
+    const { initializeSocket, socket, status, setStatus, setClerkId } = useGameStore();
     const [isQueuing, setIsQueuing] = useState(false);
     const searchParams = useSearchParams();
     const [value, setValue] = useState("");
@@ -36,6 +36,7 @@ const AlgorithmSelector = () => {
 
         setIsQueuing(true);
         setStatus('queuing');
+        setClerkId(user.id);
         
         socket.emit('join_queue', {
             clerkId: user.id,
@@ -20,6 +20,7 @@ interface Question {
   title: string;
   description: string;
   testCases: TestCase[];
+  total_tests: number;
   type: "graph" | "tree" | "array" | "";
 }
 
@@ -1,6 +1,9 @@
 import { create } from "zustand";
 import { Socket, io } from "socket.io-client";
 
+const SERVER_ADDRESS = "10.121.128.78:5000";
+
+// Public statement served by the game server: testCases holds the visible examples only
 interface Question {
   _id?: string;
   title: string;
@@ -10,6 +13,7 @@ interface Question {
     input: string;
     output: string;
   }>;
+  total_tests: number;
   type: "graph" | "tree" | "array" | "";
 }
 
@@ -22,6 +26,9 @@ interface GameState {
     name: string;
   } | null;
   matchId: string | null;
+  // Issued by the server in match_found; proves who we are when rejoining
+  rejoinToken: string | null;
+  clerkId: string | null;
   opponentProgress: {
     tests_passed: number;
     total_tests: number;
@@ -36,6 +43,7 @@ interface GameState {
   setQuestion: (question: Question | null) => void;
   setOpponent: (opponent: GameState["opponent"]) => void;
   setMatchId: (matchId: string | null) => void;
+  setClerkId: (clerkId: string | null) => void;
   updateProgress: (
     player: "me" | "opponent",
     progress: { tests_passed: number; total_tests: number },
@@ -50,13 +58,15 @@ const useGameStore = create<GameState>((set, get) => ({
   question: null,
   opponent: null,
   matchId: null,
+  rejoinToken: null,
+  clerkId: null,
   opponentProgress: { tests_passed: 0, total_tests: 0 },
   myProgress: { tests_passed: 0, total_tests: 0 },
   timeRemaining: 10,
   initializeSocket: () => {
     if (get().socket?.connected) return;
 
-    const socket = io("10.121.128.78:5000", {
+    const socket = io(SERVER_ADDRESS, {
       transports: ["websocket", "polling"], // Explicitly specify transports
       reconnection: true,
       reconnectionAttempts: 5,
@@ -65,28 +75,67 @@ const useGameStore = create<GameState>((set, get) => ({
 
     socket.on("connect", () => {
       console.log("Connected to game server");
+      // After a dropped connection, get back into the running match
+      const { status, matchId, rejoinToken, clerkId } = get();
+      if (status === "in_game" && matchId && rejoinToken && clerkId) {
+        socket.emit("rejoin_match", {
+          clerkId,
+          match_id: matchId,
+          rejoin_token: rejoinToken,
+        });
+      }
+    });
+
+    socket.on("match_rejoined", (data) => {
+      const opponentProgress = data.progress[data.opponent.id];
+      const myProgress = get().clerkId ? data.progress[get().clerkId!] : undefined;
+      set({
+        matchId: data.match_id,
+        ...(opponentProgress ? { opponentProgress } : {}),
+        ...(myProgress ? { myProgress } : {}),
+      });
+    });
+
+    socket.on("rejoin_failed", () => {
+      set({ status: "ended" });
     });
 
     socket.on("match_found", (data) => {
       console.log("Match found:", data); // Debug log
       set({
         status: "in_game",
-        question: data.question,
+        question: null,
         opponent: data.opponent,
         matchId: data.match_id,
+        rejoinToken: data.rejoin_token,
         myProgress: { tests_passed: 0, total_tests: data.total_tests },
         opponentProgress: { tests_passed: 0, total_tests: data.total_tests },
         timeRemaining: 10,
       });
+
+      // The statement is cacheable, so it comes over HTTP rather than the socket
+      fetch(`http://${SERVER_ADDRESS}/questions/${data.question_id}`)
+        .then((response) => response.json())
+        .then((question: Question) => {
+          if (get().matchId === data.match_id) {
+            set({ question });
+          }
+        })
+        .catch((error) => console.error("Failed to load question:", error));
     });
 
-    socket.on("opponent_progress", (data) => {
-      set((state) => ({
-        opponentProgress: {
-          tests_passed: data.tests_passed,
-          total_tests: data.total_tests,
-        },
-      }));
+    // Coalesced progress of both players, keyed by clerkId
+    socket.on("match_progress", (data) => {
+      const opponentId = get().opponent?.id;
+      const progress = opponentId ? data.players[opponentId] : undefined;
+      if (progress) {
+        set({
+          opponentProgress: {
+            tests_passed: progress.tests_passed,
+            total_tests: progress.total_tests,
+          },
+        });
+      }
     });
 
     socket.on("match_ended", (data) => {
@@ -110,6 +159,7 @@ const useGameStore = create<GameState>((set, get) => ({
   setQuestion: (question) => set({ question }),
   setOpponent: (opponent) => set({ opponent }),
   setMatchId: (matchId) => set({ matchId }),
+  setClerkId: (clerkId) => set({ clerkId }),
   updateProgress: (player, progress) =>
     set((state) => ({
       ...(player === "me"
@@ -123,6 +173,7 @@ const useGameStore = create<GameState>((set, get) => ({
       question: null,
       opponent: null,
       matchId: null,
+      rejoinToken: null,
       opponentProgress: { tests_passed: 0, total_tests: 0 },
       myProgress: { tests_passed: 0, total_tests: 0 },
       timeRemaining: 10,
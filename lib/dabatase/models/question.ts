@@ -8,4 +8,25 @@ export interface Question {
         output: string;  
     }>; 
     type: "graph" | "tree" | "array" | "";
+    // How many of the first testCases players see as examples (default 2)
+    exampleCount?: number;
+    parallelism?: number;
+    memoryLimitMb?: number;
+    comparator?: "exact" | "unordered" | "multiset" | "float" | {
+        type: "exact" | "unordered" | "multiset" | "float" | "custom";
+        deep?: boolean;
+        rel_tol?: number;
+        abs_tol?: number;
+        code?: string;
+    };
+    complexity?: {
+        generator: "array" | "sorted_array" | "permutation" | "string" | "tree" | "graph";
+        param?: string;
+        args?: Record<string, unknown>;
+        sizes?: number[];
+        expected?: "O(1)" | "O(log n)" | "O(n)" | "O(n log n)" | "O(n^2)" | "O(n^3)";
+        enforce?: boolean;
+        budgetMs?: number;
+        repeats?: number;
+    };
 }
@@ -0,0 +1,130 @@
+"""Run the LitCode server on asyncio: python-socketio's AsyncServer under uvicorn.
+
+    python asgi_server.py
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+
+Connections cost a coroutine instead of an OS thread, so one process holds
+many thousands of players. The event handlers are the ones in lan_server.py
+and behave the same; only the transport changes:
+
+- emits and room changes go through an AsyncTransport, so the judge, timer
+  and broadcast threads can still emit from where they run
+- ratings are served from the in-memory leaderboard and writes are
+  batched on the write-behind thread
+- join_queue, rejoin_match and disconnect run in the default executor:
+  starting or ending a match can read a question from MongoDB (one not
+  yet in the catalog) and compresses its statement
+- submissions are judged on the SubmissionScheduler threads and the worker
+  pool, never on the event loop
+- with STATE_BACKEND=manager every handler runs in the default executor,
+  as the shared state is reached over blocking proxy calls; such
+  deployments must also set SOCKETIO_MESSAGE_QUEUE (a Redis URL) to share
+  rooms between processes
+
+The HTTP routes are the Flask app's, mounted behind the Socket.IO endpoint.
+"""
+import asyncio
+import os
+
+import socketio
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import lan_server
+from game.transport import AsyncTransport
+
+SHARED_STATE = os.getenv('STATE_BACKEND', 'memory') == 'manager'
+MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+if SHARED_STATE and not MESSAGE_QUEUE:
+    raise RuntimeError("STATE_BACKEND=manager needs SOCKETIO_MESSAGE_QUEUE in ASGI mode")
+
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins=lan_server.CORS_ALLOWED_ORIGINS,
+    ping_timeout=10000,
+    ping_interval=1000,
+    always_connect=True,
+    cookie=False,
+    client_manager=socketio.AsyncRedisManager(MESSAGE_QUEUE) if MESSAGE_QUEUE else None
+)
+
+
+async def dispatch(handler, sid, *args, offload=False):
+    """Run a lan_server handler, in the default executor when it may block."""
+    try:
+        if offload or SHARED_STATE:
+            await asyncio.to_thread(handler, sid, *args)
+        else:
+            handler(sid, *args)
+    except Exception as e:
+        lan_server.log.error('socket_event_failed', sid=sid, error=str(e))
+        lan_server.realtime.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    await dispatch(lan_server.on_connect, sid)
+
+
+@sio.event
+async def join_queue(sid, data):
+    # A pairing creates the match: question lookup and statement encoding
+    await dispatch(lan_server.on_join_queue, sid, data, offload=True)
+
+
+@sio.event
+async def leave_queue(sid, data):
+    await dispatch(lan_server.on_leave_queue, sid, data)
+
+
+@sio.event
+async def submit_result(sid, data):
+    await dispatch(lan_server.on_submit_result, sid, data)
+
+
+@sio.event
+async def spectate_match(sid, data):
+    await dispatch(lan_server.on_spectate_match, sid, data)
+
+
+@sio.event
+async def stop_spectating(sid, data=None):
+    await dispatch(lan_server.on_stop_spectating, sid, data)
+
+
+@sio.event
+async def rejoin_match(sid, data):
+    await dispatch(lan_server.on_rejoin_match, sid, data, offload=True)
+
+
+@sio.event
+async def submit_code(sid, data):
+    # Hashing the code for the result cache is parsing work; keep it off the loop
+    await dispatch(lan_server.on_submit_code, sid, data, offload=True)
+
+
+@sio.event
+async def disconnect(sid, reason=None):
+    # Without a reconnect grace period this ends the match, which looks up its question
+    await dispatch(lan_server.on_disconnect, sid, offload=True)
+
+
+def startup():
+    lan_server.realtime = AsyncTransport(sio, asyncio.get_running_loop())
+    lan_server.start_services()
+
+
+async def shutdown():
+    # uvicorn handles SIGTERM by shutting down gracefully, then re-raises it without running atexit
+    await asyncio.to_thread(lan_server.stop_writes)
+
+
+app = socketio.ASGIApp(sio, WSGIMiddleware(lan_server.app), on_startup=startup, on_shutdown=shutdown)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv('SERVER_HOST', '0.0.0.0'), port=int(os.getenv('SERVER_PORT', '5000')))
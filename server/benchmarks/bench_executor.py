@@ -0,0 +1,82 @@
+"""Microbenchmarks for judging: test input preparation and full execute_code runs.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_executor
+"""
+import json
+import random
+import statistics
+import time
+
+from executor.code_executor import CodeExecutor
+
+INPUT_SIZES = [1_000, 10_000, 100_000]
+REPEATS = 5
+
+MISSING_NUMBER = """
+def findMissingNumber(nums):
+    n = len(nums) + 1
+    return n * (n + 1) // 2 - sum(nums)
+"""
+
+
+def array_input(size: int) -> str:
+    return json.dumps([random.randint(-10**6, 10**6) for _ in range(size)])
+
+
+def graph_input(size: int) -> str:
+    graph = {str(i): [str(random.randrange(size)) for _ in range(3)] for i in range(size)}
+    return json.dumps({'graph': graph, 'startNode': '0'})
+
+
+def tree_input(size: int) -> str:
+    return json.dumps({'tree': [random.randint(0, 100) for _ in range(size)]})
+
+
+INPUTS = {'array': array_input, 'graph': graph_input, 'tree': tree_input}
+
+
+def missing_number_tests(count: int, size: int) -> list:
+    tests = []
+    for i in range(count):
+        nums = list(range(1, size + 2))
+        missing = nums.pop(random.randrange(len(nums)))
+        random.shuffle(nums)
+        tests.append({'testId': str(i), 'input': json.dumps(nums), 'output': str(missing)})
+    return tests
+
+
+def median_ms(func, repeats: int = REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def bench_prepare(kind: str, size: int) -> float:
+    executor = CodeExecutor()
+    input_str = INPUTS[kind](size)
+    return median_ms(lambda: executor.prepare_test_input(input_str))
+
+
+def bench_execute(tests: int = 20, size: int = 10_000, parallelism: int = 1) -> float:
+    """One submission against fresh (uncached) tests, with a warm worker pool."""
+    executor = CodeExecutor()
+    test_cases = missing_number_tests(tests, size)
+    # Fork the workers and load the function before timing
+    executor.execute_code(MISSING_NUMBER, test_cases[:1])
+    return median_ms(lambda: executor.execute_code(MISSING_NUMBER, test_cases, parallelism))
+
+
+if __name__ == '__main__':
+    print(f"{'input':>8} {'size':>8} {'prepare (ms)':>13}")
+    for kind in INPUTS:
+        for size in INPUT_SIZES:
+            print(f"{kind:>8} {size:>8} {bench_prepare(kind, size):>13.2f}")
+
+    print(f"\n{'tests':>8} {'size':>8} {'parallel':>9} {'execute_code (ms)':>18}")
+    for tests, size, parallelism in [(20, 1_000, 1), (20, 10_000, 1), (20, 10_000, 4), (100, 1_000, 4)]:
+        print(f"{tests:>8} {size:>8} {parallelism:>9} {bench_execute(tests, size, parallelism):>18.2f}")
@@ -0,0 +1,101 @@
+"""Microbenchmark for matchmaking as the waiting queues grow.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_matchmaking
+"""
+import random
+import time
+
+from game.matchmaking import MatchmakingEngine, QUEUE_TYPES
+from game.state import GameState
+
+QUEUE_SIZES = [100, 1_000, 10_000, 50_000]
+OPERATIONS = 2_000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def player(sid: str) -> dict:
+    return {'sid': sid, 'clerkId': sid, 'player_name': sid, 'rating': random.gauss(1200, 300)}
+
+
+def fill(game_state: GameState, size: int):
+    for i in range(size):
+        game_state.add_to_queue(player(f"sid-{i}"), QUEUE_TYPES[i % 4])
+
+
+def time_per_op(func, operations: int = OPERATIONS) -> float:
+    start = time.perf_counter()
+    for i in range(operations):
+        func(i)
+    return (time.perf_counter() - start) / operations * 1e6
+
+
+def bench(size: int) -> dict:
+    # A narrow, non-widening window keeps the pre-filled players waiting
+    game_state = GameState(MatchmakingEngine(base_window=1, widen_per_second=0))
+    fill(game_state, size)
+    sids = list(game_state.queued_players)
+
+    def join_and_match(i):
+        # A new player arrives and is matched against the waiting pool
+        sid = f"join-{i}"
+        game_state.add_to_queue(player(sid), QUEUE_TYPES[i % 4])
+        game_state.find_match(sid)
+        game_state.remove_from_queue(sid)
+
+    def leave_and_rejoin(_):
+        # A random waiting player disconnects and comes back
+        sid = random.choice(sids)
+        game_state.remove_from_queue(sid)
+        game_state.add_to_queue(player(sid), 'tree')
+
+    return {
+        'join+match': time_per_op(join_and_match),
+        'leave+rejoin': time_per_op(leave_and_rejoin),
+    }
+
+
+def bench_tick(size: int) -> tuple:
+    # Everyone has waited long enough for the window to cover the whole rating range
+    clock = FakeClock()
+    engine = MatchmakingEngine(clock=clock)
+    game_state = GameState(engine)
+    fill(game_state, size)
+    clock.now = 120.0
+
+    start = time.perf_counter()
+    matches = engine.tick()
+    return (time.perf_counter() - start) * 1e3, len(matches)
+
+
+def bench_idle_tick(size: int) -> float:
+    # Nobody's window is near an opponent yet: the once-a-second tick in steady state
+    clock = FakeClock()
+    engine = MatchmakingEngine(base_window=1, widen_per_second=0.01, clock=clock)
+    game_state = GameState(engine)
+    fill(game_state, size)
+    engine.tick()
+    clock.now = 1.0
+
+    start = time.perf_counter()
+    engine.tick()
+    return (time.perf_counter() - start) * 1e3
+
+
+if __name__ == '__main__':
+    print(f"{'waiting':>10} {'join+match (us)':>17} {'leave+rejoin (us)':>19} {'idle tick (ms)':>16} "
+          f"{'full tick (ms)':>16} {'pairs':>7}")
+    for size in QUEUE_SIZES:
+        result = bench(size)
+        idle_ms = bench_idle_tick(size)
+        tick_ms, pairs = bench_tick(size)
+        print(f"{size:>10} {result['join+match']:>17.2f} {result['leave+rejoin']:>19.2f} {idle_ms:>16.2f} "
+              f"{tick_ms:>16.2f} {pairs:>7}")
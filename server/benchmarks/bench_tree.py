@@ -0,0 +1,95 @@
+"""Build time and memory for large tree test cases.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_tree
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+from executor.utils.tree_utils import ArrayTree, build_tree, tree_to_list
+
+SIZES = [10_000, 100_000, 1_000_000]
+# The old builder is quadratic; it is only timed where that finishes quickly
+LEGACY_MAX_SIZE = 100_000
+
+
+class LegacyTreeNode:
+    def __init__(self, val=0, left=None, right=None):
+        self.val = val
+        self.left = left
+        self.right = right
+
+
+def legacy_build_tree(values):
+    """The builder this module used before: list.pop(0) and nodes without __slots__."""
+    if not values:
+        return None
+    root = LegacyTreeNode(values[0])
+    queue = [root]
+    i = 1
+    while queue and i < len(values):
+        node = queue.pop(0)
+        if i < len(values) and values[i] is not None:
+            node.left = LegacyTreeNode(values[i])
+            queue.append(node.left)
+        i += 1
+        if i < len(values) and values[i] is not None:
+            node.right = LegacyTreeNode(values[i])
+            queue.append(node.right)
+        i += 1
+    return root
+
+
+def level_order(size: int) -> list:
+    # A complete tree with the occasional missing child
+    values = [random.randint(-10**6, 10**6) for _ in range(size)]
+    for i in range(1, size, 97):
+        values[i] = None
+    return values
+
+
+def measure(func, values):
+    """(seconds, MB allocated and still held by the result)."""
+    gc.collect()
+    start = time.perf_counter()
+    func(values)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(values)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, held / (1024 * 1024)
+
+
+def time_once(func, arg) -> float:
+    start = time.perf_counter()
+    func(arg)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'nodes':>10} {'legacy build':>14} {'legacy MB':>10} {'build':>9} {'MB':>8}"
+          f" {'serialize':>10} {'array build':>12} {'array MB':>9} {'array ==':>9}")
+    for size in SIZES:
+        values = level_order(size)
+
+        if size <= LEGACY_MAX_SIZE:
+            legacy_s, legacy_mb = measure(legacy_build_tree, values)
+            legacy = f"{legacy_s * 1e3:>12.1f}ms {legacy_mb:>10.1f}"
+        else:
+            legacy = f"{'skipped':>14} {'-':>10}"
+
+        build_s, build_mb = measure(build_tree, values)
+        serialize_s = time_once(tree_to_list, build_tree(values))
+        array_s, array_mb = measure(ArrayTree.from_list, values)
+        first, second = ArrayTree.from_list(values), ArrayTree.from_list(values)
+        compare_s = time_once(first.__eq__, second)
+
+        print(f"{size:>10} {legacy} {build_s * 1e3:>7.1f}ms {build_mb:>8.1f} {serialize_s * 1e3:>8.1f}ms"
+              f" {array_s * 1e3:>10.1f}ms {array_mb:>9.1f} {compare_s * 1e3:>7.1f}ms")
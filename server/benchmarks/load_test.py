@@ -0,0 +1,221 @@
+"""Load generator: simulated players going join_queue -> match_found -> submit_code -> match_ended.
+
+Run from the server directory:
+
+    python -m benchmarks.load_test --clients 200 --mode asgi
+    python -m benchmarks.load_test --clients 200 --url http://127.0.0.1:5000
+
+Without --url a local server (benchmarks/local_server.py, on mongomock
+unless MONGO_DB_KEY is set) is started in the given mode and stopped
+afterwards. Reports p50/p95/p99 time-to-match and judge latency (submit_code
+to code_results) and the rate of events the clients received.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import socketio
+
+from benchmarks.bench_executor import MISSING_NUMBER
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile; None without samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: List[float]) -> Dict[str, Optional[float]]:
+    return {'count': len(samples), 'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95), 'p99': percentile(samples, 99)}
+
+
+class LoadStats:
+    def __init__(self):
+        self.time_to_match: List[float] = []
+        self.judge_latency: List[float] = []
+        self.events = 0
+        self.completed = 0
+        self.failures: List[str] = []
+        self.lock = threading.Lock()
+
+    def event(self):
+        with self.lock:
+            self.events += 1
+
+    def add(self, samples: List[float], value: float):
+        with self.lock:
+            samples.append(value)
+
+    def fail(self, reason: str):
+        with self.lock:
+            self.failures.append(reason)
+
+    def finish(self):
+        with self.lock:
+            self.completed += 1
+
+
+class SimulatedPlayer:
+    """One Socket.IO client playing a whole match with a correct solution."""
+
+    def __init__(self, index: int, url: str, algorithm_type: str, stats: LoadStats, timeout: float):
+        self.clerkId = f"load-{index}"
+        self.url = url
+        self.algorithm_type = algorithm_type
+        self.stats = stats
+        self.timeout = timeout
+        self.match = None
+        self.matched = threading.Event()
+        self.judged = threading.Event()
+        self.ended = threading.Event()
+
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('*', self._on_event)
+
+    def _on_event(self, event: str, data=None):
+        self.stats.event()
+        if event == 'match_found':
+            self.match = data
+            self.matched.set()
+        elif event == 'code_results':
+            self.judged.set()
+        elif event == 'match_ended':
+            self.ended.set()
+        elif event in ('error', 'submission_rejected'):
+            self.stats.fail(f"{event}: {data}")
+
+    def _wait(self, event: threading.Event, stage: str) -> bool:
+        if not event.wait(self.timeout):
+            self.stats.fail(f"timed out waiting for {stage}")
+            return False
+        return True
+
+    def run(self):
+        try:
+            self.client.connect(self.url, transports=['websocket'])
+            start = time.perf_counter()
+            self.client.emit('join_queue', {'clerkId': self.clerkId, 'player_name': self.clerkId,
+                                            'algorithm_type': self.algorithm_type})
+            if not self._wait(self.matched, 'match_found'):
+                return
+            self.stats.add(self.stats.time_to_match, (time.perf_counter() - start) * 1e3)
+
+            start = time.perf_counter()
+            # A distinct program per player, so submissions are judged rather than served from the result cache
+            code = f"{MISSING_NUMBER}\n_player = {self.clerkId!r}\n"
+            self.client.emit('submit_code', {'code': code, 'match_id': self.match['match_id'],
+                                             'clerkId': self.clerkId})
+            if not self._wait(self.judged, 'code_results'):
+                return
+            self.stats.add(self.stats.judge_latency, (time.perf_counter() - start) * 1e3)
+
+            if self._wait(self.ended, 'match_ended'):
+                self.stats.finish()
+        except Exception as e:
+            self.stats.fail(f"{type(e).__name__}: {str(e)}")
+        finally:
+            self.client.disconnect()
+
+
+def run_load(url: str, clients: int, ramp: float = 1.0, algorithm_type: str = 'array',
+             timeout: float = 60.0) -> dict:
+    """Drive `clients` simulated players (joining over `ramp` seconds) and summarize their latencies."""
+    stats = LoadStats()
+    players = [SimulatedPlayer(i, url, algorithm_type, stats, timeout) for i in range(clients)]
+    threads = [threading.Thread(target=player.run, daemon=True) for player in players]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        time.sleep(ramp / clients)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'clients': clients,
+        'completed': stats.completed,
+        'failures': len(stats.failures),
+        'first_failures': stats.failures[:5],
+        'time_to_match_ms': summarize(stats.time_to_match),
+        'judge_latency_ms': summarize(stats.judge_latency),
+        'events_per_second': stats.events / elapsed,
+        'elapsed_s': elapsed
+    }
+
+
+def start_local_server(mode: str, port: int, tests: int, size: int, match_duration: float) -> subprocess.Popen:
+    env = dict(os.environ, MATCH_DURATION=str(int(match_duration)))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.local_server', '--mode', mode, '--port', str(port),
+         '--tests', str(tests), '--size', str(size)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError("Local server did not start")
+            time.sleep(0.2)
+
+
+def print_report(report: dict):
+    print(f"{report['clients']} clients, {report['completed']} finished their match, "
+          f"{report['failures']} failures in {report['elapsed_s']:.1f}s")
+    for reason in report['first_failures']:
+        print(f"  {reason}")
+    print(f"{'':>16} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name in ('time_to_match_ms', 'judge_latency_ms'):
+        summary = report[name]
+        print(f"{name:>16} " + " ".join(f"{summary[q]:>9.1f}" if summary[q] is not None else f"{'-':>9}"
+                                        for q in ('p50', 'p95', 'p99')))
+    print(f"{'events/s':>16} {report['events_per_second']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--ramp', type=float, default=1.0, help="seconds over which clients join")
+    parser.add_argument('--url', help="an already running server; otherwise a local one is started")
+    parser.add_argument('--mode', choices=['threading', 'asgi'], default='threading')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--tests', type=int, default=10)
+    parser.add_argument('--size', type=int, default=1_000)
+    parser.add_argument('--match-duration', type=float, default=3)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.url is None:
+        server = start_local_server(args.mode, args.port, args.tests, args.size, args.match_duration)
+    try:
+        report = run_load(args.url or f"http://127.0.0.1:{args.port}", args.clients, args.ramp,
+                          timeout=args.timeout + args.match_duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
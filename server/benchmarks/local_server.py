@@ -0,0 +1,65 @@
+"""A LitCode server for load testing: seeded questions, short matches, any origin.
+
+Run from the server directory (load_test.py starts it for you):
+
+    python -m benchmarks.local_server --mode asgi --port 5099
+
+Without MONGO_DB_KEY the server runs on mongomock. With it (a local
+mongod), the seeded questions are added next to the existing ones and
+removed again on exit.
+"""
+import argparse
+import atexit
+import os
+
+import pymongo
+
+from benchmarks.bench_executor import missing_number_tests
+
+SEEDED_QUESTIONS = 4
+
+
+def seed_questions(collection, tests: int, size: int):
+    collection.insert_many([{
+        'title': f"Load test {i}",
+        'description': "Find the missing number.",
+        'type': 'array',
+        'testCases': missing_number_tests(tests, size),
+        'benchmark': True
+    } for i in range(SEEDED_QUESTIONS)])
+    atexit.register(collection.delete_many, {'benchmark': True})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['threading', 'asgi'], default='threading')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--tests', type=int, default=10, help="test cases per question")
+    parser.add_argument('--size', type=int, default=1_000, help="input size of each test case")
+    args = parser.parse_args()
+
+    mock = not os.getenv('MONGO_DB_KEY')
+    if mock:
+        import mongomock
+        pymongo.MongoClient = mongomock.MongoClient
+    # Each match ends on its timer unless the caller says otherwise
+    os.environ.setdefault('MATCH_DURATION', '3')
+
+    import lan_server
+    seed_questions(lan_server.questions_collection, args.tests, args.size)
+
+    if args.mode == 'asgi':
+        import asgi_server
+        import uvicorn
+
+        asgi_server.sio.eio.cors_allowed_origins = '*'
+        uvicorn.run(asgi_server.app, host=args.host, port=args.port, log_level='warning')
+    else:
+        lan_server.socketio.server.eio.cors_allowed_origins = '*'
+        lan_server.start_services()
+        lan_server.socketio.run(lan_server.app, host=args.host, port=args.port, allow_unsafe_werkzeug=True)
+
+
+if __name__ == '__main__':
+    main()
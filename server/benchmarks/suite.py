@@ -0,0 +1,105 @@
+"""Every benchmark in one run, optionally checked against a saved baseline.
+
+Run from the server directory:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --baseline baseline.json      # exits 1 on a regression
+    python -m benchmarks.suite --skip-load                   # microbenchmarks only
+
+Timings are medians in ms (lower is better); events_per_second is higher
+is better. A result regresses when it is more than --tolerance (default
+25%) worse than the baseline.
+"""
+import argparse
+import json
+import sys
+from typing import Dict
+
+from benchmarks import bench_executor, bench_matchmaking, bench_tree
+from benchmarks.load_test import run_load, start_local_server
+from executor.utils.tree_utils import build_tree
+
+HIGHER_IS_BETTER = ('events_per_second',)
+
+
+def micro() -> Dict[str, float]:
+    results = {}
+    for kind in bench_executor.INPUTS:
+        results[f"prepare_test_input.{kind}_10k_ms"] = bench_executor.bench_prepare(kind, 10_000)
+    results['execute_code.20x10k_ms'] = bench_executor.bench_execute(20, 10_000)
+    results['execute_code.20x10k_parallel4_ms'] = bench_executor.bench_execute(20, 10_000, 4)
+
+    values = bench_tree.level_order(100_000)
+    results['build_tree.100k_ms'] = bench_executor.median_ms(lambda: build_tree(values))
+
+    matchmaking = bench_matchmaking.bench(10_000)
+    results['find_match.10k_waiting_us'] = matchmaking['join+match']
+    return results
+
+
+def load(mode: str, clients: int, port: int) -> Dict[str, float]:
+    server = start_local_server(mode, port, tests=10, size=1_000, match_duration=3)
+    try:
+        report = run_load(f"http://127.0.0.1:{port}", clients, ramp=1.0, timeout=63)
+    finally:
+        server.terminate()
+        server.wait()
+    if report['failures']:
+        print(f"load test ({mode}): {report['failures']} failures, e.g. {report['first_failures'][:2]}")
+
+    results = {f"load.{mode}.events_per_second": report['events_per_second']}
+    for name in ('time_to_match_ms', 'judge_latency_ms'):
+        for q in ('p50', 'p95', 'p99'):
+            if report[name][q] is not None:
+                results[f"load.{mode}.{name.replace('_ms', '')}_{q}_ms"] = report[name][q]
+    return results
+
+
+def regressions(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> Dict[str, tuple]:
+    worse = {}
+    for name, value in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (before - value) / before if name.endswith(HIGHER_IS_BETTER) else (value - before) / before
+        if change > tolerance:
+            worse[name] = (before, value)
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--save', help="write this run's results as JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--modes', default='threading,asgi')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    results = micro()
+    if not args.skip_load:
+        for mode in args.modes.split(','):
+            results.update(load(mode, args.clients, args.port))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    for name, value in results.items():
+        before = f"{baseline[name]:>12.2f}" if name in baseline else f"{'':>12}"
+        print(f"{name:<45} {before} {value:>12.2f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    worse = regressions(results, baseline, args.tolerance)
+    for name, (before, value) in worse.items():
+        print(f"REGRESSION {name}: {before:.2f} -> {value:.2f}")
+    sys.exit(1 if worse else 0)
+
+
+if __name__ == '__main__':
+    main()
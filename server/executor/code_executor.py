@@ -1,71 +1,289 @@
-import threading
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import json
 import ast
+import os
+import pickle
+import signal
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from contextlib import redirect_stdout, redirect_stderr
 from executor.utils.tree_utils import TreeNode, build_tree
+from executor.worker_pool import WorkerPool, TimeoutException, WorkerCrashedException, get_default_pool
+from executor.compiled_tests import CompiledTestCache, get_default_cache
+from executor.comparators import Comparator, CustomComparator, get_comparator
+from executor.complexity import DEFAULT_SIZES, generate_input, grade, validate_spec
+from executor.resource_usage import memory_limit, peak_rss_kb, reset_peak_rss
+from executor.result_cache import SubmissionResultCache, get_default_result_cache, is_cacheable
 
+# Functions already defined in this worker process, keyed by source code
+_loaded_functions = {}
+_MAX_LOADED_FUNCTIONS = 8
 
-class TimeoutException(Exception):
-    pass
+
+def clamp_parallelism(parallelism: Any, limit: int) -> int:
+    """A question's `parallelism` setting as a worker count in 1..limit; unusable values mean 1."""
+    try:
+        parallelism = int(parallelism)
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(parallelism, limit))
 
 
 class CodeExecutor:
-    def __init__(self, timeout_seconds: int = 5):
+    def __init__(self, timeout_seconds: int = 5, pool: Optional[WorkerPool] = None,
+                 test_cache: Optional[CompiledTestCache] = None,
+                 result_cache: Optional[SubmissionResultCache] = None):
         self.timeout_seconds = timeout_seconds
+        self.pool = pool
+        self.test_cache = test_cache if test_cache is not None else get_default_cache()
+        self.result_cache = result_cache if result_cache is not None else get_default_result_cache()
 
-    def prepare_test_input(self, input_str: str) -> Union[Dict, List]:
-        """Convert input string to appropriate Python objects."""
+    def parse_test_input(self, input_str: str) -> Union[Dict, List]:
+        """Decode an input string, leaving trees in level-order list form."""
         try:
-            # Handle direct array input
-            if input_str.strip().startswith('['):
-                return json.loads(input_str)
+            return json.loads(input_str)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
 
-            input_data = json.loads(input_str)
+    def build_test_input(self, input_data: Union[Dict, List]) -> Union[Dict, List]:
+        """Build the runtime objects (trees) for decoded input, in place."""
+        if isinstance(input_data, dict):
+            # Handle tree problems
+            if "tree" in input_data:
+                input_data["tree"] = build_tree(input_data["tree"])
+        return input_data
 
-            if isinstance(input_data, dict):
-                # Handle tree problems
-                if "tree" in input_data:
-                    input_data["tree"] = build_tree(input_data["tree"])
+    def prepare_test_input(self, input_str: str) -> Union[Dict, List]:
+        """Convert input string to appropriate Python objects."""
+        return self.build_test_input(self.parse_test_input(input_str))
 
-            return input_data
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid input format: {str(e)}")
+    def decode_expected(self, expected: str) -> Tuple[bool, Any]:
+        """Decode an expected output once; returns (is_json, value)."""
+        try:
+            return True, json.loads(expected)
+        except json.JSONDecodeError:
+            return False, str(expected).strip()
 
-    def compare_outputs(self, expected: str, actual: Any) -> bool:
+    def compare_decoded(self, decoded: Tuple[bool, Any], actual: Any,
+                        comparator: Optional[Comparator] = None) -> bool:
+        """Compare a decoded (and prepared) expected output with actual output."""
+        is_json, expected_value = decoded
+        if not is_json and not isinstance(comparator, CustomComparator):
+            return expected_value == str(actual).strip()
+        return (comparator or get_comparator(None)).matches(expected_value, actual)
+
+    def compare_outputs(self, expected: str, actual: Any, comparator_spec=None) -> bool:
         """Compare expected output with actual output."""
+        comparator = get_comparator(comparator_spec)
+        is_json, expected_value = self.decode_expected(expected)
+        if is_json:
+            expected_value = comparator.prepare(expected_value)
+        return self.compare_decoded((is_json, expected_value), actual, comparator)
+
+    def compile_test_case(self, test_case: Dict, comparator_spec=None) -> Dict[str, Any]:
+        """Pre-parse a test case's input and prepare its expected output for the question's comparator."""
+        compiled = {
+            "testId": test_case["testId"],
+            "input": None,
+            "expected": None,
+            "comparator": comparator_spec,
+            "error": None
+        }
         try:
-            expected_value = json.loads(expected)
-            return expected_value == actual
-        except json.JSONDecodeError:
-            return str(expected).strip() == str(actual).strip()
+            compiled["input"] = self.parse_test_input(test_case["input"])
+            is_json, expected_value = self.decode_expected(test_case["output"])
+            if is_json:
+                expected_value = get_comparator(comparator_spec).prepare(expected_value)
+            compiled["expected"] = (is_json, expected_value)
+        except Exception as e:
+            compiled["error"] = str(e)
+        return compiled
+
+    def compile_test_cases(self, test_cases: List[Dict], question_id: Optional[str] = None,
+                           comparator_spec=None) -> List[bytes]:
+        """Return pickled compiled test cases, served from the per-question cache when possible.
+
+        Every worker unpickles its own copy and rebuilds trees from the level-order
+        lists, so user code mutating its input can never affect later runs.
+        `comparator_spec` is the question's output comparator (see executor.comparators);
+        expected outputs are prepared for it here, once per question.
+        """
+        if question_id is not None:
+            compiled_tests = self.test_cache.get(question_id)
+            if compiled_tests is not None:
+                return compiled_tests
+
+        compiled_tests = [pickle.dumps(self.compile_test_case(test_case, comparator_spec), pickle.HIGHEST_PROTOCOL)
+                          for test_case in test_cases]
+        if question_id is not None:
+            self.test_cache.put(question_id, compiled_tests)
+        return compiled_tests
 
     def execute_function_with_timeout(self, func, *args, **kwargs) -> Any:
-        """Execute a function with a timeout."""
-        result = {}
+        """Execute a function in a pool worker, hard-killing the worker on timeout."""
+        pool = self.pool or get_default_pool()
+        return pool.run(func, args, kwargs, timeout=self.timeout_seconds)
+
+    def load_function(self, user_code: str):
+        """Execute the user's code and return the main function it defines."""
+        global_dict = {
+            'TreeNode': TreeNode,
+            'print': print,
+            '__builtins__': __builtins__,
+        }
+
+        # Validate the code syntax
+        ast.parse(user_code)
+
+        # Execute the user's code to define their function
+        exec(user_code, global_dict)
+
+        # Find the main function in the user's code
+        for name, obj in global_dict.items():
+            if callable(obj) and name not in ['TreeNode', 'print']:
+                return obj
+
+        raise ValueError("No function found in the code")
+
+    def run_test_case(self, main_function, compiled_test: Dict,
+                      memory_limit_mb: Optional[int] = None) -> Dict[str, Any]:
+        """Run a single compiled test case against the user's function, measuring what it costs."""
+        test_result = {
+            "test_id": compiled_test["testId"],
+            "passed": False,
+            "error": None,
+            "wall_ms": 0.0,
+            "cpu_ms": 0.0,
+            "peak_rss_kb": None
+        }
+
+        try:
+            if compiled_test["error"]:
+                raise ValueError(compiled_test["error"])
+
+            # Prepare input
+            input_data = self.build_test_input(compiled_test["input"])
 
-        def target():
+            # Capture stdout and stderr
+            stdout = StringIO()
+            stderr = StringIO()
+
+            reset_peak_rss()
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
             try:
-                result["value"] = func(*args, **kwargs)
+                with redirect_stdout(stdout), redirect_stderr(stderr), memory_limit(memory_limit_mb):
+                    if isinstance(input_data, dict):
+                        result = main_function(**input_data)
+                    else:
+                        result = main_function(input_data)
+                self._record_usage(test_result, wall_start, cpu_start)
+
+                # Check if the result matches expected output
+                comparator = get_comparator(compiled_test["comparator"])
+                try:
+                    test_result["passed"] = self.compare_decoded(compiled_test["expected"], result, comparator)
+                except Exception as e:
+                    test_result["error"] = f"Checker error: {str(e)}"
+
+            except MemoryError:
+                self._record_usage(test_result, wall_start, cpu_start)
+                test_result["error"] = "Memory limit exceeded" if memory_limit_mb else "Runtime error: out of memory"
             except Exception as e:
-                result["error"] = str(e)
+                self._record_usage(test_result, wall_start, cpu_start)
+                test_result["error"] = f"Runtime error: {str(e)}\n{stderr.getvalue()}"
 
-        thread = threading.Thread(target=target)
-        thread.start()
-        thread.join(self.timeout_seconds)
+        except Exception as e:
+            test_result["error"] = f"Test case error: {str(e)}"
 
-        if thread.is_alive():
-            raise TimeoutException("Code execution timed out")
+        return test_result
 
-        if "error" in result:
-            raise RuntimeError(result["error"])
+    def _record_usage(self, test_result: Dict[str, Any], wall_start: float, cpu_start: float):
+        test_result["wall_ms"] = (time.perf_counter() - wall_start) * 1000
+        test_result["cpu_ms"] = (time.process_time() - cpu_start) * 1000
+        test_result["peak_rss_kb"] = peak_rss_kb()
 
-        return result.get("value")
+    def run_test_case_in_worker(self, user_code: str, test_id: str, compiled_test: bytes,
+                                memory_limit_mb: Optional[int] = None) -> Dict[str, Any]:
+        """Run a single test case in the worker pool, mapping timeouts and crashes to test errors."""
+        try:
+            return self.execute_function_with_timeout(_run_test_case, user_code, compiled_test, memory_limit_mb)
+        except TimeoutException:
+            error = "Execution timed out"
+            wall_ms = self.timeout_seconds * 1000
+        except WorkerCrashedException as e:
+            error = f"Runtime error: {str(e)}"
+            wall_ms = None
+
+        return {
+            "test_id": test_id,
+            "passed": False,
+            "error": error,
+            "wall_ms": wall_ms,
+            "cpu_ms": None,
+            "peak_rss_kb": None
+        }
 
-    def execute_code(self, user_code: str, test_cases: List[Dict]) -> Dict[str, Any]:
-        """Execute user code against test cases."""
+    def iter_test_results(self, user_code: str, test_cases: List[Dict], parallelism: int = 1,
+                          question_id: Optional[str] = None, fail_fast: bool = False,
+                          memory_limit_mb: Optional[int] = None, comparator=None) -> Iterator[Dict[str, Any]]:
+        """Yield test results one at a time, in testId order, as the workers finish them.
+
+        With fail_fast, judging stops at the first failing test and queued tests are
+        never run. With memory_limit_mb, a test allocating more than that fails with
+        "Memory limit exceeded". Syntax and load errors are raised to the caller.
+        """
+        # Validate the code syntax before handing it to a worker
+        ast.parse(user_code)
+
+        compiled_tests = self.compile_test_cases(test_cases, question_id, comparator)
+        jobs = [(user_code, test_case["testId"], compiled_test, memory_limit_mb)
+                for test_case, compiled_test in zip(test_cases, compiled_tests)]
+
+        parallelism = clamp_parallelism(parallelism, min(len(test_cases), (self.pool or get_default_pool()).size,
+                                                         os.cpu_count() or 1))
+        if parallelism <= 1:
+            for job in jobs:
+                test_result = self.run_test_case_in_worker(*job)
+                yield test_result
+                if fail_fast and not test_result["passed"]:
+                    return
+            return
+
+        fan_out = ThreadPoolExecutor(max_workers=parallelism)
+        try:
+            futures = [fan_out.submit(self.run_test_case_in_worker, *job) for job in jobs]
+            for future in futures:
+                test_result = future.result()
+                yield test_result
+                if fail_fast and not test_result["passed"]:
+                    return
+        finally:
+            fan_out.shutdown(wait=False, cancel_futures=True)
+
+    def execute_code(self, user_code: str, test_cases: List[Dict], parallelism: int = 1,
+                     question_id: Optional[str] = None, fail_fast: bool = False,
+                     memory_limit_mb: Optional[int] = None, comparator=None) -> Dict[str, Any]:
+        """Execute user code against test cases, sharding them over up to `parallelism` workers.
+
+        With a question_id, results of code already judged against the same
+        test set are returned from the result cache.
+        """
+        cache_key = None
+        if question_id is not None:
+            try:
+                cache_key = self.result_cache.key(user_code, question_id, test_cases, fail_fast,
+                                                 memory_limit_mb)
+            except SyntaxError:
+                pass
+            else:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        start = time.perf_counter()
         results = {
             "passed": 0,
             "total": len(test_cases),
@@ -73,66 +291,11 @@ class CodeExecutor:
             "test_results": []
         }
 
-        # Prepare the execution environment
-        global_dict = {
-            'TreeNode': TreeNode,
-            'print': print,
-            '__builtins__': __builtins__,
-        }
-
         try:
-            # Validate the code syntax
-            ast.parse(user_code)
-
-            # Execute the user's code to define their function
-            exec(user_code, global_dict)
-
-            # Find the main function in the user's code
-            main_function = None
-            for name, obj in global_dict.items():
-                if callable(obj) and name not in ['TreeNode', 'print']:
-                    main_function = obj
-                    break
-
-            if main_function is None:
-                raise ValueError("No function found in the code")
-
-            # Run each test case
-            for test_case in test_cases:
-                test_result = {
-                    "test_id": test_case["testId"],
-                    "passed": False,
-                    "error": None
-                }
-
-                try:
-                    # Prepare input
-                    input_data = self.prepare_test_input(test_case["input"])
-
-                    # Capture stdout and stderr
-                    stdout = StringIO()
-                    stderr = StringIO()
-
-                    try:
-                        with redirect_stdout(stdout), redirect_stderr(stderr):
-                            if isinstance(input_data, dict):
-                                result = self.execute_function_with_timeout(main_function, **input_data)
-                            else:
-                                result = self.execute_function_with_timeout(main_function, input_data)
-
-                        # Check if the result matches expected output
-                        if self.compare_outputs(test_case["output"], result):
-                            test_result["passed"] = True
-                            results["passed"] += 1
-
-                    except TimeoutException:
-                        test_result["error"] = "Execution timed out"
-                    except Exception as e:
-                        test_result["error"] = f"Runtime error: {str(e)}\n{stderr.getvalue()}"
-
-                except Exception as e:
-                    test_result["error"] = f"Test case error: {str(e)}"
-
+            for test_result in self.iter_test_results(user_code, test_cases, parallelism, question_id, fail_fast,
+                                                      memory_limit_mb, comparator):
+                if test_result["passed"]:
+                    results["passed"] += 1
                 results["test_results"].append(test_result)
                 if test_result["error"]:
                     results["errors"].append(test_result["error"])
@@ -142,8 +305,98 @@ class CodeExecutor:
         except Exception as e:
             results["errors"].append(f"Execution error: {str(e)}")
 
+        if cache_key is not None and is_cacheable(results):
+            self.result_cache.put(cache_key, results, time.perf_counter() - start)
         return results
 
+    def grade_complexity(self, user_code: str, spec: Dict[str, Any],
+                         memory_limit_mb: Optional[int] = None) -> Dict[str, Any]:
+        """Time the user's function on generated inputs of growing size and fit its complexity class.
+
+        The whole sweep runs in one worker. A size whose call takes longer than
+        the spec's budgetMs aborts the sweep there; the worker survives.
+        """
+        validate_spec(spec)
+        budget_seconds = spec.get('budgetMs', 2000) / 1000
+        repeats = max(1, spec.get('repeats', 3))
+        # Safety net in case the in-worker budget can't interrupt the call
+        timeout = self.timeout_seconds + len(spec.get('sizes', DEFAULT_SIZES)) * repeats * budget_seconds
+
+        pool = self.pool or get_default_pool()
+        try:
+            timings, aborted_at = pool.run(_measure_growth, (user_code, spec, memory_limit_mb), timeout=timeout)
+        except TimeoutException:
+            return grade(spec, [], None, "Execution timed out")
+        except WorkerCrashedException as e:
+            return grade(spec, [], None, f"Runtime error: {str(e)}")
+        except MemoryError:
+            return grade(spec, [], None, "Memory limit exceeded")
+        except Exception as e:
+            return grade(spec, [], None, f"Runtime error: {str(e)}")
+        return grade(spec, timings, aborted_at)
+
+
+def _load_cached_function(executor: CodeExecutor, user_code: str):
+    main_function = _loaded_functions.get(user_code)
+    if main_function is None:
+        if len(_loaded_functions) >= _MAX_LOADED_FUNCTIONS:
+            _loaded_functions.clear()
+        main_function = executor.load_function(user_code)
+        _loaded_functions[user_code] = main_function
+    return main_function
+
+
+def _run_test_case(user_code: str, compiled_test: bytes, memory_limit_mb: Optional[int] = None) -> Dict[str, Any]:
+    """Worker entry point: load the user's function (cached per worker) and run one test case."""
+    executor = CodeExecutor()
+    main_function = _load_cached_function(executor, user_code)
+    return executor.run_test_case(main_function, pickle.loads(compiled_test), memory_limit_mb)
+
+
+class _BudgetExceeded(BaseException):
+    """Raised by the interval timer; a BaseException so user code's `except Exception` can't swallow it."""
+
+
+def _raise_budget_exceeded(signum, frame):
+    raise _BudgetExceeded()
+
+
+def _measure_growth(user_code: str, spec: Dict[str, Any],
+                    memory_limit_mb: Optional[int] = None) -> Tuple[List[Dict[str, float]], Optional[int]]:
+    """Worker entry point for complexity grading: best-of-`repeats` call time at each size.
+
+    Returns (timings, aborted_at), where aborted_at is the first size whose call
+    ran past budgetMs (None when every size finished).
+    """
+    main_function = _load_cached_function(CodeExecutor(), user_code)
+    budget_seconds = spec.get('budgetMs', 2000) / 1000
+    repeats = max(1, spec.get('repeats', 3))
+    timings = []
+    size = None
+
+    previous_handler = signal.signal(signal.SIGALRM, _raise_budget_exceeded)
+    try:
+        for size in sorted(spec.get('sizes', DEFAULT_SIZES)):
+            best = None
+            for _ in range(repeats):
+                # Fresh input every call, since solutions may modify their input
+                args, kwargs = generate_input(spec, size)
+                with redirect_stdout(StringIO()), memory_limit(memory_limit_mb):
+                    signal.setitimer(signal.ITIMER_REAL, budget_seconds)
+                    start = time.perf_counter()
+                    try:
+                        main_function(*args, **kwargs)
+                    finally:
+                        elapsed = time.perf_counter() - start
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append({'n': size, 'ms': best * 1000})
+    except _BudgetExceeded:
+        return timings, size
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+    return timings, None
 
 
 # Example usage
@@ -0,0 +1,172 @@
+import json
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Union
+
+from executor.utils.tree_utils import ArrayTree, TreeNode, tree_to_list
+
+_MAX_COMPILED = 64
+
+
+def _freeze(value: Any, unordered: Optional[str] = None) -> Any:
+    """Hashable form of a decoded JSON value.
+
+    With `unordered` ('set' or 'multiset'), nested lists are frozen without
+    their order as well.
+    """
+    if isinstance(value, (list, tuple)):
+        items = [_freeze(item, unordered) for item in value]
+        if unordered == 'set':
+            return frozenset(items)
+        if unordered == 'multiset':
+            return frozenset(Counter(items).items())
+        return tuple(items)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item, unordered) for item in value)
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item, unordered)) for key, item in value.items())
+    if isinstance(value, TreeNode):
+        return _freeze(tree_to_list(value), unordered)
+    return value
+
+
+class Comparator:
+    """Checks a function's output against an expected value prepared once, when tests are compiled."""
+
+    def prepare(self, expected: Any) -> Any:
+        return expected
+
+    def matches(self, prepared: Any, actual: Any) -> bool:
+        raise NotImplementedError
+
+
+class ExactComparator(Comparator):
+    def matches(self, prepared: Any, actual: Any) -> bool:
+        # Fast path: primitives of the same type
+        if type(prepared) is type(actual) and type(actual) in (int, str, bool):
+            return prepared == actual
+        if isinstance(actual, TreeNode):
+            # Tree outputs are expected in level-order form; trailing nulls don't matter
+            return isinstance(prepared, list) and ArrayTree.from_tree(actual) == ArrayTree.from_list(prepared)
+        return prepared == actual
+
+
+class UnorderedComparator(Comparator):
+    """Same elements in any order, duplicates ignored. With deep, nested lists are unordered too."""
+
+    kind = 'set'
+
+    def __init__(self, deep: bool = False):
+        self.deep = deep
+
+    def _collect(self, items) -> Any:
+        return frozenset(items)
+
+    def prepare(self, expected: Any) -> Any:
+        if not isinstance(expected, list):
+            return _freeze(expected)
+        nested = self.kind if self.deep else None
+        return self._collect(_freeze(item, nested) for item in expected)
+
+    def matches(self, prepared: Any, actual: Any) -> bool:
+        if isinstance(actual, TreeNode):
+            actual = tree_to_list(actual)
+        if not isinstance(actual, (list, tuple, set, frozenset)):
+            return prepared == _freeze(actual)
+        nested = self.kind if self.deep else None
+        try:
+            return prepared == self._collect(_freeze(item, nested) for item in actual)
+        except TypeError:
+            # Unhashable values the decoded JSON can't contain
+            return False
+
+
+class MultisetComparator(UnorderedComparator):
+    """Same elements with the same counts, in any order."""
+
+    kind = 'multiset'
+
+    def _collect(self, items) -> Any:
+        return Counter(items)
+
+
+class FloatComparator(Comparator):
+    """Numbers anywhere in the output match within a relative or absolute tolerance."""
+
+    def __init__(self, rel_tol: float = 1e-9, abs_tol: float = 1e-6):
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+
+    def matches(self, prepared: Any, actual: Any) -> bool:
+        if isinstance(prepared, (int, float)) and not isinstance(prepared, bool):
+            return (isinstance(actual, (int, float)) and not isinstance(actual, bool)
+                    and math.isclose(prepared, actual, rel_tol=self.rel_tol, abs_tol=self.abs_tol))
+        if isinstance(prepared, list):
+            return (isinstance(actual, (list, tuple)) and len(prepared) == len(actual)
+                    and all(self.matches(e, a) for e, a in zip(prepared, actual)))
+        if isinstance(prepared, dict):
+            return (isinstance(actual, dict) and prepared.keys() == actual.keys()
+                    and all(self.matches(prepared[key], actual[key]) for key in prepared))
+        return prepared == actual
+
+
+class CustomComparator(Comparator):
+    """Question-supplied `check(expected, actual) -> bool`.
+
+    The code is only syntax-checked here; it is executed on first use, which
+    happens in the judge workers.
+    """
+
+    def __init__(self, code: str):
+        self.code = compile(code, '<checker>', 'exec')
+        self._check = None
+
+    def matches(self, prepared: Any, actual: Any) -> bool:
+        if self._check is None:
+            namespace = {'TreeNode': TreeNode, 'tree_to_list': tree_to_list}
+            exec(self.code, namespace)
+            if not callable(namespace.get('check')):
+                raise ValueError("Custom checker must define check(expected, actual)")
+            self._check = namespace['check']
+        return bool(self._check(prepared, actual))
+
+
+def create_comparator(spec: Union[str, Dict, None]) -> Comparator:
+    """Build a comparator from a question's spec, e.g. "unordered" or {"type": "float", "abs_tol": 1e-4}."""
+    if spec is None:
+        return ExactComparator()
+    if isinstance(spec, str):
+        spec = {'type': spec}
+
+    kind = spec.get('type', 'exact')
+    if kind == 'exact':
+        return ExactComparator()
+    if kind == 'unordered':
+        return UnorderedComparator(spec.get('deep', False))
+    if kind == 'multiset':
+        return MultisetComparator(spec.get('deep', False))
+    if kind == 'float':
+        return FloatComparator(spec.get('rel_tol', 1e-9), spec.get('abs_tol', 1e-6))
+    if kind == 'custom':
+        if not spec.get('code'):
+            raise ValueError("Custom comparator needs 'code'")
+        return CustomComparator(spec['code'])
+    raise ValueError(f"Unknown comparator type: {kind}")
+
+
+_compiled: Dict[str, Comparator] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_comparator(spec: Union[str, Dict, None]) -> Comparator:
+    """Comparator for a spec, built once per process and reused for every test and submission."""
+    key = json.dumps(spec, sort_keys=True)
+    comparator = _compiled.get(key)
+    if comparator is None:
+        comparator = create_comparator(spec)
+        with _compiled_lock:
+            if len(_compiled) >= _MAX_COMPILED:
+                _compiled.clear()
+            _compiled[key] = comparator
+    return comparator
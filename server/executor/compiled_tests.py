@@ -0,0 +1,58 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class CompiledTestCache:
+    """LRU cache of compiled (pickled) test cases per question, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question_id: str) -> Optional[List[bytes]]:
+        with self._lock:
+            entry = self._entries.get(question_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(question_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question_id: str, compiled_tests: List[bytes]):
+        size = sum(len(blob) for blob in compiled_tests)
+        with self._lock:
+            self._discard(question_id)
+            if size > self.max_bytes:
+                # Too big to ever fit; callers still get their compiled tests back
+                return
+            self._entries[question_id] = (compiled_tests, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate(self, question_id: str):
+        with self._lock:
+            self._discard(question_id)
+
+    def _discard(self, question_id: str):
+        entry = self._entries.pop(question_id, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_cache = CompiledTestCache(int(os.getenv('JUDGE_TEST_CACHE_MB', '64')) * 1024 * 1024)
+
+
+def get_default_cache() -> CompiledTestCache:
+    return _default_cache
@@ -0,0 +1,164 @@
+import math
+import random
+import string
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from executor.utils.tree_utils import build_tree
+
+# Growth models from slowest to fastest growing
+COMPLEXITY_CLASSES: List[Tuple[str, Callable[[int], float]]] = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+_RANKS = {name: rank for rank, (name, _) in enumerate(COMPLEXITY_CLASSES)}
+
+DEFAULT_SIZES = [1_000, 2_000, 4_000, 8_000, 16_000]
+
+
+def _array(rng: random.Random, n: int, spec: Dict) -> List[int]:
+    low, high = spec.get('low', -1_000_000), spec.get('high', 1_000_000)
+    return [rng.randint(low, high) for _ in range(n)]
+
+
+def _sorted_array(rng: random.Random, n: int, spec: Dict) -> List[int]:
+    return sorted(_array(rng, n, spec))
+
+
+def _permutation(rng: random.Random, n: int, spec: Dict) -> List[int]:
+    values = list(range(n))
+    rng.shuffle(values)
+    return values
+
+
+def _string(rng: random.Random, n: int, spec: Dict) -> str:
+    alphabet = spec.get('alphabet', string.ascii_lowercase)
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+def _tree(rng: random.Random, n: int, spec: Dict):
+    # Complete binary tree of n random values
+    return build_tree(_array(rng, n, spec))
+
+
+def _graph(rng: random.Random, n: int, spec: Dict) -> Dict[str, List[str]]:
+    # Connected: every node hangs off an earlier one, plus extra random edges
+    degree = spec.get('degree', 2)
+    graph = {str(i): [] for i in range(n)}
+    for i in range(1, n):
+        graph[str(rng.randrange(i))].append(str(i))
+    for _ in range(max(0, degree - 1) * n):
+        graph[str(rng.randrange(n))].append(str(rng.randrange(n)))
+    return graph
+
+
+GENERATORS: Dict[str, Callable[[random.Random, int, Dict], Any]] = {
+    'array': _array,
+    'sorted_array': _sorted_array,
+    'permutation': _permutation,
+    'string': _string,
+    'tree': _tree,
+    'graph': _graph,
+}
+
+
+def validate_spec(spec: Dict):
+    """Raise ValueError for a complexity spec the judge can't run."""
+    if spec.get('generator') not in GENERATORS:
+        raise ValueError(f"Unknown input generator: {spec.get('generator')}")
+    if spec.get('args') and not spec.get('param'):
+        raise ValueError("Complexity spec with 'args' needs a 'param' for the generated input")
+    if spec.get('enforce') and spec.get('expected') is None:
+        raise ValueError("Complexity spec with 'enforce' needs an 'expected' class")
+    if spec.get('expected') is not None and spec['expected'] not in _RANKS:
+        raise ValueError(f"Unknown complexity class: {spec['expected']}")
+    if len(spec.get('sizes', DEFAULT_SIZES)) < 3:
+        raise ValueError("Complexity grading needs at least 3 input sizes")
+
+
+def generate_input(spec: Dict, n: int, seed: int = 0) -> Tuple[tuple, dict]:
+    """Build (args, kwargs) for one call at size n; the same seed always gives the same input."""
+    rng = random.Random(seed * 1_000_003 + n)
+    value = GENERATORS[spec['generator']](rng, n, spec)
+    if not spec.get('param'):
+        return (value,), {}
+    kwargs = dict(spec.get('args', {}))
+    kwargs[spec['param']] = value
+    return (), kwargs
+
+
+def _linear_fit_residual(xs: List[float], ys: List[float]) -> float:
+    """Relative residual of the least-squares fit y = a*x + b."""
+    count = len(xs)
+    mean_x = sum(xs) / count
+    mean_y = sum(ys) / count
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    slope = 0.0 if var_x == 0 else sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    if slope < 0:
+        # Time can't shrink as the model grows; such a fit is no better than a constant
+        slope = 0.0
+    intercept = mean_y - slope * mean_x
+    return sum((y - slope * x - intercept) ** 2 for x, y in zip(xs, ys)) / sum(y * y for y in ys)
+
+
+def _log_log_slope(sizes: List[int], values: List[float]) -> float:
+    log_n = [math.log(n) for n in sizes]
+    log_v = [math.log(max(v, 1e-9)) for v in values]
+    mean_n, mean_v = sum(log_n) / len(log_n), sum(log_v) / len(log_v)
+    var_n = sum((x - mean_n) ** 2 for x in log_n)
+    return sum((x - mean_n) * (y - mean_v) for x, y in zip(log_n, log_v)) / var_n if var_n else 0.0
+
+
+def fit_complexity(sizes: List[int], times: List[float]) -> Dict[str, Any]:
+    """Pick the growth class whose fit t = a*f(n) + b best explains the timings.
+
+    Timing noise makes neighbouring classes (n vs n log n) hard to tell apart,
+    so only classes whose own log-log slope is near the measured one are
+    considered, and among those the simplest class fitting within twice the
+    best residual wins. Verdicts therefore err towards the faster class.
+    """
+    exponent = _log_log_slope(sizes, times)
+    residuals = {}
+    candidates = []
+    for name, model in COMPLEXITY_CLASSES:
+        values = [model(n) for n in sizes]
+        residuals[name] = _linear_fit_residual(values, times)
+        if abs(_log_log_slope(sizes, values) - exponent) <= 0.5:
+            candidates.append(name)
+
+    candidates = candidates or list(residuals)
+    best = min(residuals[name] for name in candidates)
+    chosen = next(name for name in candidates if residuals[name] <= 2 * best + 0.015)
+    return {'class': chosen, 'exponent': exponent, 'residuals': residuals}
+
+
+def grade(spec: Dict, timings: List[Dict[str, Any]], aborted_at: Optional[int],
+          error: Optional[str] = None) -> Dict[str, Any]:
+    """Turn measured timings into a complexity verdict against the spec's `expected` class."""
+    report = {
+        'class': None,
+        'exponent': None,
+        'expected': spec.get('expected'),
+        'enforced': bool(spec.get('enforce')),
+        'passed': None,
+        'timings': timings,
+        'aborted_at': aborted_at,
+        'error': error
+    }
+    if len(timings) >= 3:
+        fit = fit_complexity([t['n'] for t in timings], [t['ms'] for t in timings])
+        report['class'] = fit['class']
+        report['exponent'] = fit['exponent']
+
+    if report['error'] is None and aborted_at is not None:
+        report['error'] = f"Time budget exceeded at n={aborted_at}"
+    elif report['error'] is None and report['class'] is None:
+        report['error'] = "Not enough measurements to fit a growth curve"
+
+    if spec.get('expected') is not None:
+        report['passed'] = (report['error'] is None
+                            and _RANKS[report['class']] <= _RANKS[spec['expected']])
+    return report
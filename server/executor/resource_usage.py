@@ -0,0 +1,65 @@
+"""Cheap per-test resource accounting for judge worker processes (Linux first, POSIX fallback)."""
+import os
+import resource
+from contextlib import contextmanager
+from typing import Optional
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def reset_peak_rss() -> bool:
+    """Reset this process's peak RSS (VmHWM) so the next reading covers one test only.
+
+    Returns False where the kernel doesn't support it; peak_rss_kb() then
+    reports the peak over the worker's lifetime.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+@contextmanager
+def memory_limit(limit_mb: Optional[int]):
+    """Let the block allocate at most `limit_mb` more MB; going over raises MemoryError.
+
+    Uses RLIMIT_AS on top of the worker's current address space, and restores
+    the previous soft limit afterwards. A no-op without a limit or where the
+    current address space can't be read.
+    """
+    baseline = _address_space_bytes() if limit_mb else None
+    if baseline is None:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = baseline + limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
@@ -0,0 +1,119 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def code_hash(user_code: str) -> str:
+    """Hash of the code's AST, so comments and formatting don't change it. Raises SyntaxError."""
+    return hashlib.sha256(ast.dump(ast.parse(user_code)).encode()).hexdigest()
+
+
+def test_set_version(test_cases: List[Dict]) -> str:
+    """Content hash of a question's test cases."""
+    encoded = json.dumps(test_cases, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SubmissionResultCache:
+    """LRU cache of judged results keyed by question id, test-set version, judging options and code hash.
+
+    Bounded by entry count and by the size of the stored results. Results are
+    kept JSON-encoded, so every hit hands out a fresh copy. Each entry
+    remembers how long judging took, which is added to `saved_seconds` on
+    every hit.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        # question id -> test-set version, so test cases are hashed once per question
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def key(self, user_code: str, question_id: str, test_cases: List[Dict],
+            fail_fast: bool = False, memory_limit_mb: Optional[int] = None) -> tuple:
+        """Build the cache key for a submission. Raises SyntaxError for code that doesn't parse."""
+        version = self._versions.get(question_id)
+        if version is None:
+            version = test_set_version(test_cases)
+            self._versions[question_id] = version
+        return question_id, version, bool(fail_fast), memory_limit_mb, code_hash(user_code)
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[1]
+            encoded = entry[0]
+        return json.loads(encoded)
+
+    def put(self, key: tuple, results: Dict[str, Any], elapsed: float = 0.0):
+        encoded = json.dumps(results)
+        size = len(encoded)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (encoded, elapsed)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, question_id: str):
+        """Drop every result for a question, e.g. after its test cases were edited."""
+        with self._lock:
+            self._versions.pop(question_id, None)
+            for key in [key for key in self._entries if key[0] == question_id]:
+                self._discard(key)
+
+    def _discard(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= len(entry[0])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_seconds': self.saved_seconds
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def is_cacheable(results: Dict[str, Any]) -> bool:
+    """Timeouts, crashed workers, running out of server memory and complexity grades (timed runs)
+    depend on load, so those results aren't reused."""
+    if results.get('complexity'):
+        return False
+    return not any(error in ("Execution timed out", "Runtime error: out of memory")
+                   or error.startswith("Runtime error: Worker")
+                   for error in results['errors'])
+
+
+_default_cache = SubmissionResultCache(
+    int(os.getenv('JUDGE_RESULT_CACHE_ENTRIES', '4096')),
+    int(os.getenv('JUDGE_RESULT_CACHE_MB', '32')) * 1024 * 1024
+)
+
+
+def get_default_result_cache() -> SubmissionResultCache:
+    return _default_cache
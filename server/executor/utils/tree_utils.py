@@ -1,27 +1,146 @@
-from typing import List, Optional
+from collections import deque
+from typing import Any, List, Optional
 
 class TreeNode:
+    __slots__ = ('val', 'left', 'right')
+
     def __init__(self, val=0, left=None, right=None):
         self.val = val
         self.left = left
         self.right = right
 
 def build_tree(values: List[Optional[int]]) -> Optional[TreeNode]:
-    """Convert a list of values into a binary tree."""
+    """Convert a list of values into a binary tree in O(n)."""
     if not values:
         return None
-    
+
     root = TreeNode(values[0])
-    queue = [root]
+    queue = deque([root])
     i = 1
-    while queue and i < len(values):
-        node = queue.pop(0)
-        if i < len(values) and values[i] is not None:
+    count = len(values)
+    while queue and i < count:
+        node = queue.popleft()
+        if values[i] is not None:
             node.left = TreeNode(values[i])
             queue.append(node.left)
         i += 1
-        if i < len(values) and values[i] is not None:
+        if i < count and values[i] is not None:
             node.right = TreeNode(values[i])
             queue.append(node.right)
         i += 1
     return root
+
+def tree_to_list(root: Optional[TreeNode]) -> List[Optional[Any]]:
+    """Serialize a tree to the level-order list build_tree accepts, without trailing nulls."""
+    if root is None:
+        return []
+
+    values = []
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        if node is None:
+            values.append(None)
+            continue
+        values.append(node.val)
+        queue.append(node.left)
+        queue.append(node.right)
+
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+class ArrayTree:
+    """Binary tree stored as parallel lists in level order; child index -1 means no child.
+
+    Node 0 is the root. Trees with the same shape and values always produce
+    identical lists, so comparing two trees is a list comparison with no
+    recursion and no per-node objects.
+    """
+
+    __slots__ = ('vals', 'left', 'right')
+
+    def __init__(self):
+        self.vals: List[Any] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+
+    @classmethod
+    def from_list(cls, values: List[Optional[Any]]) -> 'ArrayTree':
+        tree = cls()
+        if not values:
+            return tree
+
+        tree._add(values[0])
+        parent = 0
+        i = 1
+        count = len(values)
+        while parent < len(tree.vals) and i < count:
+            if values[i] is not None:
+                tree.left[parent] = tree._add(values[i])
+            i += 1
+            if i < count and values[i] is not None:
+                tree.right[parent] = tree._add(values[i])
+            i += 1
+            parent += 1
+        return tree
+
+    @classmethod
+    def from_tree(cls, root: Optional[TreeNode]) -> 'ArrayTree':
+        tree = cls()
+        if root is None:
+            return tree
+
+        tree._add(root.val)
+        nodes = [root]
+        # Nodes are numbered in the order they are visited, so nodes[i] is node i
+        for index, node in enumerate(nodes):
+            if node.left is not None:
+                tree.left[index] = tree._add(node.left.val)
+                nodes.append(node.left)
+            if node.right is not None:
+                tree.right[index] = tree._add(node.right.val)
+                nodes.append(node.right)
+        return tree
+
+    def _add(self, val) -> int:
+        self.vals.append(val)
+        self.left.append(-1)
+        self.right.append(-1)
+        return len(self.vals) - 1
+
+    def to_tree(self) -> Optional[TreeNode]:
+        if not self.vals:
+            return None
+        nodes = [TreeNode(val) for val in self.vals]
+        for index, node in enumerate(nodes):
+            if self.left[index] != -1:
+                node.left = nodes[self.left[index]]
+            if self.right[index] != -1:
+                node.right = nodes[self.right[index]]
+        return nodes[0]
+
+    def to_list(self) -> List[Optional[Any]]:
+        if not self.vals:
+            return []
+        values = [self.vals[0]]
+        queue = deque([0])
+        while queue:
+            index = queue.popleft()
+            for child in (self.left[index], self.right[index]):
+                if child == -1:
+                    values.append(None)
+                else:
+                    values.append(self.vals[child])
+                    queue.append(child)
+        while values and values[-1] is None:
+            values.pop()
+        return values
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ArrayTree):
+            return NotImplemented
+        return self.vals == other.vals and self.left == other.left and self.right == other.right
+
+    def __len__(self):
+        return len(self.vals)
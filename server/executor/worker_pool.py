@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Modules imported once in the fork server so every worker starts warm
+DEFAULT_PRELOAD = ['executor.utils.tree_utils', 'executor.code_executor']
+
+
+class TimeoutException(Exception):
+    pass
+
+
+class WorkerCrashedException(Exception):
+    pass
+
+
+def _worker_main(conn):
+    """Serve tasks sent by the pool until the pipe is closed."""
+    while True:
+        try:
+            func, args, kwargs = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+
+        try:
+            reply = (True, func(*args, **kwargs))
+        except Exception as e:
+            reply = (False, e)
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or the exception could not be pickled
+            conn.send((False, RuntimeError(str(e))))
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join()
+        finally:
+            self.conn.close()
+
+
+class WorkerPool:
+    """Pool of warm, pre-forked worker processes that run judge tasks with hard timeouts."""
+
+    def __init__(self, size: Optional[int] = None, preload: Optional[List[str]] = None):
+        self.size = max(1, size or os.cpu_count() or 1)
+        self._context = multiprocessing.get_context('forkserver')
+        self._context.set_forkserver_preload(DEFAULT_PRELOAD if preload is None else preload)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.respawns = 0
+
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _respawn(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            self.respawns += 1
+        return self._spawn()
+
+    def _acquire(self) -> _Worker:
+        if self._closed:
+            raise RuntimeError("Worker pool is shut down")
+        worker = self._idle.get()
+        if not worker.process.is_alive():
+            # Died while idle (e.g. killed by the OOM killer)
+            worker = self._respawn(worker)
+        return worker
+
+    def run(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> Any:
+        """Run func(*args, **kwargs) in a worker, killing and replacing it on timeout."""
+        worker = self._acquire()
+        try:
+            worker.conn.send((func, args, kwargs or {}))
+            if not worker.conn.poll(timeout):
+                worker = self._respawn(worker)
+                raise TimeoutException("Code execution timed out")
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            worker = self._respawn(worker)
+            raise WorkerCrashedException("Worker process exited unexpectedly")
+        finally:
+            self._release(worker)
+
+        if not ok:
+            raise value
+        return value
+
+    def _release(self, worker: _Worker):
+        if self._closed:
+            worker.kill()
+        else:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop all idle workers; busy workers are stopped when they are released."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> WorkerPool:
+    """Return the process-wide pool, creating it on first use (size from JUDGE_POOL_SIZE)."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            size = os.getenv('JUDGE_POOL_SIZE')
+            _default_pool = WorkerPool(int(size) if size else None)
+        return _default_pool
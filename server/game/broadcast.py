@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from monitoring.log import get_default_log
+
+log = get_default_log()
+
+
+class CoalescingBroadcaster:
+    """Sends each room at most one update per interval, always with the room's latest state.
+
+    Handlers only mark a room dirty (O(1), no I/O). One background thread
+    builds the payload of every dirty room with `snapshot` and emits it
+    once; players and spectators share the room, so an audience adds no
+    work per update. The first update after a quiet period goes out
+    immediately.
+    """
+
+    def __init__(self, emit: Callable[[str, dict], None], snapshot: Callable[[str], Optional[dict]],
+                 interval: float = 0.2):
+        self.emit = emit
+        self.snapshot = snapshot
+        self.interval = interval
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.marked = 0
+        self.emitted = 0
+
+    def mark(self, room: str):
+        with self._lock:
+            self._dirty.add(room)
+            self.marked += 1
+        self._wakeup.set()
+
+    def forget(self, room: str):
+        """Drop a pending update, e.g. for a match that just ended."""
+        with self._lock:
+            self._dirty.discard(room)
+
+    def flush(self):
+        with self._lock:
+            rooms, self._dirty = self._dirty, set()
+        for room in rooms:
+            try:
+                payload = self.snapshot(room)
+                if payload is not None:
+                    self.emit(room, payload)
+                    self.emitted += 1
+            except Exception as e:
+                log.error('broadcast_failed', room=room, error=str(e))
+
+    def stats(self) -> Dict[str, int]:
+        return {'pending_rooms': len(self._dirty), 'updates': self.marked, 'emits': self.emitted}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="progress-broadcast", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+            # Updates arriving now wait for the next window and are coalesced
+            self._stopped.wait(self.interval)
+
+
+class SpectatorRegistry:
+    """Which connections watch which match, so spectators can be kept read-only and cleaned up."""
+
+    def __init__(self):
+        self._match_by_sid: Dict[str, str] = {}
+        self._sids_by_match: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, sid: str, match_id: str):
+        with self._lock:
+            self._remove(sid)
+            self._match_by_sid[sid] = match_id
+            self._sids_by_match.setdefault(match_id, set()).add(sid)
+
+    def remove(self, sid: str) -> Optional[str]:
+        """Stop tracking a spectator; returns the match it was watching."""
+        with self._lock:
+            return self._remove(sid)
+
+    def _remove(self, sid: str) -> Optional[str]:
+        match_id = self._match_by_sid.pop(sid, None)
+        if match_id is not None:
+            sids = self._sids_by_match[match_id]
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_match[match_id]
+        return match_id
+
+    def drop_match(self, match_id: str) -> Set[str]:
+        with self._lock:
+            sids = self._sids_by_match.pop(match_id, set())
+            for sid in sids:
+                self._match_by_sid.pop(sid, None)
+            return sids
+
+    def is_spectator(self, sid: str) -> bool:
+        return sid in self._match_by_sid
+
+    def count(self, match_id: str) -> int:
+        return len(self._sids_by_match.get(match_id, ()))
@@ -0,0 +1,134 @@
+"""Shared game state for running several server processes behind one port.
+
+A manager process owns the single GameState, match TimerHeap, rating
+Leaderboard and a small message bus; server workers reach them through multiprocessing proxies.
+The bus doubles as the Socket.IO message queue (ManagerPubSubManager), so
+room joins and emits reach clients connected to any worker without an
+external broker. Set SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379)
+to use a real broker instead.
+"""
+import os
+import queue
+import threading
+import uuid
+from multiprocessing.managers import BaseManager
+from typing import Dict, Optional, Tuple
+
+import socketio
+
+from game.ratings import Leaderboard, create_leaderboard
+from game.state import GameState, create_game_state
+from game.timers import TimerHeap
+
+_game_state: Optional[GameState] = None
+_match_timers: Optional[TimerHeap] = None
+_leaderboard: Optional[Leaderboard] = None
+_message_bus = None
+
+
+class MessageBus:
+    """Fan-out queue: every published message is delivered to every subscriber."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber_id: str):
+        with self._lock:
+            self._subscribers.setdefault(subscriber_id, queue.Queue())
+
+    def unsubscribe(self, subscriber_id: str):
+        with self._lock:
+            self._subscribers.pop(subscriber_id, None)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def get(self, subscriber_id: str, timeout: float = 1.0):
+        """Next message for a subscriber, or None if nothing arrived within timeout."""
+        try:
+            return self._subscribers[subscriber_id].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def _get_game_state() -> GameState:
+    global _game_state
+    if _game_state is None:
+        _game_state = create_game_state()
+    return _game_state
+
+
+def _get_match_timers() -> TimerHeap:
+    global _match_timers
+    if _match_timers is None:
+        _match_timers = TimerHeap()
+    return _match_timers
+
+
+def _get_leaderboard() -> Leaderboard:
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = create_leaderboard()
+    return _leaderboard
+
+
+def _get_message_bus() -> MessageBus:
+    global _message_bus
+    if _message_bus is None:
+        _message_bus = MessageBus()
+    return _message_bus
+
+
+class ClusterManager(BaseManager):
+    pass
+
+
+ClusterManager.register('get_game_state', callable=_get_game_state)
+ClusterManager.register('get_match_timers', callable=_get_match_timers)
+ClusterManager.register('get_leaderboard', callable=_get_leaderboard)
+ClusterManager.register('get_message_bus', callable=_get_message_bus)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+def serve_state(address: Tuple[str, int], authkey: bytes):
+    """Run the state manager in the current process until it is killed."""
+    server = ClusterManager(address=address, authkey=authkey).get_server()
+    server.serve_forever()
+
+
+def connect_state(address: Tuple[str, int], authkey: bytes) -> ClusterManager:
+    manager = ClusterManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager
+
+
+class ManagerPubSubManager(socketio.PubSubManager):
+    """Socket.IO client manager that fans messages out over the state manager's bus."""
+
+    name = 'multiprocessing-manager'
+
+    def __init__(self, cluster: ClusterManager, channel: str = 'socketio', write_only: bool = False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.bus = cluster.get_message_bus()
+        self.subscriber_id = f"{os.getpid()}-{uuid.uuid4().hex}"
+        if not write_only:
+            # Subscribe now so nothing published before the listener starts is lost
+            self.bus.subscribe(self.subscriber_id)
+
+    def _publish(self, data):
+        self.bus.publish(data)
+
+    def _listen(self):
+        while True:
+            message = self.bus.get(self.subscriber_id, 1.0)
+            if message is not None:
+                yield message
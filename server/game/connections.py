@@ -0,0 +1,28 @@
+import threading
+from typing import Dict, Optional
+
+
+class ConnectionRegistry:
+    """sid -> clerkId for the connections of this server process.
+
+    Together with GameState's clerkId -> match index, a disconnect finds the
+    player's match in O(1).
+    """
+
+    def __init__(self):
+        self._clerk_by_sid: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, sid: str, clerkId: str):
+        with self._lock:
+            self._clerk_by_sid[sid] = clerkId
+
+    def unbind(self, sid: str) -> Optional[str]:
+        with self._lock:
+            return self._clerk_by_sid.pop(sid, None)
+
+    def clerk_for(self, sid: str) -> Optional[str]:
+        return self._clerk_by_sid.get(sid)
+
+    def __len__(self):
+        return len(self._clerk_by_sid)
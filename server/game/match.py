@@ -0,0 +1,73 @@
+import hmac
+import secrets
+from datetime import datetime
+
+from bson import ObjectId
+
+
+class Match:
+    def __init__(self, player1_id, player2_id, question: dict, algorithm_type: str, duration=1800):
+        self.match_id = str(ObjectId())
+        self.player1 = {
+            'id': player1_id,
+            'tests_passed': 0,
+            'total_tests': len(question['testCases']),
+            'completed': False
+        }
+        self.player2 = {
+            'id': player2_id,
+            'tests_passed': 0,
+            'total_tests': len(question['testCases']),
+            'completed': False
+        }
+        # Issued to each player in match_found; proves who is rejoining after a reconnect
+        self.rejoin_tokens = {player1_id: secrets.token_urlsafe(16), player2_id: secrets.token_urlsafe(16)}
+        self.question_id = question['_id']
+        self.algorithm_type = algorithm_type
+        self.start_time = datetime.utcnow()
+        self.duration = duration
+        self.is_active = True
+
+    def update_player_progress(self, clerkId, tests_passed):
+        if self.player1['id'] == clerkId:
+            self.player1['tests_passed'] = tests_passed
+        elif self.player2['id'] == clerkId:
+            self.player2['tests_passed'] = tests_passed
+
+    def get_player_progress(self, clerkId):
+        if self.player1['id'] == clerkId:
+            return self.player1['tests_passed']
+        if self.player2['id'] == clerkId:
+            return self.player2['tests_passed']
+        return 0
+
+    def check_rejoin_token(self, clerkId, token) -> bool:
+        expected = self.rejoin_tokens.get(clerkId)
+        return expected is not None and isinstance(token, str) and hmac.compare_digest(expected, token)
+
+    @staticmethod
+    def _score(player):
+        # A question without tests has nothing to win on
+        return player['tests_passed'] / player['total_tests'] if player['total_tests'] else 0.0
+
+    def get_winner(self):
+        p1_score = self._score(self.player1)
+        p2_score = self._score(self.player2)
+
+        if p1_score > p2_score:
+            return self.player1['id']
+        elif p2_score > p1_score:
+            return self.player2['id']
+        return None
+
+    def to_dict(self):
+        return {
+            'match_id': self.match_id,
+            'player1': self.player1,
+            'player2': self.player2,
+            'question_id': self.question_id,
+            'algorithm_type': self.algorithm_type,
+            'start_time': self.start_time,
+            'duration': self.duration,
+            'is_active': self.is_active
+        }
@@ -0,0 +1,227 @@
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_RATING = 1200
+SPECIFIC_TYPES = ['graph', 'tree', 'array']
+QUEUE_TYPES = SPECIFIC_TYPES + ['random']
+
+
+class MatchQueue:
+    """Waiting players in arrival order with O(1) append and removal.
+
+    Removed entries are tombstoned in place and skipped when iterating; the
+    deque is compacted once tombstones outnumber live entries.
+    """
+
+    def __init__(self):
+        self._entries = deque()
+        self._live = 0
+
+    def append(self, entry: dict):
+        entry['removed'] = False
+        self._entries.append(entry)
+        self._live += 1
+
+    def remove(self, entry: dict):
+        if not entry['removed']:
+            entry['removed'] = True
+            self._live -= 1
+            if len(self._entries) > 2 * self._live + 64:
+                self._entries = deque(e for e in self._entries if not e['removed'])
+
+    def __iter__(self) -> Iterator[dict]:
+        return (entry for entry in list(self._entries) if not entry['removed'])
+
+    def __len__(self):
+        return self._live
+
+
+class RatingIndex:
+    """Waiting players sorted by rating: O(log n) nearest-opponent lookups.
+
+    Adds and removes bisect in O(log n) but shift the lists, so they are O(n)
+    memmoves; at queue sizes that is still cheaper than a balanced tree.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = []
+
+    def add(self, entry: dict):
+        key = (entry['rating'], entry['seq'])
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._entries.insert(position, entry)
+
+    def remove(self, entry: dict):
+        position = bisect.bisect_left(self._keys, (entry['rating'], entry['seq']))
+        if position < len(self._entries) and self._entries[position] is entry:
+            del self._keys[position]
+            del self._entries[position]
+
+    def nearest(self, rating: float, exclude: dict) -> Optional[dict]:
+        """Closest-rated entry other than `exclude` (at most one neighbour on each side is skipped)."""
+        position = bisect.bisect_left(self._keys, (rating, -1))
+        best = None
+        for candidate in self._entries[max(0, position - 2):position + 2]:
+            if candidate is exclude:
+                continue
+            if best is None or abs(candidate['rating'] - rating) < abs(best['rating'] - rating):
+                best = candidate
+        return best
+
+    def neighbours(self, rating: float, count: int = 2) -> List[dict]:
+        """Up to `count` entries on each side of `rating`."""
+        position = bisect.bisect_left(self._keys, (rating, -1))
+        return self._entries[max(0, position - count):position + count]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MatchmakingEngine:
+    """Rating-window matchmaking over the algorithm-type queues.
+
+    A player accepts opponents within `base_window` rating points, widening by
+    `widen_per_second` for every second spent waiting, up to `max_window`.
+    Specific-type players can be paired with 'random' players (the match uses
+    the specific type); two 'random' players get a random question.
+
+    tick() does not rescan the queues. Each waiting player is due for a
+    re-check at the moment their window reaches their nearest opponent, and
+    a new arrival makes the players next to it due at once; a tick only
+    looks at the players that are due, kept in a heap.
+    """
+
+    def __init__(self, base_window: float = 100, widen_per_second: float = 10, max_window: float = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.base_window = base_window
+        self.widen_per_second = widen_per_second
+        self.max_window = max_window
+        self.clock = clock
+        self.queues = {queue_type: MatchQueue() for queue_type in QUEUE_TYPES}
+        self.indexes = {queue_type: RatingIndex() for queue_type in QUEUE_TYPES}
+        # sid -> (algorithm type, queue entry)
+        self.players: Dict[str, Tuple[str, dict]] = {}
+        self.lock = threading.RLock()
+        self._seq = itertools.count()
+        # (due time, seq, entry); an entry whose 'due' has since changed is stale
+        self._due: List[Tuple[float, int, dict]] = []
+
+    def add(self, player_data: dict, algorithm_type: str) -> bool:
+        if algorithm_type not in self.queues:
+            return False
+        with self.lock:
+            # Re-joining moves the player rather than queueing them twice
+            self.remove(player_data['sid'])
+            entry = dict(player_data)
+            entry.setdefault('rating', DEFAULT_RATING)
+            entry['seq'] = next(self._seq)
+            entry['joined_at'] = self.clock()
+            self.queues[algorithm_type].append(entry)
+            self.indexes[algorithm_type].add(entry)
+            self.players[entry['sid']] = (algorithm_type, entry)
+            # The newcomer may be inside the window of the players rated next to it
+            self._schedule(entry, entry['joined_at'])
+            for candidate_type in self._candidate_types(algorithm_type):
+                for neighbour in self.indexes[candidate_type].neighbours(entry['rating']):
+                    if neighbour is not entry:
+                        self._schedule(neighbour, entry['joined_at'])
+        return True
+
+    def remove(self, sid: str):
+        with self.lock:
+            queued = self.players.pop(sid, None)
+            if queued is not None:
+                algorithm_type, entry = queued
+                self.queues[algorithm_type].remove(entry)
+                self.indexes[algorithm_type].remove(entry)
+
+    def window(self, entry: dict, now: float) -> float:
+        waited = now - entry['joined_at']
+        return min(self.max_window, self.base_window + self.widen_per_second * waited)
+
+    def _schedule(self, entry: dict, due: float):
+        if entry.get('due') is not None and entry['due'] <= due:
+            return
+        entry['due'] = due
+        heapq.heappush(self._due, (due, entry['seq'], entry))
+        if len(self._due) > 2 * len(self.players) + 64:
+            self._due = [item for item in self._due
+                         if item[2]['due'] == item[0] and self.players.get(item[2]['sid'], (None, None))[1] is item[2]]
+            heapq.heapify(self._due)
+
+    def _reschedule(self, entry: dict, algorithm_type: str):
+        """Make an unpaired entry due when its window will reach its nearest opponent."""
+        entry['due'] = None
+        distances = [abs(candidate['rating'] - entry['rating'])
+                     for candidate_type in self._candidate_types(algorithm_type)
+                     for candidate in [self.indexes[candidate_type].nearest(entry['rating'], exclude=entry)]
+                     if candidate is not None]
+        if not distances or self.widen_per_second <= 0 or min(distances) > self.max_window:
+            # Only a new arrival can bring an opponent into range
+            return
+        self._schedule(entry, entry['joined_at'] + (min(distances) - self.base_window) / self.widen_per_second)
+
+    def depths(self) -> Dict[str, int]:
+        with self.lock:
+            return {queue_type: len(queue) for queue_type, queue in self.queues.items()}
+
+    def _candidate_types(self, algorithm_type: str) -> List[str]:
+        if algorithm_type == 'random':
+            return QUEUE_TYPES
+        return [algorithm_type, 'random']
+
+    def _pair(self, sid: str, now: float) -> tuple:
+        algorithm_type, entry = self.players[sid]
+        window = self.window(entry, now)
+
+        best, best_type = None, None
+        for candidate_type in self._candidate_types(algorithm_type):
+            candidate = self.indexes[candidate_type].nearest(entry['rating'], exclude=entry)
+            if candidate is None or abs(candidate['rating'] - entry['rating']) > window:
+                continue
+            if best is None or abs(candidate['rating'] - entry['rating']) < abs(best['rating'] - entry['rating']):
+                best, best_type = candidate, candidate_type
+
+        if best is None:
+            return None, None, None
+
+        self.remove(sid)
+        self.remove(best['sid'])
+        matched_type = algorithm_type if algorithm_type != 'random' else best_type
+        # The longer-waiting player is player 1
+        player1, player2 = (best, entry) if best['seq'] < entry['seq'] else (entry, best)
+        return player1, player2, matched_type
+
+    def find_match(self, sid: str) -> tuple:
+        """Try to pair a queued player right away; returns (player1, player2, type) or Nones."""
+        with self.lock:
+            if sid not in self.players:
+                return None, None, None
+            return self._pair(sid, self.clock())
+
+    def tick(self) -> List[tuple]:
+        """Pair every due player that has an opponent inside their window, longest-waiting first."""
+        matches = []
+        with self.lock:
+            now = self.clock()
+            due = []
+            while self._due and self._due[0][0] <= now:
+                due_time, _, entry = heapq.heappop(self._due)
+                if entry['due'] == due_time and self.players.get(entry['sid'], (None, None))[1] is entry:
+                    due.append(entry)
+            for entry in sorted(due, key=lambda entry: entry['seq']):
+                if entry['sid'] not in self.players:
+                    continue
+                player1, player2, matched_type = self._pair(entry['sid'], now)
+                if player1:
+                    matches.append((player1, player2, matched_type))
+                else:
+                    self._reschedule(entry, self.players[entry['sid']][0])
+        return matches
@@ -0,0 +1,122 @@
+import bisect
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game.matchmaking import DEFAULT_RATING
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400))
+
+
+def elo_update(rating1: float, rating2: float, score1: float, k: float) -> Tuple[float, float]:
+    """New ratings after one game; score1 is 1 (player 1 won), 0.5 (draw) or 0."""
+    change = k * (score1 - expected_score(rating1, rating2))
+    return rating1 + change, rating2 - change
+
+
+class Leaderboard:
+    """Every rated player, sorted by rating: O(log n) rank lookups and O(k) top-k reads.
+
+    Keys are (-rating, clerkId) in one bisect-sorted list, so a player's rank
+    is their key's index. Updates are a delete and an insert (memmove-fast at
+    leaderboard sizes). A match's rating change is applied under one lock, so
+    concurrent matches of the same player can't lose an update.
+    """
+
+    def __init__(self, k_factor: float = 32):
+        self.k_factor = k_factor
+        self._keys: List[Tuple[float, str]] = []
+        self._ratings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _set(self, clerkId: str, rating: float):
+        old = self._ratings.get(clerkId)
+        if old is not None:
+            position = bisect.bisect_left(self._keys, (-old, clerkId))
+            del self._keys[position]
+        self._ratings[clerkId] = rating
+        bisect.insort(self._keys, (-rating, clerkId))
+
+    def seed(self, ratings: Iterable[Tuple[str, float]]) -> int:
+        """Add stored ratings of players not already known here; returns how many were added."""
+        with self._lock:
+            added = 0
+            for clerkId, rating in ratings:
+                if clerkId not in self._ratings:
+                    self._ratings[clerkId] = rating
+                    added += 1
+            # One sort instead of an insort per player
+            self._keys = sorted((-rating, clerkId) for clerkId, rating in self._ratings.items())
+            return added
+
+    def set_rating(self, clerkId: str, rating: float):
+        with self._lock:
+            self._set(clerkId, rating)
+
+    def rating(self, clerkId: str) -> float:
+        return self._ratings.get(clerkId, DEFAULT_RATING)
+
+    def record_match(self, clerkId1: str, clerkId2: str, score1: float) -> Dict[str, Tuple[float, float]]:
+        """Apply an Elo update for one finished match; returns {clerkId: (old rating, new rating)}."""
+        with self._lock:
+            old1, old2 = self.rating(clerkId1), self.rating(clerkId2)
+            new1, new2 = elo_update(old1, old2, score1, self.k_factor)
+            self._set(clerkId1, new1)
+            self._set(clerkId2, new2)
+            return {clerkId1: (old1, new1), clerkId2: (old2, new2)}
+
+    def rank(self, clerkId: str) -> Optional[int]:
+        """1-based rank; players with equal ratings share one."""
+        rating = self._ratings.get(clerkId)
+        if rating is None:
+            return None
+        with self._lock:
+            return bisect.bisect_left(self._keys, (-rating, '')) + 1
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, str, float]]:
+        """(rank, clerkId, rating) for `limit` players starting at position `offset`."""
+        with self._lock:
+            keys = self._keys[offset:offset + limit]
+            return [(bisect.bisect_left(self._keys, (negated, '')) + 1, clerkId, -negated)
+                    for negated, clerkId in keys]
+
+    def size(self) -> int:
+        return len(self._ratings)
+
+
+def create_leaderboard() -> Leaderboard:
+    return Leaderboard(float(os.getenv('ELO_K_FACTOR', '32')))
+
+
+OUTCOME_COUNTERS = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}
+
+
+def match_stats_update(algorithm_type: str, outcome: str, tests_passed: int, total_tests: int) -> Dict[str, int]:
+    """$inc fields that fold one match into a user's materialized stats; outcome is win, loss or draw."""
+    increments = {}
+    for prefix in ('stats', f'stats.by_type.{algorithm_type}'):
+        increments[f'{prefix}.matches'] = 1
+        increments[f'{prefix}.{OUTCOME_COUNTERS[outcome]}'] = 1
+        increments[f'{prefix}.tests_passed'] = tests_passed
+        increments[f'{prefix}.tests_total'] = total_tests
+    return increments
+
+
+def summarize_stats(stats: dict) -> dict:
+    """Win rate and average tests passed from the counters, computed in O(1) on read."""
+    matches = stats.get('matches', 0)
+    summary = {
+        'matches': matches,
+        'wins': stats.get('wins', 0),
+        'losses': stats.get('losses', 0),
+        'draws': stats.get('draws', 0),
+        'win_rate': stats.get('wins', 0) / matches if matches else None,
+        'average_tests_passed': stats.get('tests_passed', 0) / matches if matches else None,
+        'pass_rate': stats.get('tests_passed', 0) / stats['tests_total'] if stats.get('tests_total') else None
+    }
+    if 'by_type' in stats:
+        summary['by_type'] = {algorithm_type: summarize_stats(type_stats)
+                              for algorithm_type, type_stats in stats['by_type'].items()}
+    return summary
@@ -0,0 +1,147 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from game.match import Match
+from game.matchmaking import MatchmakingEngine
+
+
+class GameState:
+    """Waiting queues and active matches.
+
+    Everything is reached through methods so that one instance can be shared
+    by several server processes via game.cluster, whose proxies only forward
+    method calls and return copies: matches are changed through the methods
+    here, never by mutating what get_match returns.
+    """
+
+    def __init__(self, matchmaker: Optional[MatchmakingEngine] = None):
+        # Separate rating-indexed queues for each algorithm type
+        self.matchmaker = matchmaker or MatchmakingEngine()
+        self.waiting_queues = self.matchmaker.queues
+        self.active_matches: Dict[str, Match] = {}
+        # clerkId -> id of the active match they play in
+        self.match_by_player: Dict[str, str] = {}
+        # clerkId -> sid of their current connection
+        self.player_sids: Dict[str, str] = {}
+        # clerkId -> token of a disconnect still inside its reconnect grace period
+        self.pending_disconnects: Dict[str, int] = {}
+        self._disconnect_seq = 0
+        self.lock = threading.RLock()
+
+    @property
+    def queued_players(self) -> Dict[str, tuple]:
+        return self.matchmaker.players
+
+    def add_to_queue(self, player_data: dict, algorithm_type: str):
+        return self.matchmaker.add(player_data, algorithm_type)
+
+    def remove_from_queue(self, sid: str):
+        self.matchmaker.remove(sid)
+
+    def queue_depths(self) -> Dict[str, int]:
+        return self.matchmaker.depths()
+
+    def find_match(self, sid: str) -> tuple:
+        return self.matchmaker.find_match(sid)
+
+    def tick_matchmaking(self) -> List[tuple]:
+        return self.matchmaker.tick()
+
+    def add_match(self, match: Match):
+        with self.lock:
+            self.active_matches[match.match_id] = match
+            self.match_by_player[match.player1['id']] = match.match_id
+            self.match_by_player[match.player2['id']] = match.match_id
+
+    def get_match(self, match_id: str) -> Optional[Match]:
+        return self.active_matches.get(match_id)
+
+    def list_matches(self) -> List[Match]:
+        with self.lock:
+            return list(self.active_matches.values())
+
+    def active_match_count(self) -> int:
+        return len(self.active_matches)
+
+    def update_player_progress(self, match_id: str, clerkId: str, tests_passed: int) -> bool:
+        with self.lock:
+            match = self.active_matches.get(match_id)
+            if match is None:
+                return False
+            match.update_player_progress(clerkId, tests_passed)
+            return True
+
+    def get_player_progress(self, match_id: str, clerkId: str) -> int:
+        with self.lock:
+            match = self.active_matches.get(match_id)
+            return match.get_player_progress(clerkId) if match else 0
+
+    def extend_match(self, match_id: str, seconds: float) -> bool:
+        with self.lock:
+            match = self.active_matches.get(match_id)
+            if match is None:
+                return False
+            match.duration += seconds
+            return True
+
+    def finish_match(self, match_id: str) -> Optional[Match]:
+        """Deactivate and remove a match; only the first caller gets it back."""
+        with self.lock:
+            match = self.active_matches.pop(match_id, None)
+            if match is None or not match.is_active:
+                return None
+            match.is_active = False
+            for player in (match.player1, match.player2):
+                if self.match_by_player.get(player['id']) == match_id:
+                    del self.match_by_player[player['id']]
+                self.pending_disconnects.pop(player['id'], None)
+            return match
+
+    def match_for_player(self, clerkId: str) -> Optional[str]:
+        return self.match_by_player.get(clerkId)
+
+    def player_sid(self, clerkId: str) -> Optional[str]:
+        return self.player_sids.get(clerkId)
+
+    def connect_player(self, clerkId: str, sid: str) -> Optional[str]:
+        """Make `sid` the player's connection, cancelling any pending disconnect; returns their match id."""
+        with self.lock:
+            self.player_sids[clerkId] = sid
+            self.pending_disconnects.pop(clerkId, None)
+            return self.match_by_player.get(clerkId)
+
+    def disconnect_player(self, clerkId: str, sid: str) -> Optional[Tuple[str, int]]:
+        """Record that a player's connection dropped.
+
+        Returns (match_id, token) when they were in a match, for expire_disconnect
+        once the grace period is over. A stale sid (the player already
+        reconnected elsewhere) changes nothing.
+        """
+        with self.lock:
+            if self.player_sids.get(clerkId) != sid:
+                return None
+            del self.player_sids[clerkId]
+            match_id = self.match_by_player.get(clerkId)
+            if match_id is None:
+                return None
+            self._disconnect_seq += 1
+            self.pending_disconnects[clerkId] = self._disconnect_seq
+            return match_id, self._disconnect_seq
+
+    def expire_disconnect(self, clerkId: str, token: int) -> Optional[str]:
+        """End a grace period: returns the match id if the player never came back."""
+        with self.lock:
+            if self.pending_disconnects.get(clerkId) != token:
+                return None
+            del self.pending_disconnects[clerkId]
+            return self.match_by_player.get(clerkId)
+
+
+def create_game_state() -> GameState:
+    """Build a GameState with matchmaking settings from the environment."""
+    return GameState(MatchmakingEngine(
+        base_window=float(os.getenv('MATCH_BASE_WINDOW', '100')),
+        widen_per_second=float(os.getenv('MATCH_WIDEN_PER_SECOND', '10')),
+        max_window=float(os.getenv('MATCH_MAX_WINDOW', '1000'))
+    ))
@@ -0,0 +1,143 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from monitoring.log import get_default_log
+
+log = get_default_log()
+
+
+class TimerHeap:
+    """Min-heap of match deadlines with O(log n) scheduling and lazy cancellation.
+
+    Cancelled or rescheduled timers leave stale heap entries behind; they are
+    skipped when they reach the top and the heap is rebuilt once they
+    outnumber live timers. Thread-safe, so one heap can be shared between
+    server processes (see game.cluster).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, match_id: str, deadline: float):
+        with self._lock:
+            self._deadlines[match_id] = deadline
+            heapq.heappush(self._heap, (deadline, match_id))
+
+    def cancel(self, match_id: str) -> bool:
+        with self._lock:
+            if self._deadlines.pop(match_id, None) is None:
+                return False
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(deadline, match_id) for match_id, deadline in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            return True
+
+    def extend(self, match_id: str, seconds: float) -> Optional[float]:
+        with self._lock:
+            deadline = self._deadlines.get(match_id)
+            if deadline is None:
+                return None
+            self._deadlines[match_id] = deadline + seconds
+            heapq.heappush(self._heap, (deadline + seconds, match_id))
+            return deadline + seconds
+
+    def deadline(self, match_id: str) -> Optional[float]:
+        return self._deadlines.get(match_id)
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[str]:
+        """Remove and return every timer due by `now`; each is returned to exactly one caller."""
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, match_id = heapq.heappop(self._heap)
+                del self._deadlines[match_id]
+                due.append(match_id)
+                self._drop_stale()
+        return due
+
+    def _drop_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def count(self) -> int:
+        return len(self._deadlines)
+
+
+class MatchTimerScheduler:
+    """One thread that fires match expiry callbacks from a TimerHeap.
+
+    When the heap is shared with other processes their changes can't wake this
+    thread, so `poll_interval` caps how long it sleeps between checks.
+    """
+
+    def __init__(self, on_expire: Callable[[str], None], timers: Optional[TimerHeap] = None,
+                 clock: Callable[[], float] = time.monotonic, poll_interval: Optional[float] = None):
+        self.on_expire = on_expire
+        self.clock = clock
+        self.timers = timers if timers is not None else TimerHeap()
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="match-timers", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def schedule(self, match_id: str, delay: float):
+        with self._condition:
+            self.timers.schedule(match_id, self.clock() + delay)
+            self._condition.notify()
+
+    def cancel(self, match_id: str) -> bool:
+        with self._condition:
+            return self.timers.cancel(match_id)
+
+    def extend(self, match_id: str, seconds: float) -> Optional[float]:
+        """Push a match's expiry back; returns the seconds left, or None if no timer is running."""
+        with self._condition:
+            deadline = self.timers.extend(match_id, seconds)
+            self._condition.notify()
+            return None if deadline is None else deadline - self.clock()
+
+    def remaining(self, match_id: str) -> Optional[float]:
+        with self._condition:
+            deadline = self.timers.deadline(match_id)
+            return None if deadline is None else max(0.0, deadline - self.clock())
+
+    def __len__(self):
+        return self.timers.count()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                next_deadline = self.timers.next_deadline()
+                timeout = None if next_deadline is None else max(0.0, next_deadline - self.clock())
+                if self.poll_interval is not None:
+                    timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                due = self.timers.pop_due(self.clock())
+
+            for match_id in due:
+                try:
+                    self.on_expire(match_id)
+                except Exception as e:
+                    log.error('timer_expiry_failed', key=match_id, error=str(e))
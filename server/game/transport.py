@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from typing import Optional
+
+
+class ThreadingTransport:
+    """Emits and room changes through a Flask-SocketIO server in threading mode."""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+
+    def emit(self, event: str, data: dict, to: Optional[str] = None, skip_sid: Optional[str] = None):
+        self.socketio.emit(event, data, to=to, skip_sid=skip_sid)
+
+    def enter_room(self, sid: str, room: str):
+        # Called from handlers and background threads alike, so use the server directly
+        self.socketio.server.enter_room(sid, room, namespace='/')
+
+    def leave_room(self, sid: str, room: str):
+        self.socketio.server.leave_room(sid, room, namespace='/')
+
+
+class AsyncTransport:
+    """Emits and room changes on a python-socketio AsyncServer, callable from any thread.
+
+    On the event loop the coroutine is scheduled as a task (in call order);
+    from judge, timer and broadcast threads it is handed to the loop.
+    """
+
+    def __init__(self, sio, loop: asyncio.AbstractEventLoop):
+        self.sio = sio
+        self.loop = loop
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def _schedule(self, coro):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            task = self.loop.create_task(coro)
+            # The loop only keeps weak references to tasks
+            with self._lock:
+                self._tasks.add(task)
+            task.add_done_callback(self._done)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def _done(self, task):
+        with self._lock:
+            self._tasks.discard(task)
+
+    def emit(self, event: str, data: dict, to: Optional[str] = None, skip_sid: Optional[str] = None):
+        self._schedule(self.sio.emit(event, data, to=to, skip_sid=skip_sid))
+
+    def enter_room(self, sid: str, room: str):
+        self._schedule(self.sio.enter_room(sid, room, namespace='/'))
+
+    def leave_room(self, sid: str, room: str):
+        self._schedule(self.sio.leave_room(sid, room, namespace='/'))
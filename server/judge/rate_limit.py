@@ -0,0 +1,118 @@
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """`capacity` tokens, refilled at `rate` per second; each submission takes one."""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available; 0 if one is now."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class SubmissionLimiter:
+    """Token buckets per player and per match in front of the judge queue.
+
+    A submission takes a token from both its player's and its match's bucket,
+    or from neither, so a rejected attempt costs nothing. The match bucket
+    also caps a client that cycles clerkIds. A rate of 0 disables that
+    bucket. Buckets live in this process: with several workers the limits
+    apply per worker.
+    """
+
+    def __init__(self, player_burst: float = 3, player_rate: float = 0.2, match_burst: float = 6,
+                 match_rate: float = 0.4, resubmit_window: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.player_burst = player_burst
+        self.player_rate = player_rate
+        self.match_burst = match_burst
+        self.match_rate = match_rate
+        self.resubmit_window = resubmit_window
+        self.clock = clock
+        self._players: Dict[str, TokenBucket] = {}
+        self._matches: Dict[str, TokenBucket] = {}
+        # (clerkId, match_id) -> when that player's last submission was let through
+        self._last_accepted: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.limited = {'player': 0, 'match': 0}
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, burst: float, rate: float,
+                now: float) -> Optional[TokenBucket]:
+        if rate <= 0:
+            return None
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(burst, rate, now)
+        return bucket
+
+    def acquire(self, clerkId: str, match_id: str) -> Tuple[float, Optional[str], bool]:
+        """Admit one submission: (seconds to wait, 'player' or 'match', False) when limited,
+        else (0, None, resubmit) where resubmit means the player's previous submission in
+        this match was under resubmit_window seconds ago."""
+        with self._lock:
+            now = self.clock()
+            limits = (('player', self._bucket(self._players, clerkId, self.player_burst, self.player_rate, now)),
+                      ('match', self._bucket(self._matches, match_id, self.match_burst, self.match_rate, now)))
+            for name, bucket in limits:
+                wait = bucket.wait_time(now) if bucket is not None else 0.0
+                if wait > 0:
+                    self.limited[name] += 1
+                    return wait, name, False
+            for _, bucket in limits:
+                if bucket is not None:
+                    bucket.tokens -= 1
+
+            previous = self._last_accepted.get((clerkId, match_id))
+            self._last_accepted[(clerkId, match_id)] = now
+            return 0.0, None, previous is not None and now - previous < self.resubmit_window
+
+    def forget_match(self, match_id: str):
+        """Drop an ended match's state, and every player bucket that has refilled anyway."""
+        with self._lock:
+            now = self.clock()
+            self._matches.pop(match_id, None)
+            for key in [key for key in self._last_accepted if key[1] == match_id]:
+                del self._last_accepted[key]
+            for clerkId in [clerkId for clerkId, bucket in self._players.items() if bucket.is_full(now)]:
+                del self._players[clerkId]
+
+    def stats(self) -> Dict[str, int]:
+        return {'limited_by_player': self.limited['player'], 'limited_by_match': self.limited['match'],
+                'tracked_players': len(self._players), 'tracked_matches': len(self._matches)}
+
+
+def retry_after_seconds(wait: float) -> float:
+    """Rounded up to a tenth of a second, so retrying after it never comes too early."""
+    return max(0.1, math.ceil(wait * 10) / 10)
+
+
+def create_submission_limiter() -> SubmissionLimiter:
+    return SubmissionLimiter(
+        player_burst=float(os.getenv('SUBMIT_PLAYER_BURST', '3')),
+        player_rate=float(os.getenv('SUBMIT_PLAYER_RATE', '0.2')),
+        match_burst=float(os.getenv('SUBMIT_MATCH_BURST', '6')),
+        match_rate=float(os.getenv('SUBMIT_MATCH_RATE', '0.4')),
+        resubmit_window=float(os.getenv('SUBMIT_RESUBMIT_WINDOW', '10'))
+    )
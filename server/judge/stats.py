@@ -0,0 +1,70 @@
+import threading
+from typing import Any, Dict, List
+
+
+class _QuestionCost:
+    def __init__(self):
+        self.submissions = 0
+        self.tests_run = 0
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.max_peak_rss_kb = 0
+        self.timeouts = 0
+        self.memory_limit_failures = 0
+        # test id -> [runs, total cpu ms, max cpu ms]
+        self.tests: Dict[str, List[float]] = {}
+
+
+class JudgeStats:
+    """Per-question judge cost: how long tests run, how much memory they take and how often they blow limits."""
+
+    def __init__(self):
+        self._questions: Dict[str, _QuestionCost] = {}
+        self._lock = threading.Lock()
+
+    def record(self, question_id: str, test_results: List[Dict[str, Any]]):
+        with self._lock:
+            cost = self._questions.setdefault(question_id, _QuestionCost())
+            cost.submissions += 1
+            for test_result in test_results:
+                cost.tests_run += 1
+                cost.wall_ms += test_result.get('wall_ms') or 0.0
+                cost.max_peak_rss_kb = max(cost.max_peak_rss_kb, test_result.get('peak_rss_kb') or 0)
+                if test_result['error'] == "Execution timed out":
+                    cost.timeouts += 1
+                elif test_result['error'] == "Memory limit exceeded":
+                    cost.memory_limit_failures += 1
+
+                cpu_ms = test_result.get('cpu_ms')
+                if cpu_ms is None:
+                    continue
+                cost.cpu_ms += cpu_ms
+                test = cost.tests.setdefault(test_result['test_id'], [0, 0.0, 0.0])
+                test[0] += 1
+                test[1] += cpu_ms
+                test[2] = max(test[2], cpu_ms)
+
+    def question(self, question_id: str, slowest: int = 5) -> Dict[str, Any]:
+        with self._lock:
+            cost = self._questions.get(question_id)
+            if cost is None:
+                return {}
+            tests = sorted(cost.tests.items(), key=lambda item: item[1][1] / item[1][0], reverse=True)
+            return {
+                'submissions': cost.submissions,
+                'tests_run': cost.tests_run,
+                'wall_ms_total': cost.wall_ms,
+                'cpu_ms_total': cost.cpu_ms,
+                'cpu_ms_per_submission': cost.cpu_ms / cost.submissions,
+                'max_peak_rss_kb': cost.max_peak_rss_kb,
+                'timeouts': cost.timeouts,
+                'memory_limit_failures': cost.memory_limit_failures,
+                'slowest_tests': [{'test_id': test_id, 'runs': runs, 'mean_cpu_ms': total / runs, 'max_cpu_ms': peak}
+                                  for test_id, (runs, total, peak) in tests[:slowest]]
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Cost summary for every question judged so far."""
+        with self._lock:
+            question_ids = list(self._questions)
+        return {question_id: self.question(question_id) for question_id in question_ids}
@@ -0,0 +1,109 @@
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from monitoring.log import get_default_log
+
+log = get_default_log()
+
+# Lower is judged first
+PRIORITY_FIRST = 0
+PRIORITY_RESUBMIT = 1
+
+
+class SubmissionQueueFull(Exception):
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SubmissionScheduler:
+    """Bounded priority queue of submissions served by a fixed set of judging threads.
+
+    Socket.IO handlers only enqueue; judging happens on the scheduler's own
+    threads so a burst of submissions cannot tie up the event handlers.
+    At most max_in_flight submissions are queued or being judged at once.
+    Rapid resubmits queue behind first submissions and may only fill
+    resubmit_share of that cap, so the rest stays free for first attempts.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], None], max_pending: int = 256, workers: int = 4,
+                 max_in_flight: Optional[int] = None, resubmit_share: float = 0.75):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_in_flight = max_in_flight or max_pending + self.workers
+        self.resubmit_limit = max(1, int(self.max_in_flight * resubmit_share))
+        self._queue = queue.PriorityQueue(maxsize=max_pending)
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Moving average of a judgement's duration, for retry estimates
+        self._average_run = 1.0
+        self.rejected = 0
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._serve, name=f"judge-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job: Dict[str, Any], priority: int = PRIORITY_FIRST,
+               on_queued: Optional[Callable[[int], None]] = None) -> int:
+        """Queue a job and return its 1-based position; raises SubmissionQueueFull on overload.
+
+        `on_queued` is called with the position before any judging thread can
+        see the job, so an acknowledgement sent from it precedes the results.
+        """
+        limit = self.max_in_flight if priority == PRIORITY_FIRST else self.resubmit_limit
+        with self._lock:
+            if self._in_flight >= limit:
+                self.rejected += 1
+                raise SubmissionQueueFull("Judge is at capacity", self._retry_after(self._in_flight - limit + 1))
+            # Only submitters add to the queue, and they hold _lock, so a job
+            # that fits now still fits after on_queued
+            with self._queue.mutex:
+                waiting = len(self._queue.queue)
+                position = 1 + sum(1 for queued in self._queue.queue if queued[0] <= priority)
+            if waiting >= self._queue.maxsize > 0:
+                self.rejected += 1
+                raise SubmissionQueueFull("Judge queue is full", self._retry_after(waiting))
+            if on_queued is not None:
+                on_queued(position)
+            self._queue.put_nowait((priority, next(self._sequence), job))
+            self._in_flight += 1
+        return position
+
+    def _retry_after(self, excess: int) -> float:
+        # Roughly when `excess` judgements will have finished across the threads
+        return max(1.0, self._average_run * excess / self.workers)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put((float('inf'), next(self._sequence), None))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _serve(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            started = time.perf_counter()
+            try:
+                self.handler(job)
+            except Exception as e:
+                log.error('judge_failed', error=str(e))
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._average_run = 0.9 * self._average_run + 0.1 * (time.perf_counter() - started)
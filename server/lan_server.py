@@ -1,20 +1,57 @@
-from flask import Flask, request, jsonify, render_template_string
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask import Flask, Response, request, jsonify
+from flask_socketio import SocketIO
 from flask_cors import CORS
-from pymongo import MongoClient
-import json
+import atexit
+import functools
+import hmac
+import signal
+import sys
 import threading
 import time
 from datetime import datetime
-from bson import ObjectId
+from bson.errors import InvalidId
 import os
 from dotenv import load_dotenv
-from typing import Dict, List
 from executor.code_executor import CodeExecutor
+from executor.worker_pool import get_default_pool
+from executor.compiled_tests import get_default_cache
+from executor.result_cache import get_default_result_cache, is_cacheable
+from storage.database import connect
+from storage.indexes import ensure_indexes, player_matches_query
+from storage.question_store import QuestionStore
+from storage.public_questions import PublicQuestionCache, visible_examples
+from storage.write_behind import WriteBehindBuffer
+from judge.rate_limit import create_submission_limiter, retry_after_seconds
+from judge.submission_queue import PRIORITY_FIRST, PRIORITY_RESUBMIT, SubmissionScheduler, SubmissionQueueFull
+from judge.stats import JudgeStats
+from game.state import create_game_state
+from game.match import Match
+from game.ratings import create_leaderboard, match_stats_update, summarize_stats
+from game.timers import MatchTimerScheduler, TimerHeap
+from game.broadcast import CoalescingBroadcaster, SpectatorRegistry
+from game.connections import ConnectionRegistry
+from game.cluster import ManagerPubSubManager, connect_state, parse_address
+from game.transport import ThreadingTransport
+from monitoring.log import get_default_log
+from monitoring.metrics import MongoLatencyListener, registry
+from monitoring.profiler import SamplingProfiler
 
 # Load environment variables
 load_dotenv()
 
+log = get_default_log()
+
+# Served on /metrics; gauges read their sources when scraped
+event_latency = registry.histogram('litcode_event_handler_seconds', 'Socket.IO event handler latency', ('event',))
+event_errors = registry.counter('litcode_event_handler_errors_total', 'Socket.IO event handlers that raised', ('event',))
+submissions = registry.counter('litcode_submissions_total', 'Code submissions by outcome', ('outcome',))
+judge_wait = registry.histogram('litcode_judge_queue_wait_seconds', 'Time a submission waits for a judge thread')
+judge_run = registry.histogram('litcode_judge_run_seconds', 'Time to judge a submission, complexity grading included')
+mongo_listener = MongoLatencyListener(
+    registry.histogram('litcode_mongo_command_seconds', 'MongoDB command latency', ('command',)),
+    registry.counter('litcode_mongo_command_failures_total', 'MongoDB commands that failed', ('command',))
+)
+
 app = Flask(__name__)
 
 # Configure CORS with specific settings for ngrok
@@ -38,6 +75,24 @@ CORS(app, resources={
     }
 })
 
+# Game state lives in this process, or in a state manager shared by several
+# server processes (see run_cluster.py)
+if os.getenv('STATE_BACKEND', 'memory') == 'manager':
+    cluster = connect_state(parse_address(os.getenv('STATE_MANAGER_ADDRESS', '127.0.0.1:50505')),
+                            os.getenv('STATE_MANAGER_AUTHKEY', '').encode())
+    game_state = cluster.get_game_state()
+    leaderboard = cluster.get_leaderboard()
+    match_timer_heap = cluster.get_match_timers()
+    # Other workers' timer changes can't wake our scheduler thread, so it polls
+    match_timer_poll = 1.0
+    client_manager = None if os.getenv('SOCKETIO_MESSAGE_QUEUE') else ManagerPubSubManager(cluster)
+else:
+    game_state = create_game_state()
+    leaderboard = create_leaderboard()
+    match_timer_heap = TimerHeap()
+    match_timer_poll = None
+    client_manager = None
+
 # Configure SocketIO with optimized settings for ngrok
 socketio = SocketIO(
     app,
@@ -46,20 +101,54 @@ socketio = SocketIO(
     ping_interval=1000,
     async_mode='threading',
     websocket=True,
-    logger=True,
-    engineio_logger=True,
+    # Per-packet logging is synchronous I/O on every event; only for debugging
+    logger=os.getenv('SOCKETIO_LOGGING') == '1',
+    engineio_logger=os.getenv('SOCKETIO_LOGGING') == '1',
     always_connect=True,
     manage_session=False,
-    cookie=False
+    cookie=False,
+    client_manager=client_manager,
+    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE')
 )
+# Every emit and room change goes through here; asgi_server.py swaps in its AsyncServer
+realtime = ThreadingTransport(socketio)
 
-# MongoDB setup
-client = MongoClient(os.getenv('MONGO_DB_KEY'))
-db = client['litcodedb']
+# MongoDB setup; pool size, timeouts and database name come from MONGO_* settings
+db = connect([mongo_listener])
 questions_collection = db['questions']
 matches_collection = db['matches']
 users_collection = db['users']
 
+# User upserts and match inserts are flushed in bulk off the handler threads
+write_behind = WriteBehindBuffer(
+    max_batch=int(os.getenv('DB_WRITE_BATCH', '500')),
+    flush_interval=float(os.getenv('DB_FLUSH_INTERVAL', '1'))
+)
+
+# Ratings live on the leaderboard and change when a match ends, so joining reads no MongoDB
+def get_player_rating(clerkId):
+    return leaderboard.rating(clerkId)
+
+def load_ratings():
+    """Put every stored rating on the leaderboard; ratings are only read from memory after this."""
+    stored = users_collection.find({'rating': {'$exists': True}}, {'clerkId': True, 'rating': True})
+    return leaderboard.seed([(user['clerkId'], user['rating']) for user in stored])
+
+# Questions are served from memory; edited questions drop their compiled tests and judged results
+question_store = QuestionStore(questions_collection, float(os.getenv('QUESTION_POLL_INTERVAL', '30')))
+question_store.on_change(get_default_cache().invalidate)
+result_cache = get_default_result_cache()
+question_store.on_change(result_cache.invalidate)
+public_questions = PublicQuestionCache(question_store)
+QUESTION_MAX_AGE = int(os.getenv('QUESTION_MAX_AGE', '300'))
+
+# Per-test memory limit for questions without their own memoryLimitMb (0 = unlimited)
+JUDGE_MEMORY_LIMIT_MB = int(os.getenv('JUDGE_MEMORY_LIMIT_MB', '0')) or None
+judge_stats = JudgeStats()
+
+def question_memory_limit(question):
+    return question.get('memoryLimitMb') or JUDGE_MEMORY_LIMIT_MB
+
 @app.route('/')
 def home():
     return jsonify({
@@ -67,300 +156,734 @@ def home():
         "message": "LitCode server is running"
     })
 
-class GameState:
-    def __init__(self):
-        # Separate queues for each algorithm type
-        self.waiting_queues = {
-            'graph': [],
-            'tree': [],
-            'array': [],
-            'random': []
-        }
-        self.active_matches = {}
-        self.match_timers = {}
+@app.route('/stats/judge')
+def get_judge_stats():
+    return jsonify({
+        'result_cache': result_cache.stats(),
+        'queue_depth': submission_scheduler.depth(),
+        'in_flight': submission_scheduler.in_flight(),
+        'rejected_submissions': submission_scheduler.rejected,
+        'rate_limits': submission_limiter.stats(),
+        'write_behind': write_behind.stats(),
+        'questions': judge_stats.snapshot()
+    })
 
-    def add_to_queue(self, player_data: dict, algorithm_type: str):
-        if algorithm_type in self.waiting_queues:
-            self.waiting_queues[algorithm_type].append(player_data)
-            return True
-        return False
+@app.route('/metrics')
+def get_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+# Sampling profiler, switched on and off over HTTP; only with ADMIN_TOKEN set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+profiler = SamplingProfiler()
+
+def is_admin():
+    supplied = request.headers.get('Authorization', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied.encode(), f"Bearer {ADMIN_TOKEN}".encode())
+
+@app.route('/debug/profiler')
+def get_profiler_status():
+    if not is_admin():
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(profiler.status())
+
+@app.route('/debug/profiler/start', methods=['POST'])
+def start_profiler():
+    """Start sampling every thread's stack, every `interval` seconds (default 5ms)."""
+    if not is_admin():
+        return jsonify({'error': 'Not found'}), 404
+    started = profiler.start(float(request.args.get('interval', '0.005')))
+    log.warning('profiler_started', interval=profiler.interval, already_running=not started)
+    return jsonify(profiler.status())
+
+@app.route('/debug/profiler/stop', methods=['POST'])
+def stop_profiler():
+    """Stop sampling; returns collapsed stacks for a flame graph."""
+    if not is_admin():
+        return jsonify({'error': 'Not found'}), 404
+    samples = profiler.samples
+    stacks = profiler.stop()
+    log.warning('profiler_stopped', samples=samples)
+    return Response(stacks, mimetype='text/plain')
+
+@app.route('/leaderboard')
+def get_leaderboard():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    top = leaderboard.top(limit, offset)
+    names = {user['clerkId']: user.get('name') for user in
+             users_collection.find({'clerkId': {'$in': [clerkId for _, clerkId, _ in top]}},
+                                   {'clerkId': True, 'name': True})}
+    return jsonify({
+        'total_players': leaderboard.size(),
+        'players': [{'rank': rank, 'clerkId': clerkId, 'name': names.get(clerkId), 'rating': round(rating, 1)}
+                    for rank, clerkId, rating in top]
+    })
 
-    def remove_from_queue(self, sid: str):
-        for queue in self.waiting_queues.values():
-            queue[:] = [p for p in queue if p['sid'] != sid]
-
-    def find_match(self, algorithm_type: str) -> tuple:
-        if algorithm_type == 'random':
-            # Attempt to find a specific-type player first
-            for queue_type in ['graph', 'tree', 'array']:
-                if len(self.waiting_queues[queue_type]) >= 1 and len(self.waiting_queues['random']) >= 1:
-                    player1 = self.waiting_queues[queue_type].pop(0)
-                    player2 = self.waiting_queues['random'].pop(0)
-                    return player1, player2, queue_type  # Use specific type for the match
-            # If no specific-type players are available, match two random players
-            if len(self.waiting_queues['random']) >= 2:
-                player1 = self.waiting_queues['random'].pop(0)
-                player2 = self.waiting_queues['random'].pop(0)
-                return player1, player2, 'random'
-            return None, None, None
-        else:
-            # Specific-type player: Attempt to find another same-type player
-            queue = self.waiting_queues[algorithm_type]
-            if len(queue) >= 2:
-                player1 = queue.pop(0)
-                player2 = queue.pop(0)
-                return player1, player2, algorithm_type
-            # Do not match with different specific types
-            return None, None, None
-
-
-game_state = GameState()
-
-class Match:
-    def __init__(self, player1_id, player2_id, question: dict, algorithm_type: str, duration=1800):
-        self.match_id = str(ObjectId())
-        self.player1 = {
-            'id': player1_id,
-            'tests_passed': 0,
-            'total_tests': len(question['testCases']),
-            'completed': False
-        }
-        self.player2 = {
-            'id': player2_id,
-            'tests_passed': 0,
-            'total_tests': len(question['testCases']),
-            'completed': False
-        }
-        self.question_id = question['_id']
-        self.algorithm_type = algorithm_type
-        self.start_time = datetime.utcnow()
-        self.duration = duration
-        self.is_active = True
-
-    def update_player_progress(self, clerkId, tests_passed):
-        if self.player1['id'] == clerkId:
-            self.player1['tests_passed'] = tests_passed
-        elif self.player2['id'] == clerkId:
-            self.player2['tests_passed'] = tests_passed
-
-    def get_winner(self):
-        p1_score = self.player1['tests_passed'] / self.player1['total_tests']
-        p2_score = self.player2['tests_passed'] / self.player2['total_tests']
-        
-        if p1_score > p2_score:
-            return self.player1['id']
-        elif p2_score > p1_score:
-            return self.player2['id']
-        return None
+@app.route('/users/<clerkId>/profile')
+def get_profile(clerkId):
+    """Rating, rank and match stats, all from the user document and the in-memory leaderboard."""
+    user = users_collection.find_one({'clerkId': clerkId}, {'_id': False, 'name': True, 'stats': True})
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify({
+        'clerkId': clerkId,
+        'name': user.get('name'),
+        'rating': round(leaderboard.rating(clerkId), 1),
+        'rank': leaderboard.rank(clerkId),
+        'total_players': leaderboard.size(),
+        'stats': summarize_stats(user.get('stats', {}))
+    })
 
-    def to_dict(self):
-        return {
-            'match_id': self.match_id,
-            'player1': self.player1,
-            'player2': self.player2,
-            'question_id': self.question_id,
-            'algorithm_type': self.algorithm_type,
-            'start_time': self.start_time,
-            'duration': self.duration,
-            'is_active': self.is_active
-        }
+@app.route('/users/<clerkId>/matches')
+def get_match_history(clerkId):
+    """A player's most recent matches, newest first (served by the player/start_time indexes)."""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    matches = matches_collection.find(player_matches_query(clerkId), {'_id': False})
+    return jsonify({'matches': list(matches.sort('start_time', -1).limit(limit))})
+
+@app.route('/questions/<question_id>')
+def get_question(question_id):
+    """Public statement of a question (visible examples only), cacheable and compressed."""
+    try:
+        encoded = public_questions.get(question_id)
+    except InvalidId:
+        encoded = None
+    if encoded is None:
+        return jsonify({'error': 'Question not found'}), 404
+
+    encoding = next((encoding for encoding in ('br', 'gzip')
+                     if encoding in encoded.encodings and request.accept_encodings[encoding]), None)
+    etag = encoded.etag_for(encoding)
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={QUESTION_MAX_AGE}',
+        'Vary': 'Accept-Encoding'
+    }
+    # If-None-Match uses weak comparison, so proxies that weaken the tag still revalidate
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+
+    if encoding is None:
+        return Response(encoded.body, mimetype='application/json', headers=headers)
+    headers['Content-Encoding'] = encoding
+    return Response(encoded.encodings[encoding], mimetype='application/json', headers=headers)
 
 # Match management functions
-def start_match_timer(match_id, duration):
-    def timer_callback():
-        time.sleep(duration)
-        if match_id in game_state.active_matches:
-            match = game_state.active_matches[match_id]
-            end_match(match)
-
-    timer_thread = threading.Thread(target=timer_callback)
-    timer_thread.start()
-    game_state.match_timers[match_id] = timer_thread
-
-def end_match(match):
-    if not match.is_active:
+def end_match(match_id):
+    # Only one caller (timer, disconnect, any worker) gets the match back
+    match = game_state.finish_match(match_id)
+    if match is None:
         return
 
-    match.is_active = False
-    winner_id = match.get_winner()
-    
-    matches_collection.insert_one(match.to_dict())
+    match_timers.cancel(match.match_id)
+    progress_broadcaster.forget(match.match_id)
+    spectators.drop_match(match.match_id)
+    submission_limiter.forget_match(match.match_id)
+    # The match is already gone from the game state, so it must be reported whatever scoring does
+    try:
+        winner_id = match.get_winner()
+        rating_changes = record_match_result(match, winner_id)
+    except Exception as e:
+        log.error('match_scoring_failed', match_id=match.match_id, error=str(e))
+        winner_id, rating_changes = None, {}
+
+    write_behind.insert(matches_collection, dict(match.to_dict(), winner_id=winner_id,
+                                                 rating_changes=rating_changes))
     
-    socketio.emit('match_ended', {
+    realtime.emit('match_ended', {
         'winner_id': winner_id,
         'final_scores': {
             'player1': match.player1,
             'player2': match.player2
-        }
-    }, room=match.match_id)
+        },
+        'rating_changes': rating_changes
+    }, to=match.match_id)
+
+def record_match_result(match, winner_id):
+    """Apply the Elo update and fold the match into both players' stored stats."""
+    player1, player2 = match.player1, match.player2
+    score1 = 0.5 if winner_id is None else float(winner_id == player1['id'])
+    changes = leaderboard.record_match(player1['id'], player2['id'], score1)
+
+    # Stats are kept per question type; 'random' matches count under the question drawn
+    question = question_store.get(match.question_id)
+    algorithm_type = question.get('type', match.algorithm_type) if question else match.algorithm_type
+    rating_changes = {}
+    for player in (player1, player2):
+        old, new = changes[player['id']]
+        outcome = 'draw' if winner_id is None else 'win' if winner_id == player['id'] else 'loss'
+        write_behind.upsert(users_collection, 'clerkId', player['id'], {'rating': new},
+                            match_stats_update(algorithm_type, outcome, player['tests_passed'],
+                                               player['total_tests']))
+        rating_changes[player['id']] = {'old': round(old, 1), 'new': round(new, 1)}
+    return rating_changes
+
+match_timers = MatchTimerScheduler(end_match, match_timer_heap, poll_interval=match_timer_poll)
 
-    if match.match_id in game_state.active_matches:
-        del game_state.active_matches[match.match_id]
+def start_match_timer(match_id, duration):
+    match_timers.schedule(match_id, duration)
+
+def extend_match_timer(match_id, seconds):
+    """Give a running match extra time; returns the seconds left or None if it has no timer."""
+    remaining = match_timers.extend(match_id, seconds)
+    if remaining is not None:
+        game_state.extend_match(match_id, seconds)
+    return remaining
+
+@app.route('/matches/<match_id>/extend', methods=['POST'])
+def extend_match(match_id):
+    """Give a running match `seconds` more (e.g. a tournament pause); both players and spectators are told."""
+    if not is_admin():
+        return jsonify({'error': 'Not found'}), 404
+    seconds = request.args.get('seconds', type=float)
+    if seconds is None or not 0 < seconds <= MATCH_DURATION:
+        return jsonify({'error': f'seconds must be between 0 and {MATCH_DURATION}'}), 400
+    remaining = extend_match_timer(match_id, seconds)
+    if remaining is None:
+        return jsonify({'error': 'Match not found'}), 404
+    log.warning('match_extended', match_id=match_id, seconds=seconds)
+    realtime.emit('match_extended', {'match_id': match_id, 'seconds': seconds, 'time_remaining': remaining},
+                  to=match_id)
+    return jsonify({'match_id': match_id, 'time_remaining': remaining})
 
 def get_random_question(algorithm_type: str):
-    query = {}
-    if algorithm_type != 'random':
-        query['type'] = algorithm_type
-    
-    question = questions_collection.aggregate([
-        {'$match': query},
-        {'$sample': {'size': 1}}
-    ]).next()
-    
-    question['_id'] = str(question['_id'])
-    return question
+    return question_store.random(algorithm_type)
+
+# Socket event handlers take the connection's sid, so both server modes share them
+def instrumented(event):
+    """Record a handler's latency and failures under its event name."""
+    def wrap(handler):
+        @functools.wraps(handler)
+        def timed(sid, *args):
+            start = time.perf_counter()
+            try:
+                return handler(sid, *args)
+            except Exception:
+                event_errors.inc(event=event)
+                raise
+            finally:
+                event_latency.observe(time.perf_counter() - start, event=event)
+        return timed
+    return wrap
+
+@instrumented('connect')
+def on_connect(sid):
+    log.info('client_connected', sid=sid)
+    realtime.emit('connection_established', {'sid': sid}, to=sid)
+
+def summarize_question(question, algorithm_type):
+    """Only what players need right away; the statement is fetched from /questions/<id>."""
+    return {
+        'question_id': question['_id'],
+        'question_etag': public_questions.etag(question['_id']),
+        'algorithm_type': algorithm_type,
+        'examples': visible_examples(question),
+        'total_tests': len(question['testCases'])
+    }
 
-# Socket event handlers
-@socketio.on_error_default
-def default_error_handler(e):
-    print(f"SocketIO Error: {str(e)}")
-    socketio.emit('error', {'message': str(e)}, room=request.sid)
+MATCH_DURATION = int(os.getenv('MATCH_DURATION', '1800'))
 
-@socketio.on('connect')
-def handle_connect():
-    print(f"Client connected: {request.sid}")
-    emit('connection_established', {'sid': request.sid})
+def create_match(player1, player2, matched_type):
+    """Start a match between two dequeued players and notify both of them."""
+    # Get a question of the matched type
+    question = get_random_question(matched_type)
+    
+    match = Match(player1['clerkId'], player2['clerkId'], question, matched_type, MATCH_DURATION)
+    game_state.add_match(match)
+    
+    realtime.enter_room(player1['sid'], match.match_id)
+    realtime.enter_room(player2['sid'], match.match_id)
+    
+    question_summary = summarize_question(question, matched_type)
+    match_data_player1 = {
+        'match_id': match.match_id,
+        'rejoin_token': match.rejoin_tokens[player1['clerkId']],
+        'opponent': {
+            'id': player2['clerkId'],
+            'name': player2['player_name']
+        },
+        **question_summary
+    }
+    realtime.emit('match_found', match_data_player1, to=player1['sid'])
+    
+    match_data_player2 = {
+        'match_id': match.match_id,
+        'rejoin_token': match.rejoin_tokens[player2['clerkId']],
+        'opponent': {
+            'id': player1['clerkId'],
+            'name': player1['player_name']
+        },
+        **question_summary
+    }
+    realtime.emit('match_found', match_data_player2, to=player2['sid'])
+    
+    log.info('match_created', match_id=match.match_id, player1=player1['clerkId'], player2=player2['clerkId'],
+             algorithm_type=matched_type)
+    start_match_timer(match.match_id, match.duration)
 
-@socketio.on('join_queue')
-def handle_join_queue(data):
+@instrumented('join_queue')
+def on_join_queue(sid, data):
     clerkId = data['clerkId']
     player_name = data['player_name']
     algorithm_type = data.get('algorithm_type', 'random')
     
-    # Update user document
-    users_collection.update_one(
-        {'clerkId': clerkId},
-        {
-            '$set': {
-                'clerkId': clerkId,
-                'name': player_name,
-                'last_active': datetime.utcnow()
-            }
-        },
-        upsert=True
-    )
+    # Update user document (buffered; repeated joins collapse into one upsert)
+    write_behind.upsert(users_collection, 'clerkId', clerkId, {
+        'clerkId': clerkId,
+        'name': player_name,
+        'last_active': datetime.utcnow()
+    })
     
+    connections.bind(sid, clerkId)
+    game_state.connect_player(clerkId, sid)
+
     player_data = {
-        'sid': request.sid,
+        'sid': sid,
         'clerkId': clerkId,
-        'player_name': player_name
+        'player_name': player_name,
+        'rating': get_player_rating(clerkId)
     }
     
     game_state.add_to_queue(player_data, algorithm_type)
-    print(f"Player {player_name} ({clerkId}) joined {algorithm_type} queue.")
+    log.info('queue_joined', clerkId=clerkId, algorithm_type=algorithm_type)
     
-    # Try to find a match
-    player1, player2, matched_type = game_state.find_match(algorithm_type)
+    # Try to find a match now; otherwise the matchmaking tick widens the search over time
+    player1, player2, matched_type = game_state.find_match(sid)
     
     if player1 and player2:
-        # Get a question of the matched type
-        question = get_random_question(matched_type)
-        
-        match = Match(player1['clerkId'], player2['clerkId'], question, matched_type)
-        game_state.active_matches[match.match_id] = match
-        
-        join_room(match.match_id, sid=player1['sid'])
-        join_room(match.match_id, sid=player2['sid'])
-        
-        match_data_player1 = {
-            'match_id': match.match_id,
-            'opponent': {
-                'id': player2['clerkId'],
-                'name': player2['player_name']
-            },
-            'question': question,
-            'total_tests': len(question['testCases'])
-        }
-        emit('match_found', match_data_player1, room=player1['sid'])
-        
-        match_data_player2 = {
-            'match_id': match.match_id,
-            'opponent': {
-                'id': player1['clerkId'],
-                'name': player1['player_name']
-            },
-            'question': question,
-            'total_tests': len(question['testCases'])
-        }
-        emit('match_found', match_data_player2, room=player2['sid'])
-        
-        print(f"Match created between {player1['player_name']} and {player2['player_name']} for {matched_type} algorithm")
-        start_match_timer(match.match_id, match.duration)
+        create_match(player1, player2, matched_type)
 
-@socketio.on('leave_queue')
-def handle_leave_queue(data):
+@instrumented('leave_queue')
+def on_leave_queue(sid, data):
     clerkId = data['clerkId']
-    game_state.remove_from_queue(request.sid)
-    print(f"Player {clerkId} left the queue.")
-    emit('queue_left', {'message': 'You have left the queue.'}, room=request.sid)
+    game_state.remove_from_queue(sid)
+    log.info('queue_left', clerkId=clerkId)
+    realtime.emit('queue_left', {'message': 'You have left the queue.'}, to=sid)
 
 
-@socketio.on('submit_result')
-def handle_submit_result(data):
+def players_progress(match):
+    return {
+        player['id']: {
+            'tests_passed': player['tests_passed'],
+            'total_tests': player['total_tests']
+        } for player in (match.player1, match.player2)
+    }
+
+def match_progress(match_id):
+    """Both players' progress in a match, as broadcast to its room."""
+    match = game_state.get_match(match_id)
+    if match is None:
+        return None
+    return {'match_id': match_id, 'players': players_progress(match)}
+
+def broadcast_progress(match_id, payload):
+    realtime.emit('match_progress', payload, to=match_id)
+    # Clients that predate match_progress follow their opponent through opponent_progress
+    for clerkId, progress in payload['players'].items():
+        realtime.emit('opponent_progress', progress, to=match_id, skip_sid=game_state.player_sid(clerkId))
+
+# Progress updates are coalesced per match room: at most one update per interval
+progress_broadcaster = CoalescingBroadcaster(
+    broadcast_progress,
+    match_progress,
+    float(os.getenv('PROGRESS_BROADCAST_INTERVAL', '0.2'))
+)
+spectators = SpectatorRegistry()
+
+def match_for_player(sid, match_id, clerkId):
+    """The running match `clerkId` plays in, if this connection is theirs; else None."""
+    match = game_state.get_match(match_id) if isinstance(match_id, str) else None
+    if match is None or clerkId not in (match.player1['id'], match.player2['id']):
+        return None
+    if connections.clerk_for(sid) != clerkId:
+        return None
+    return match
+
+def update_match_progress(match_id, clerkId, tests_passed):
+    if game_state.update_player_progress(match_id, clerkId, tests_passed):
+        progress_broadcaster.mark(match_id)
+
+@instrumented('submit_result')
+def on_submit_result(sid, data):
+    # Progress comes from the server's judge only; client-reported scores are ignored
+    realtime.emit('error', {'message': 'Results are judged on the server; use submit_code'}, to=sid)
+
+@instrumented('spectate_match')
+def on_spectate_match(sid, data):
     match_id = data['match_id']
-    clerkId = data['clerkId']
-    tests_passed = data['tests_passed']
-    total_tests = data['total_tests']
-    
-    if match_id in game_state.active_matches:
-        match = game_state.active_matches[match_id]
-        match.update_player_progress(clerkId, tests_passed)
-        
-        emit('opponent_progress', {
-            'tests_passed': tests_passed,
-            'total_tests': total_tests
-        }, room=match_id, skip_sid=request.sid)
+    state = match_progress(match_id)
+    if state is None:
+        realtime.emit('error', {'message': 'Match not found'}, to=sid)
+        return
+
+    spectators.add(sid, match_id)
+    realtime.enter_room(sid, match_id)
+    realtime.emit('spectating', dict(state, time_remaining=match_timers.remaining(match_id),
+                                     spectators=spectators.count(match_id)), to=sid)
+
+@instrumented('stop_spectating')
+def on_stop_spectating(sid, data=None):
+    match_id = spectators.remove(sid)
+    if match_id is not None:
+        realtime.leave_room(sid, match_id)
         
 
-@socketio.on('disconnect')
-def handle_disconnect():
-    print(f"Client disconnected: {request.sid}")
+# Connections of this process; clerkId -> match lives in game_state
+connections = ConnectionRegistry()
+RECONNECT_GRACE_SECONDS = float(os.getenv('RECONNECT_GRACE_SECONDS', '15'))
+
+def expire_disconnect(key):
+    """Grace period over: end the match of a player who never reconnected."""
+    token, clerkId = key.split(':', 1)
+    match_id = game_state.expire_disconnect(clerkId, int(token))
+    if match_id is not None:
+        end_match(match_id)
+
+# Keyed by "<token>:<clerkId>"; a reconnect makes the pending expiry a no-op
+reconnect_timers = MatchTimerScheduler(expire_disconnect)
+
+@instrumented('rejoin_match')
+def on_rejoin_match(sid, data):
+    """A player reconnected (new sid) and wants back into their running match.
+
+    They prove who they are with the rejoin token sent to them in match_found.
+    """
+    clerkId = data.get('clerkId')
+    match_id = data.get('match_id')
+    match = game_state.get_match(match_id) if isinstance(match_id, str) else None
+    if match is None or not match.check_rejoin_token(clerkId, data.get('rejoin_token')):
+        realtime.emit('rejoin_failed', {'message': 'No active match to rejoin'}, to=sid)
+        return
+
+    connections.bind(sid, clerkId)
+    if game_state.connect_player(clerkId, sid) != match_id:
+        # The match ended in the meantime
+        realtime.emit('rejoin_failed', {'message': 'No active match to rejoin'}, to=sid)
+        return
+
+    realtime.enter_room(sid, match_id)
+    opponent = match.player2 if match.player1['id'] == clerkId else match.player1
+    question = question_store.get(match.question_id)
+    realtime.emit('match_rejoined', {
+        'match_id': match_id,
+        'opponent': {'id': opponent['id']},
+        'progress': players_progress(match),
+        'time_remaining': match_timers.remaining(match_id),
+        **(summarize_question(question, match.algorithm_type) if question is not None else {})
+    }, to=sid)
+    realtime.emit('opponent_reconnected', {'clerkId': clerkId}, to=match_id, skip_sid=sid)
+
+@instrumented('disconnect')
+def on_disconnect(sid):
+    log.info('client_disconnected', sid=sid)
     try:
-        game_state.remove_from_queue(request.sid)
-        
-        for match_id, match in list(game_state.active_matches.items()):
-            if match.player1['id'] == request.sid or match.player2['id'] == request.sid:
-                end_match(match)
-                break
+        game_state.remove_from_queue(sid)
+        if spectators.remove(sid) is not None:
+            return
+
+        clerkId = connections.unbind(sid)
+        disconnect = game_state.disconnect_player(clerkId, sid) if clerkId else None
+        if disconnect is None:
+            return
+
+        match_id, token = disconnect
+        if RECONNECT_GRACE_SECONDS <= 0:
+            end_match(match_id)
+            return
+        realtime.emit('opponent_disconnected', {
+            'clerkId': clerkId,
+            'grace_seconds': RECONNECT_GRACE_SECONDS
+        }, to=match_id)
+        reconnect_timers.schedule(f"{token}:{clerkId}", RECONNECT_GRACE_SECONDS)
     except Exception as e:
-        print(f"Error in disconnect handler: {str(e)}")
-
-@socketio.on('submit_code')
-def handle_code_submission(data):
+        log.error('disconnect_failed', sid=sid, error=str(e))
+
+def submission_score(results):
+    """Tests passed, held one short of full marks when an enforced complexity check failed."""
+    complexity = results.get('complexity')
+    if complexity and complexity['enforced'] and not complexity['passed']:
+        return min(results['passed'], results['total'] - 1)
+    return results['passed']
+
+def complexity_error(report):
+    if report['error']:
+        return f"Complexity check failed: {report['error']}"
+    return f"Complexity check failed: solution grows as {report['class']}, expected {report['expected']}"
+
+def judge_submission(job):
+    """Run a queued submission on a judge thread, streaming each test result to the submitter."""
+    sid = job['sid']
+    started = time.perf_counter()
+    judge_wait.observe(started - job['queued_at'])
     try:
-        code = data['code']
-        print(code)
-        match_id = data['match_id']
-        clerkId = data['clerkId']
-        
-        # Get the question from the database
-        match = game_state.active_matches[match_id]
-        question = questions_collection.find_one({'_id': ObjectId(match.question_id)})
-        
-        # Execute the code
+        match_id = job['match_id']
+        clerkId = job['clerkId']
+
+        # Get the question from the in-memory catalog
+        match = game_state.get_match(match_id)
+        if match is None:
+            raise KeyError(match_id)
+        question = question_store.get(match.question_id)
+        total_tests = len(question['testCases'])
+        best_progress = game_state.get_player_progress(match_id, clerkId)
+        start = time.perf_counter()
+        complexity = question.get('complexity')
+        # With an enforced complexity, full marks wait for the complexity verdict
+        stream_cap = total_tests - 1 if complexity and complexity.get('enforce') else total_tests
+
+        results = {
+            'passed': 0,
+            'total': total_tests,
+            'errors': [],
+            'test_results': []
+        }
+
+        # Execute the code, pushing results as each test finishes
         executor = CodeExecutor()
-        results = executor.execute_code(code, question['testCases'])
-        
-        # Update match progress
-        handle_submit_result({
-            'match_id': match_id,
-            'clerkId': clerkId,
-            'tests_passed': results['passed'],
-            'total_tests': results['total']
-        })
+        try:
+            for test_result in executor.iter_test_results(job['code'], question['testCases'],
+                                                          question.get('parallelism', 1),
+                                                          question_id=match.question_id,
+                                                          fail_fast=job['fail_fast'],
+                                                          memory_limit_mb=question_memory_limit(question),
+                                                          comparator=question.get('comparator')):
+                results['test_results'].append(test_result)
+                if test_result['error']:
+                    results['errors'].append(test_result['error'])
+                if test_result['passed']:
+                    results['passed'] += 1
+                    # Only show the opponent progress beyond what they already saw
+                    if min(results['passed'], stream_cap) > best_progress:
+                        best_progress = min(results['passed'], stream_cap)
+                        update_match_progress(match_id, clerkId, best_progress)
+                realtime.emit('test_result', test_result, to=sid)
+        except SyntaxError as e:
+            results['errors'].append(f"Syntax error: {str(e)}")
+        except Exception as e:
+            results['errors'].append(f"Execution error: {str(e)}")
+
+        # Only correct solutions are worth timing
+        if complexity and total_tests and results['passed'] == total_tests:
+            try:
+                results['complexity'] = executor.grade_complexity(job['code'], complexity,
+                                                                  question_memory_limit(question))
+                if results['complexity']['enforced'] and not results['complexity']['passed']:
+                    results['errors'].append(complexity_error(results['complexity']))
+            except ValueError as e:
+                results['errors'].append(f"Complexity grading error: {str(e)}")
+
+        # Record the final score of this submission if it differs from what was streamed
+        score = submission_score(results)
+        if score != best_progress:
+            update_match_progress(match_id, clerkId, score)
         
+        judge_stats.record(match.question_id, results['test_results'])
+        if job.get('cache_key') is not None and is_cacheable(results):
+            result_cache.put(job['cache_key'], results, time.perf_counter() - start)
+
         # Send results back to the client
-        emit('code_results', {
-            'passed': results['passed'],
-            'total': results['total'],
-            'errors': results['errors'],
-            'test_results': results['test_results']
-        })
+        realtime.emit('code_results', results, to=sid)
         
     except Exception as e:
-        emit('error', {'message': f'Code execution error: {str(e)}'})
+        realtime.emit('error', {'message': f'Code execution error: {str(e)}'}, to=sid)
+    finally:
+        judge_run.observe(time.perf_counter() - started)
+
+def send_cached_results(job):
+    """Answer a resubmission of already-judged code from the result cache; returns True on a hit."""
+    match = game_state.get_match(job['match_id'])
+    if match is None:
+        return False
+    question = question_store.get(match.question_id)
+    if question is None:
+        return False
+    try:
+        job['cache_key'] = result_cache.key(job['code'], match.question_id, question['testCases'],
+                                            job['fail_fast'], question_memory_limit(question))
+    except SyntaxError:
+        # Judged as usual so the player gets the syntax error
+        return False
+
+    results = result_cache.get(job['cache_key'])
+    if results is None:
+        return False
+
+    score = submission_score(results)
+    if score != game_state.get_player_progress(job['match_id'], job['clerkId']):
+        update_match_progress(job['match_id'], job['clerkId'], score)
+    realtime.emit('code_results', dict(results, cached=True), to=job['sid'])
+    return True
+
+submission_scheduler = SubmissionScheduler(
+    judge_submission,
+    max_pending=int(os.getenv('JUDGE_QUEUE_SIZE', '256')),
+    workers=int(os.getenv('JUDGE_THREADS', str(os.cpu_count() or 1))),
+    max_in_flight=int(os.getenv('JUDGE_MAX_IN_FLIGHT', '0')) or None,
+    resubmit_share=float(os.getenv('JUDGE_RESUBMIT_SHARE', '0.75'))
+)
+submission_limiter = create_submission_limiter()
+
+registry.gauge('litcode_queue_depth', 'Players waiting per queue', game_state.queue_depths, 'algorithm_type')
+registry.gauge('litcode_active_matches', 'Matches in progress', game_state.active_match_count)
+registry.gauge('litcode_rated_players', 'Players on the leaderboard', leaderboard.size)
+registry.gauge('litcode_connections', 'Players connected to this process', lambda: len(connections))
+registry.gauge('litcode_judge_queue_depth', 'Submissions waiting for a judge thread', submission_scheduler.depth)
+registry.gauge('litcode_judge_in_flight', 'Submissions queued or being judged', submission_scheduler.in_flight)
+registry.gauge('litcode_write_behind_pending', 'Database writes waiting to be flushed', write_behind.depth)
+registry.gauge('litcode_write_behind_flushes', 'Write-behind flushes by result',
+               lambda: {'ok': write_behind.flushes - write_behind.failed_flushes, 'failed': write_behind.failed_flushes},
+               'result')
+registry.gauge('litcode_write_behind_flushed_writes', 'Database writes flushed since start',
+               lambda: write_behind.flushed_writes)
+registry.gauge('litcode_write_behind_flush_ms', 'Duration of write-behind flushes in milliseconds',
+               lambda: {'last': write_behind.last_flush_ms, 'max': write_behind.max_flush_ms}, 'stat')
+registry.gauge('litcode_progress_rooms_pending', 'Match rooms with an unsent progress update',
+               lambda: progress_broadcaster.stats()['pending_rooms'])
+registry.gauge('litcode_log_records', 'Structured log records by fate', log.stats, 'outcome')
+
+def reject_submission(sid, reason, retry_after):
+    """Tell the client its submission was not judged and when to try again."""
+    if reason == 'judge_busy':
+        message = f'The judge is overloaded, please resubmit in {retry_after:g}s.'
+    else:
+        message = f'Too many submissions, please wait {retry_after:g}s before resubmitting.'
+    realtime.emit('submission_rejected', {'message': message, 'reason': reason, 'retry_after': retry_after}, to=sid)
+
+@instrumented('submit_code')
+def on_submit_code(sid, data):
+    if spectators.is_spectator(sid):
+        realtime.emit('error', {'message': 'Spectators cannot submit code'}, to=sid)
+        return
+    try:
+        code = data['code']
+        job = {
+            'sid': sid,
+            'code': code,
+            'match_id': data['match_id'],
+            'clerkId': data['clerkId'],
+            'fail_fast': bool(data.get('fail_fast', False)),
+            'queued_at': time.perf_counter()
+        }
+        log.info('code_submitted', clerkId=job['clerkId'], match_id=job['match_id'], code_bytes=len(code))
+        # Checked before the limiter, so made-up ids can't take tokens or create buckets
+        if match_for_player(sid, job['match_id'], job['clerkId']) is None:
+            submissions.inc(outcome='refused')
+            realtime.emit('error', {'message': 'Not a player in this match'}, to=sid)
+            return
+        wait, limited_by, resubmit = submission_limiter.acquire(job['clerkId'], job['match_id'])
+        if limited_by is not None:
+            submissions.inc(outcome='rate_limited')
+            reject_submission(sid, f'rate_limited_{limited_by}', retry_after_seconds(wait))
+            return
+        # Identical resubmissions skip the judge queue entirely
+        if send_cached_results(job):
+            submissions.inc(outcome='cached')
+            return
+        # Acknowledged before a judging thread can pick the job up, so the ack precedes the results
+        submission_scheduler.submit(job, PRIORITY_RESUBMIT if resubmit else PRIORITY_FIRST,
+                                    lambda position: realtime.emit('submission_queued', {'position': position}, to=sid))
+        submissions.inc(outcome='queued')
+    except SubmissionQueueFull as e:
+        submissions.inc(outcome='rejected')
+        reject_submission(sid, 'judge_busy', retry_after_seconds(e.retry_after))
+        return
+    except Exception as e:
+        realtime.emit('error', {'message': f'Code execution error: {str(e)}'}, to=sid)
+        return
+
+# Flask-SocketIO (threading mode) wiring; asgi_server.py registers the same handlers on an AsyncServer
+@socketio.on_error_default
+def default_error_handler(e):
+    log.error('socket_event_failed', sid=request.sid, error=str(e))
+    realtime.emit('error', {'message': str(e)}, to=request.sid)
+
+@socketio.on('connect')
+def handle_connect():
+    on_connect(request.sid)
+
+@socketio.on('join_queue')
+def handle_join_queue(data):
+    on_join_queue(request.sid, data)
+
+@socketio.on('leave_queue')
+def handle_leave_queue(data):
+    on_leave_queue(request.sid, data)
+
+@socketio.on('submit_result')
+def handle_submit_result(data):
+    on_submit_result(request.sid, data)
+
+@socketio.on('spectate_match')
+def handle_spectate_match(data):
+    on_spectate_match(request.sid, data)
+
+@socketio.on('stop_spectating')
+def handle_stop_spectating(data=None):
+    on_stop_spectating(request.sid, data)
+
+@socketio.on('rejoin_match')
+def handle_rejoin_match(data):
+    on_rejoin_match(request.sid, data)
+
+@socketio.on('submit_code')
+def handle_code_submission(data):
+    on_submit_code(request.sid, data)
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    on_disconnect(request.sid)
+
+def run_matchmaking(interval):
+    """Periodically pair queued players whose rating windows have widened."""
+    while True:
+        time.sleep(interval)
+        for player1, player2, matched_type in game_state.tick_matchmaking():
+            try:
+                create_match(player1, player2, matched_type)
+            except Exception as e:
+                log.error('match_creation_failed', algorithm_type=matched_type, error=str(e))
+
+def start_services():
+    """Start the judge pool and background threads; call once per server process."""
+    # Fork the judge workers before the first submission arrives
+    get_default_pool()
+    if os.getenv('MONGO_ENSURE_INDEXES', '1') == '1':
+        ensure_indexes(db)
+    question_store.start()
+    load_ratings()
+    submission_scheduler.start()
+    threading.Thread(target=run_matchmaking, args=(float(os.getenv('MATCH_TICK_INTERVAL', '1')),),
+                     name="matchmaking", daemon=True).start()
+    match_timers.start()
+    reconnect_timers.start()
+    progress_broadcaster.start()
+    write_behind.start()
+    atexit.register(stop_writes)
+    # Under uvicorn the server owns SIGTERM and asgi_server flushes on shutdown instead
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+_stopping = threading.Event()
+
+def stop_writes():
+    """Flush buffered MongoDB writes; only the first of atexit, SIGTERM and ASGI shutdown does it."""
+    if _stopping.is_set():
+        return
+    _stopping.set()
+    write_behind.stop()
+
+def handle_sigterm(signum, frame):
+    # atexit doesn't run when SIGTERM kills the process, so flush here and exit normally
+    if _stopping.is_set():
+        # Already flushing on the way out (e.g. after Ctrl-C); let that finish
+        return
+    log.warning('server_stopping', signal=signum, pending_writes=write_behind.depth())
+    stop_writes()
+    sys.exit(0)
 
 if __name__ == '__main__':
+    start_services()
+
     socketio.run(
         app,
         debug=True,
@@ -0,0 +1,139 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+
+# Per-connection events are the bulk of the volume; LOG_SAMPLE_RATES overrides these
+DEFAULT_SAMPLE_RATES = {'client_connected': 0.1, 'client_disconnected': 0.1, 'code_submitted': 0.1}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"client_connected=0.1,queue_joined=0.5" -> {event: rate}."""
+    rates = {}
+    for item in spec.split(','):
+        if '=' in item:
+            event, rate = item.split('=', 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+class StructuredLog:
+    """JSON-lines event log written by a background thread.
+
+    Callers only sample and enqueue a record; serialization and I/O happen
+    on the writer thread. When the writer falls behind, records are dropped
+    and counted instead of blocking the caller. info() is sampled per
+    event name; warnings and errors are always kept.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, sample_rate: float = 1.0,
+                 sample_rates: Optional[Dict[str, float]] = None, max_pending: int = 10_000):
+        self.stream = stream or sys.stdout
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def info(self, event: str, **fields):
+        rate = self.sample_rates.get(event, self.sample_rate)
+        if rate < 1.0:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return
+            fields['sample_rate'] = rate
+        self._put('info', event, fields)
+
+    def warning(self, event: str, **fields):
+        self._put('warning', event, fields)
+
+    def error(self, event: str, **fields):
+        self._put('error', event, fields)
+
+    def _put(self, level: str, event: str, fields: dict):
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait((time.time(), level, event, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {'written': self.written, 'dropped': self.dropped, 'sampled_out': self.sampled_out,
+                'pending': self._queue.qsize()}
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="structured-log", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Write what is queued and stop the writer."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _write(self, record):
+        timestamp, level, event, fields = record
+        line = json.dumps({'ts': round(timestamp, 3), 'level': level, 'event': event, **fields},
+                          default=str, separators=(',', ':'))
+        self.stream.write(line + '\n')
+        self.written += 1
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    break
+                self._write(record)
+                # Write whatever else is waiting before flushing once
+                while True:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is None:
+                        return
+                    self._write(record)
+            except Exception:
+                self.dropped += 1
+            finally:
+                try:
+                    self.stream.flush()
+                except Exception:
+                    pass
+
+
+_default_log = None
+_default_log_lock = threading.Lock()
+
+
+def get_default_log() -> StructuredLog:
+    """The process-wide log, configured from LOG_FILE, LOG_SAMPLE_RATE and LOG_SAMPLE_RATES."""
+    global _default_log
+    with _default_log_lock:
+        if _default_log is None:
+            path = os.getenv('LOG_FILE')
+            _default_log = StructuredLog(
+                open(path, 'a', buffering=1) if path else sys.stdout,
+                float(os.getenv('LOG_SAMPLE_RATE', '1')),
+                dict(DEFAULT_SAMPLE_RATES, **parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))),
+                int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+            )
+        return _default_log
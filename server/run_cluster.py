@@ -0,0 +1,113 @@
+"""Run several LitCode server processes behind one port with shared game state.
+
+    python run_cluster.py
+
+SERVER_WORKERS processes (default: CPU count) accept connections from one
+listening socket on SERVER_HOST:SERVER_PORT (default 0.0.0.0:5000). Queues,
+matches and match timers live in a state manager process that every worker
+uses through STATE_BACKEND=manager, and Socket.IO emits and room joins travel
+over the manager's message bus (or SOCKETIO_MESSAGE_QUEUE, if set), so two
+players on different workers can still be matched and share a room.
+
+Clients must connect with the websocket transport: long-polling requests of
+one session could land on different workers.
+
+Stop the cluster with SIGTERM or Ctrl-C: workers are sent SIGTERM, flush
+their buffered MongoDB writes and exit; any still running after
+SHUTDOWN_TIMEOUT seconds (default 10) are killed.
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from werkzeug.serving import make_server
+
+from game.cluster import connect_state, serve_state
+
+
+def run_worker(fd: int, host: str, port: int):
+    # Imported here so only workers (not the launcher or the state manager) build the app
+    import lan_server
+
+    # Ctrl-C reaches the whole process group; workers stop on the launcher's SIGTERM instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    lan_server.start_services()
+    make_server(host, port, lan_server.app, threaded=True, fd=fd).serve_forever()
+
+
+def wait_for_state(address, authkey: bytes, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connect_state(address, authkey)
+            return
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def stop_workers(children, timeout: float):
+    """SIGTERM every worker so it flushes its writes, then kill those that outlive `timeout`."""
+    for child in children:
+        if child.is_alive():
+            child.terminate()
+    deadline = time.monotonic() + timeout
+    for child in children:
+        child.join(max(0.0, deadline - time.monotonic()))
+    for child in children:
+        if child.is_alive():
+            print(f"{child.name} did not stop within {timeout}s; killing it")
+            child.kill()
+            child.join()
+
+
+def handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    host = os.getenv('SERVER_HOST', '0.0.0.0')
+    port = int(os.getenv('SERVER_PORT', '5000'))
+    workers = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 1)))
+    state_address = ('127.0.0.1', int(os.getenv('STATE_MANAGER_PORT', '50505')))
+    authkey = os.getenv('STATE_MANAGER_AUTHKEY') or os.urandom(16).hex()
+
+    # Workers read these when lan_server is imported
+    os.environ['STATE_BACKEND'] = 'manager'
+    os.environ['STATE_MANAGER_ADDRESS'] = f"{state_address[0]}:{state_address[1]}"
+    os.environ['STATE_MANAGER_AUTHKEY'] = authkey
+
+    # Split the judge's cores between workers unless configured explicitly
+    judge_share = str(max(1, (os.cpu_count() or 1) // workers))
+    os.environ.setdefault('JUDGE_POOL_SIZE', judge_share)
+    os.environ.setdefault('JUDGE_THREADS', judge_share)
+
+    context = multiprocessing.get_context('fork')
+    state = context.Process(target=serve_state, args=(state_address, authkey.encode()),
+                            name="state-manager", daemon=True)
+    state.start()
+    wait_for_state(state_address, authkey.encode())
+
+    listener = socket.create_server((host, port), backlog=1024)
+    children = [context.Process(target=run_worker, args=(listener.fileno(), host, port), name=f"worker-{i}")
+                for i in range(workers)]
+    for child in children:
+        child.start()
+    print(f"LitCode cluster: {workers} workers on {host}:{port}, state manager on {state_address[1]}")
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(children, float(os.getenv('SHUTDOWN_TIMEOUT', '10')))
+        state.terminate()
+
+
+if __name__ == '__main__':
+    main()
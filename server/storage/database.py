@@ -0,0 +1,38 @@
+import os
+from typing import Dict, List, Optional
+
+from pymongo import MongoClient
+
+DEFAULT_DATABASE = 'litcodedb'
+
+# Environment variable -> MongoClient option; unset ones keep the driver's default
+CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+}
+
+
+def mongo_client_options() -> Dict:
+    """MongoClient keyword arguments from the MONGO_* environment variables."""
+    options = {
+        # Connect on first use, not at import (and not before run_cluster forks)
+        'connect': False,
+        'appname': os.getenv('MONGO_APP_NAME', 'litcode-server'),
+    }
+    for variable, option in CLIENT_OPTIONS.items():
+        value = os.getenv(variable)
+        if value:
+            options[option] = int(value)
+    return options
+
+
+def connect(event_listeners: Optional[List] = None):
+    """The server's database, on a client configured from the environment."""
+    client = MongoClient(os.getenv('MONGO_DB_KEY'), event_listeners=event_listeners or [],
+                         **mongo_client_options())
+    return client[os.getenv('MONGO_DB_NAME', DEFAULT_DATABASE)]
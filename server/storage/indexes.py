@@ -0,0 +1,102 @@
+"""The MongoDB indexes the server relies on, and a check that its hot queries use them.
+
+    python -m storage.indexes            # create the indexes
+    python -m storage.indexes --verify   # create them, then explain() every hot query
+
+--verify exits with status 1 if any hot query would scan its collection.
+It needs a real mongod (MONGO_DB_KEY); mongomock has no query planner.
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from monitoring.log import get_default_log
+from storage.database import connect
+
+log = get_default_log()
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    # Every user write and profile read is by clerkId
+    'users': [IndexModel([('clerkId', ASCENDING)], unique=True, name='clerkId_unique')],
+    'questions': [IndexModel([('type', ASCENDING)], name='type')],
+    # A player is either side of a match; history is newest first
+    'matches': [
+        IndexModel([('player1.id', ASCENDING), ('start_time', DESCENDING)], name='player1_start_time'),
+        IndexModel([('player2.id', ASCENDING), ('start_time', DESCENDING)], name='player2_start_time'),
+        IndexModel([('match_id', ASCENDING)], unique=True, name='match_id_unique')
+    ]
+}
+
+
+def player_matches_query(clerkId: str, before: Optional[datetime] = None) -> dict:
+    """Filter for a player's matches (sort by start_time descending to use the indexes)."""
+    sides = [{'player1.id': clerkId}, {'player2.id': clerkId}]
+    if before is not None:
+        sides = [dict(side, start_time={'$lt': before}) for side in sides]
+    return {'$or': sides}
+
+
+# (collection, description, filter, sort)
+HOT_QUERIES: List[Tuple[str, str, dict, list]] = [
+    ('users', 'user by clerkId', {'clerkId': 'explain'}, None),
+    ('questions', 'questions by type', {'type': 'array'}, None),
+    ('matches', 'match history by player', player_matches_query('explain'), [('start_time', DESCENDING)]),
+]
+
+
+def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create any missing index; existing ones are left alone. Returns the index names per collection."""
+    created = {}
+    for name, indexes in INDEXES.items():
+        try:
+            created[name] = db[name].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate clerkIds already stored; the server still runs, only slower
+            log.error('index_creation_failed', collection=name, error=str(e))
+    return created
+
+
+def plan_stages(plan) -> Set[str]:
+    """Every stage name in an explain() plan tree, whatever the server version nests it in."""
+    stages = set()
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.add(plan['stage'])
+        for value in plan.values():
+            stages |= plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages |= plan_stages(item)
+    return stages
+
+
+def verify_indexes(db) -> List[Tuple[str, bool, Set[str]]]:
+    """explain() every hot query; (description, uses an index, winning plan stages) for each."""
+    results = []
+    for collection, description, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages = plan_stages(cursor.explain()['queryPlanner']['winningPlan'])
+        results.append((description, 'COLLSCAN' not in stages and bool(stages & {'IXSCAN', 'EXPRESS_IXSCAN', 'IDHACK'}),
+                        stages))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verify', action='store_true', help="explain() the hot queries after creating indexes")
+    args = parser.parse_args()
+
+    database = connect()
+    for collection, names in ensure_indexes(database).items():
+        print(f"{collection}: {', '.join(names)}")
+    if args.verify:
+        results = verify_indexes(database)
+        for description, indexed, stages in results:
+            print(f"{'ok' if indexed else 'SCAN':>4}  {description}: {', '.join(sorted(stages))}")
+        sys.exit(0 if all(indexed for _, indexed, _ in results) else 1)
@@ -0,0 +1,75 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The statement fields players may see; everything else stays on the server
+PUBLIC_FIELDS = ('_id', 'title', 'description', 'type')
+DEFAULT_EXAMPLE_COUNT = 2
+
+
+def visible_examples(question: dict) -> List[dict]:
+    """The test cases shown to players: the first `exampleCount` (default 2)."""
+    count = question.get('exampleCount', DEFAULT_EXAMPLE_COUNT)
+    return [{'testId': test_case['testId'], 'input': test_case['input'], 'output': test_case['output']}
+            for test_case in question['testCases'][:count]]
+
+
+def public_question(question: dict) -> dict:
+    """The public statement of a question: no hidden tests, checkers or judge settings."""
+    public = {field: question[field] for field in PUBLIC_FIELDS if field in question}
+    public['testCases'] = visible_examples(question)
+    public['total_tests'] = len(question['testCases'])
+    return public
+
+
+class EncodedQuestion:
+    """A public question serialized once, with its content hash and pre-compressed bodies."""
+
+    def __init__(self, public: dict):
+        self.body = json.dumps(public, separators=(',', ':'), default=str).encode()
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.encodings: Dict[str, bytes] = {'gzip': gzip.compress(self.body, 6)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(self.body)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation: each encoding's bytes differ, so must their tags."""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+
+class PublicQuestionCache:
+    """Encoded public statements per question id, dropped when the question store reports a change."""
+
+    def __init__(self, question_store):
+        self.question_store = question_store
+        self._encoded: Dict[str, EncodedQuestion] = {}
+        self._lock = threading.Lock()
+        question_store.on_change(self.invalidate)
+
+    def get(self, question_id: str) -> Optional[EncodedQuestion]:
+        encoded = self._encoded.get(question_id)
+        if encoded is not None:
+            return encoded
+
+        question = self.question_store.get(question_id)
+        if question is None:
+            return None
+        encoded = EncodedQuestion(public_question(question))
+        with self._lock:
+            self._encoded[question_id] = encoded
+        return encoded
+
+    def etag(self, question_id: str) -> Optional[str]:
+        encoded = self.get(question_id)
+        return encoded.etag if encoded is not None else None
+
+    def invalidate(self, question_id: str):
+        with self._lock:
+            self._encoded.pop(question_id, None)
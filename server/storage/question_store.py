@@ -0,0 +1,195 @@
+import hashlib
+import random
+import threading
+from typing import Callable, Optional
+
+import bson
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from monitoring.log import get_default_log
+
+log = get_default_log()
+
+
+class _IndexedSet:
+    """List of ids with a position index: O(1) add, remove and uniform random choice."""
+
+    def __init__(self):
+        self._items = []
+        self._positions = {}
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def remove(self, item):
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last] = position
+
+    def choice(self):
+        return random.choice(self._items) if self._items else None
+
+    def __len__(self):
+        return len(self._items)
+
+
+class QuestionStore:
+    """In-memory question catalog indexed by _id and type, kept fresh from MongoDB.
+
+    Updates arrive through a change stream when the deployment supports one
+    (replica sets, Atlas) and otherwise through polling on `updatedAt`, or a
+    full rescan when documents carry none. Each question's content hash is
+    kept, so listeners only hear about questions that actually changed.
+    """
+
+    def __init__(self, collection, poll_interval: float = 30.0):
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self._by_id = {}
+        self._hashes = {}
+        self._by_type = {}
+        self._all = _IndexedSet()
+        self._lock = threading.Lock()
+        self._last_updated = None
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    def on_change(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the id of every question that changes."""
+        self._listeners.append(listener)
+
+    def load(self) -> list:
+        """Load the full catalog and drop questions that are gone; returns the ids that changed."""
+        documents = list(self.collection.find({}))
+        with self._lock:
+            changed = [str(document['_id']) for document in documents if self._index(document)]
+        for question_id in changed:
+            self._notify(question_id)
+        return changed + self._drop_missing({str(document['_id']) for document in documents})
+
+    def _drop_missing(self, present_ids: set) -> list:
+        """Unindex every question not in `present_ids`; returns their ids."""
+        with self._lock:
+            stale_ids = [question_id for question_id in self._by_id if question_id not in present_ids]
+            for question_id in stale_ids:
+                self._unindex(question_id)
+        for question_id in stale_ids:
+            self._notify(question_id)
+        return stale_ids
+
+    def _index(self, document: dict) -> bool:
+        """Index a document; returns False (and changes nothing) when its content is unchanged."""
+        content_hash = hashlib.blake2b(bson.encode(document), digest_size=16).digest()
+        question = dict(document)
+        question['_id'] = str(question['_id'])
+        question_id = question['_id']
+        if self._hashes.get(question_id) == content_hash:
+            return False
+
+        self._unindex(question_id)
+        self._hashes[question_id] = content_hash
+        self._by_id[question_id] = question
+        self._by_type.setdefault(question.get('type', ''), _IndexedSet()).add(question_id)
+        self._all.add(question_id)
+
+        updated = question.get('updatedAt')
+        if updated is not None and (self._last_updated is None or updated > self._last_updated):
+            self._last_updated = updated
+        return True
+
+    def _unindex(self, question_id: str):
+        self._hashes.pop(question_id, None)
+        question = self._by_id.pop(question_id, None)
+        if question is not None:
+            self._by_type[question.get('type', '')].remove(question_id)
+            self._all.remove(question_id)
+
+    def _notify(self, question_id: str):
+        for listener in self._listeners:
+            listener(question_id)
+
+    def upsert(self, document: dict):
+        with self._lock:
+            changed = self._index(document)
+        if changed:
+            self._notify(str(document['_id']))
+
+    def remove(self, question_id: str):
+        with self._lock:
+            self._unindex(question_id)
+        self._notify(question_id)
+
+    def get(self, question_id: str) -> Optional[dict]:
+        """Return a question by id, falling back to MongoDB for questions not indexed yet."""
+        question = self._by_id.get(question_id)
+        if question is not None:
+            return question
+
+        document = self.collection.find_one({'_id': ObjectId(question_id)})
+        if document is None:
+            return None
+        self.upsert(document)
+        return self._by_id.get(question_id)
+
+    def random(self, algorithm_type: str) -> dict:
+        """Pick a uniformly random question of a type ('random' picks from every type)."""
+        with self._lock:
+            ids = self._all if algorithm_type == 'random' else self._by_type.get(algorithm_type)
+            question_id = ids.choice() if ids is not None else None
+            if question_id is None:
+                raise ValueError(f"No questions available for type '{algorithm_type}'")
+            return self._by_id[question_id]
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def start(self):
+        """Load the catalog and keep it refreshed from a background thread."""
+        self.load()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        try:
+            self._watch()
+        except Exception as e:
+            # Standalone servers (and mongomock) don't support change streams
+            log.warning('question_change_stream_unavailable', error=str(e), poll_interval=self.poll_interval)
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except PyMongoError as e:
+                log.error('question_refresh_failed', error=str(e))
+
+    def _watch(self):
+        with self.collection.watch(full_document='updateLookup') as stream:
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                question_id = str(change['documentKey']['_id'])
+                if change['operationType'] == 'delete':
+                    self.remove(question_id)
+                elif change.get('fullDocument') is not None:
+                    self.upsert(change['fullDocument'])
+
+    def poll(self):
+        """Pick up changes since the last poll; rescans fully when documents carry no `updatedAt`."""
+        if self._last_updated is None:
+            self.load()
+            return
+        for document in self.collection.find({'updatedAt': {'$gt': self._last_updated}}):
+            self.upsert(document)
+        # Deletions leave no updatedAt behind; the ids alone show them
+        self._drop_missing({str(document['_id']) for document in self.collection.find({}, {'_id': True})})
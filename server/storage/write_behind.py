@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from monitoring.log import get_default_log
+
+log = get_default_log()
+
+DUPLICATE_KEY = 11000
+
+
+def _add_increments(total: Dict[str, float], increments: Optional[Dict[str, float]]):
+    for field, amount in (increments or {}).items():
+        total[field] = total.get(field, 0) + amount
+
+
+def _update_document(fields: dict, increments: dict) -> dict:
+    update = {}
+    if fields:
+        update['$set'] = fields
+    if increments:
+        update['$inc'] = increments
+    return update
+
+
+def _failed_indexes(error: Exception) -> Optional[set]:
+    """Positions of the operations a bulk write rejected; None when it is unknown which got through."""
+    if not isinstance(error, BulkWriteError):
+        return None
+    details = error.details or {}
+    if details.get('writeConcernErrors'):
+        return None
+    return {e['index'] for e in details.get('writeErrors', [])}
+
+
+def _only_duplicates(error: Exception) -> bool:
+    """True when a retried insert_many failed only on documents that already made it in."""
+    if not isinstance(error, BulkWriteError):
+        return False
+    details = error.details or {}
+    return (not details.get('writeConcernErrors')
+            and all(e.get('code') == DUPLICATE_KEY for e in details.get('writeErrors', [])))
+
+
+class WriteBehindBuffer:
+    """Buffers MongoDB writes off the event-handler threads and flushes them in bulk.
+
+    Upserts to the same document collapse into one `$set` (later fields win)
+    plus one `$inc` (increments add up), and inserts are batched into
+    insert_many. A background thread flushes once
+    `max_batch` writes are pending or every `flush_interval` seconds, and
+    stop() flushes whatever is left. Failed flushes are re-queued.
+    """
+
+    def __init__(self, max_batch: int = 500, flush_interval: float = 1.0):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._collections = {}
+        # collection name -> OrderedDict(key -> (filter, $set fields, $inc fields))
+        self._upserts: Dict[str, OrderedDict] = {}
+        # collection name -> documents
+        self._inserts: Dict[str, List[dict]] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.flushes = 0
+        self.flushed_writes = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def upsert(self, collection, key_field: str, key: Any, fields: Dict[str, Any],
+               increments: Optional[Dict[str, float]] = None):
+        """Queue `update_one({key_field: key}, {'$set': fields, '$inc': increments}, upsert=True)`."""
+        with self._lock:
+            self._collections[collection.name] = collection
+            pending = self._upserts.setdefault(collection.name, OrderedDict())
+            if key in pending:
+                pending[key][1].update(fields)
+                _add_increments(pending[key][2], increments)
+            else:
+                pending[key] = ({key_field: key}, dict(fields), dict(increments or {}))
+                self._pending += 1
+            self._maybe_wake()
+
+    def insert(self, collection, document: dict):
+        with self._lock:
+            self._collections[collection.name] = collection
+            self._inserts.setdefault(collection.name, []).append(document)
+            self._pending += 1
+            self._maybe_wake()
+
+    def _maybe_wake(self):
+        if self._pending >= self.max_batch:
+            self._wakeup.set()
+
+    def depth(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending_writes': self._pending,
+            'flushes': self.flushes,
+            'flushed_writes': self.flushed_writes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_ms': self.last_flush_ms,
+            'max_flush_ms': self.max_flush_ms
+        }
+
+    def flush(self):
+        """Write everything pending now; failed batches are put back for the next flush."""
+        with self._flush_lock:
+            with self._lock:
+                upserts, self._upserts = self._upserts, {}
+                inserts, self._inserts = self._inserts, {}
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return
+
+            start = time.perf_counter()
+            failed = False
+            for name, updates in upserts.items():
+                operations = [UpdateOne(query, _update_document(fields, increments), upsert=True)
+                              for query, fields, increments in updates.values()]
+                try:
+                    self._collections[name].bulk_write(operations, ordered=False)
+                except Exception as e:
+                    log.error('write_behind_flush_failed', operation='upsert', collection=name,
+                              count=len(operations), error=str(e))
+                    # Only retry what was rejected, or increments would be applied twice
+                    rejected = _failed_indexes(e)
+                    if rejected is not None:
+                        updates = OrderedDict(item for index, item in enumerate(updates.items()) if index in rejected)
+                    self._requeue_upserts(name, updates)
+                    failed = True
+
+            for name, documents in inserts.items():
+                try:
+                    self._collections[name].insert_many(documents, ordered=False)
+                except Exception as e:
+                    if _only_duplicates(e):
+                        continue
+                    log.error('write_behind_flush_failed', operation='insert', collection=name,
+                              count=len(documents), error=str(e))
+                    self._requeue_inserts(name, documents)
+                    failed = True
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            if failed:
+                self.failed_flushes += 1
+            else:
+                self.flushed_writes += pending
+
+    def _requeue_upserts(self, name: str, updates: OrderedDict):
+        with self._lock:
+            pending = self._upserts.setdefault(name, OrderedDict())
+            for key, (query, fields, increments) in updates.items():
+                if key in pending:
+                    # Fields written since the failed flush are newer; increments add up
+                    merged = dict(fields)
+                    merged.update(pending[key][1])
+                    _add_increments(increments, pending[key][2])
+                    pending[key] = (query, merged, increments)
+                else:
+                    pending[key] = (query, fields, increments)
+                    self._pending += 1
+
+    def _requeue_inserts(self, name: str, documents: List[dict]):
+        with self._lock:
+            self._inserts[name] = documents + self._inserts.get(name, [])
+            self._pending += len(documents)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write out everything still buffered."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error('write_behind_flush_failed', error=str(e))
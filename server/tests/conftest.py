@@ -0,0 +1,58 @@
+import os
+import sys
+
+import mongomock
+import pymongo
+import pytest
+from bson import ObjectId
+
+# The server's modules import each other from the server directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests run on mongomock; patched before storage.database binds MongoClient
+pymongo.MongoClient = mongomock.MongoClient
+
+
+@pytest.fixture(scope='session')
+def server():
+    """lan_server on mongomock, with its background services not started."""
+    import lan_server
+    return lan_server
+
+
+@pytest.fixture
+def admin(server, monkeypatch):
+    monkeypatch.setattr(server, 'ADMIN_TOKEN', 'secret')
+    return {'Authorization': 'Bearer secret'}
+
+
+@pytest.fixture
+def emitted(server, monkeypatch):
+    """Every realtime emit as (event, data, to, skip_sid)."""
+    events = []
+    monkeypatch.setattr(server.realtime, 'emit',
+                        lambda event, data, to=None, skip_sid=None: events.append((event, data, to, skip_sid)))
+    return events
+
+
+@pytest.fixture
+def live_match(server, monkeypatch):
+    """A running match on a stored question between p1 (connected as sid-1) and p2 (sid-2)."""
+    from game.match import Match
+
+    monkeypatch.setattr(server.realtime, 'enter_room', lambda sid, room: None)
+    question = {'_id': ObjectId(), 'type': 'array', 'title': 'Sum',
+                'testCases': [{'testId': str(i), 'input': f'[{i}]', 'output': str(i)} for i in range(4)]}
+    server.question_store.upsert(question)
+    match = Match('p1', 'p2', server.question_store.get(str(question['_id'])), 'array')
+    server.game_state.add_match(match)
+    players = (('p1', 'sid-1'), ('p2', 'sid-2'))
+    for clerkId, sid in players:
+        server.connections.bind(sid, clerkId)
+        server.game_state.connect_player(clerkId, sid)
+    yield match
+    server.game_state.finish_match(match.match_id)
+    for clerkId, sid in players:
+        server.connections.unbind(sid)
+        server.game_state.disconnect_player(clerkId, sid)
+    server.question_store.remove(str(question['_id']))
@@ -0,0 +1,62 @@
+import pytest
+
+from executor.code_executor import CodeExecutor, clamp_parallelism
+from executor.compiled_tests import CompiledTestCache
+from executor.result_cache import SubmissionResultCache
+from executor.worker_pool import WorkerPool
+
+MISSING_NUMBER = """
+def findMissingNumber(nums):
+    n = len(nums) + 1
+    return n * (n + 1) // 2 - sum(nums)
+"""
+
+TESTS = [{'testId': str(i), 'input': f'[{", ".join(str(n) for n in range(1, 6) if n != i)}]', 'output': str(i)}
+         for i in range(1, 6)]
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = WorkerPool(2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def executor(pool):
+    return CodeExecutor(pool=pool, test_cache=CompiledTestCache(), result_cache=SubmissionResultCache())
+
+
+@pytest.mark.parametrize('setting, expected', [
+    (1, 1), (3, 3), (64, 4), ('2', 2), (0, 1), (-5, 1), ('many', 1), (None, 1), (2.7, 2)
+])
+def test_clamp_parallelism(setting, expected):
+    assert clamp_parallelism(setting, 4) == expected
+
+
+@pytest.mark.parametrize('parallelism', [1, 2, '2', 0, -1, 'x', None, 100])
+def test_sharded_results_keep_test_order_whatever_the_setting(executor, parallelism):
+    results = executor.execute_code(MISSING_NUMBER, TESTS, parallelism)
+    assert results['passed'] == 5
+    assert [result['test_id'] for result in results['test_results']] == ['1', '2', '3', '4', '5']
+
+
+def test_fail_fast_stops_at_the_first_failure(executor):
+    wrong = "def f(nums):\n    return 1\n"
+    results = executor.execute_code(wrong, TESTS, 2, fail_fast=True)
+    assert results['passed'] == 1
+    assert len(results['test_results']) == 2
+
+
+def test_memory_limit_fails_only_the_test_that_exceeds_it(executor):
+    code = "def f(n):\n    return len(bytearray(n[0] * 1024 * 1024))\n"
+    tests = [{'testId': '1', 'input': '[1]', 'output': str(1024 * 1024)},
+             {'testId': '2', 'input': '[512]', 'output': '0'}]
+    results = executor.execute_code(code, tests, memory_limit_mb=64)
+    first, second = results['test_results']
+    assert first['passed'] and first['error'] is None
+    assert second['error'] == "Memory limit exceeded"
+    assert first['cpu_ms'] >= 0 and first['peak_rss_kb'] > 0
+
+    # The limit is lifted again afterwards: the worker can still allocate
+    assert executor.execute_code(code, tests[:1])['passed'] == 1
@@ -0,0 +1,78 @@
+import pytest
+
+from executor.code_executor import CodeExecutor
+from executor.comparators import (CustomComparator, ExactComparator, FloatComparator, MultisetComparator,
+                                  UnorderedComparator, create_comparator, get_comparator)
+from executor.compiled_tests import CompiledTestCache
+from executor.utils.tree_utils import build_tree
+
+
+def check(spec, expected, actual):
+    comparator = create_comparator(spec)
+    return comparator.matches(comparator.prepare(expected), actual)
+
+
+@pytest.mark.parametrize('spec, expected, actual, matches', [
+    (None, [1, 2, 3], [1, 2, 3], True),
+    (None, [1, 2, 3], [3, 2, 1], False),
+    (None, 1, True, True),
+    (None, [1, 2, None, 3], build_tree([1, 2, None, 3, None, None]), True),
+    (None, [1, 2], build_tree([1, 3]), False),
+    ('unordered', [1, 2, 3], [3, 1, 2], True),
+    ('unordered', [1, 2, 2], [2, 1], True),
+    ('unordered', [[1, 2], [3]], [[3], [1, 2]], True),
+    ('unordered', [[1, 2], [3]], [[3], [2, 1]], False),
+    ({'type': 'unordered', 'deep': True}, [[1, 2], [3]], [[3], [2, 1]], True),
+    ('unordered', [1, 2], 'not a list', False),
+    ('multiset', [1, 2, 2], [2, 1, 2], True),
+    ('multiset', [1, 2, 2], [2, 1], False),
+    ({'type': 'multiset', 'deep': True}, [[1, 1], [2]], [[2], [1, 1]], True),
+    ({'type': 'multiset', 'deep': True}, [[1, 1], [2]], [[2], [1]], False),
+    ('float', [0.3, {'x': 1.0}], [0.1 + 0.2, {'x': 1}], True),
+    ({'type': 'float', 'abs_tol': 1e-3}, 2.0, 2.0005, True),
+    ('float', 2.0, 2.1, False),
+    ('float', 1, True, False),
+    ('float', [1.0, 2.0], [1.0], False),
+])
+def test_comparators(spec, expected, actual, matches):
+    assert check(spec, expected, actual) is matches
+
+
+def test_custom_checker_runs_question_code():
+    comparator = create_comparator({'type': 'custom', 'code': 'def check(expected, actual):\n'
+                                                             '    return sum(actual) == expected\n'})
+    assert isinstance(comparator, CustomComparator)
+    assert comparator.matches(6, [1, 2, 3]) and not comparator.matches(6, [1, 2])
+
+
+@pytest.mark.parametrize('spec, error', [
+    ({'type': 'custom'}, ValueError),
+    ({'type': 'custom', 'code': 'def check(:'}, SyntaxError),
+    ({'type': 'fuzzy'}, ValueError),
+])
+def test_bad_specs_are_rejected(spec, error):
+    with pytest.raises(error):
+        create_comparator(spec)
+
+
+def test_custom_checker_without_check_fails_on_use():
+    comparator = create_comparator({'type': 'custom', 'code': 'x = 1'})
+    with pytest.raises(ValueError):
+        comparator.matches(1, 1)
+
+
+def test_specs_build_the_right_comparator_once():
+    assert isinstance(create_comparator('exact'), ExactComparator)
+    assert isinstance(create_comparator('multiset'), MultisetComparator)
+    assert isinstance(create_comparator({'type': 'unordered'}), UnorderedComparator)
+    assert isinstance(create_comparator('float'), FloatComparator)
+    assert get_comparator({'type': 'float', 'abs_tol': 0.1}) is get_comparator({'abs_tol': 0.1, 'type': 'float'})
+
+
+def test_compiled_tests_use_the_questions_comparator():
+    executor = CodeExecutor(test_cache=CompiledTestCache())
+    compiled = executor.compile_test_case({'testId': '1', 'input': '[]', 'output': '[3, 1, 2]'}, 'unordered')
+    assert executor.compare_decoded(compiled['expected'], [1, 2, 3], get_comparator('unordered'))
+    assert not executor.compare_decoded(compiled['expected'], [1, 2], get_comparator('unordered'))
+    # Non-JSON expected output falls back to comparing text
+    assert executor.compare_outputs('hello world', ' hello world\n')
@@ -0,0 +1,65 @@
+import pickle
+
+from executor.code_executor import CodeExecutor
+from executor.compiled_tests import CompiledTestCache
+
+TESTS = [{'testId': '1', 'input': '[1, 2]', 'output': '3'}, {'testId': '2', 'input': '[5]', 'output': '5'}]
+
+
+def test_least_recently_used_question_is_evicted_first():
+    cache = CompiledTestCache(max_bytes=30)
+    cache.put('a', [b'x' * 10])
+    cache.put('b', [b'x' * 10])
+    cache.put('c', [b'x' * 10])
+    assert cache.get('a') is not None
+    cache.put('d', [b'x' * 10])
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None and cache.get('d') is not None
+    assert cache.current_bytes == 30
+
+
+def test_oversized_entries_are_not_kept():
+    cache = CompiledTestCache(max_bytes=10)
+    cache.put('a', [b'x' * 4])
+    cache.put('big', [b'x' * 6, b'x' * 6])
+    assert cache.get('big') is None
+    assert cache.get('a') is not None
+    assert cache.current_bytes == 4
+
+
+def test_replacing_and_invalidating_keep_the_byte_count_right():
+    cache = CompiledTestCache()
+    cache.put('a', [b'x' * 10])
+    cache.put('a', [b'x' * 3])
+    assert cache.current_bytes == 3
+    cache.invalidate('a')
+    cache.invalidate('missing')
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_compile_test_cases_reuses_the_cache_per_question():
+    cache = CompiledTestCache()
+    executor = CodeExecutor(test_cache=cache)
+    compiled = executor.compile_test_cases(TESTS, question_id='q1')
+    assert executor.compile_test_cases([], question_id='q1') is compiled
+    assert cache.hits == 1
+
+    # Without a question id nothing is cached
+    executor.compile_test_cases(TESTS)
+    assert len(cache) == 1
+
+    first = pickle.loads(compiled[0])
+    assert first['input'] == [1, 2] and first['expected'] == (True, 3) and first['error'] is None
+
+
+def test_invalid_test_input_is_compiled_into_an_error():
+    compiled = CodeExecutor(test_cache=CompiledTestCache()).compile_test_cases(
+        [{'testId': '1', 'input': '[1,', 'output': '1'}])
+    assert pickle.loads(compiled[0])['error'].startswith('Invalid input format')
+
+
+def test_question_changes_invalidate_the_compiled_tests(server):
+    cache = server.get_default_cache()
+    cache.put('changed-question', [b'x'])
+    server.question_store._notify('changed-question')
+    assert cache.get('changed-question') is None
@@ -0,0 +1,77 @@
+import math
+
+import pytest
+
+from executor.complexity import DEFAULT_SIZES, fit_complexity, generate_input, grade, validate_spec
+
+
+def timings(model, sizes=DEFAULT_SIZES, noise=0.0):
+    # Deterministic +-noise jitter on top of a fixed overhead
+    return [{'n': n, 'ms': 0.05 + model(n) * (1 + (noise if i % 2 else -noise))} for i, n in enumerate(sizes)]
+
+
+@pytest.mark.parametrize('spec, message', [
+    ({'generator': 'matrix'}, 'Unknown input generator'),
+    ({'generator': 'array', 'args': {'k': 3}}, "needs a 'param'"),
+    ({'generator': 'array', 'enforce': True}, "needs an 'expected'"),
+    ({'generator': 'array', 'expected': 'O(2^n)'}, 'Unknown complexity class'),
+    ({'generator': 'array', 'sizes': [10, 20]}, 'at least 3 input sizes'),
+])
+def test_specs_the_judge_cannot_run_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        validate_spec(spec)
+
+
+def test_generated_inputs_are_reproducible_and_keyed_by_param():
+    spec = {'generator': 'array', 'param': 'nums', 'args': {'k': 3}, 'low': 0, 'high': 9}
+    args, kwargs = generate_input(spec, 50, seed=1)
+    assert args == () and kwargs['k'] == 3 and len(kwargs['nums']) == 50
+    assert all(0 <= value <= 9 for value in kwargs['nums'])
+    assert generate_input(spec, 50, seed=1) == (args, kwargs)
+    assert generate_input(spec, 50, seed=2) != (args, kwargs)
+
+    (permutation,), _ = generate_input({'generator': 'permutation'}, 20)
+    assert sorted(permutation) == list(range(20))
+    (graph,), _ = generate_input({'generator': 'graph'}, 30)
+    assert len(graph) == 30
+
+
+@pytest.mark.parametrize('model, expected', [
+    (lambda n: 0.01, 'O(1)'),
+    (lambda n: n / 1000, 'O(n)'),
+    (lambda n: n * n / 100_000, 'O(n^2)'),
+])
+def test_fit_picks_the_growth_class_of_the_timings(model, expected):
+    measured = timings(model, noise=0.03)
+    fit = fit_complexity([t['n'] for t in measured], [t['ms'] for t in measured])
+    assert fit['class'] == expected
+
+
+def test_neighbouring_classes_err_towards_the_faster_one():
+    # Over these sizes n log n is nearly linear; the fit gives the benefit of the doubt
+    measured = timings(lambda n: n * math.log2(n) / 1000, noise=0.03)
+    fit = fit_complexity([t['n'] for t in measured], [t['ms'] for t in measured])
+    assert fit['class'] in ('O(n)', 'O(n log n)')
+    assert grade({'generator': 'array', 'expected': 'O(n log n)'}, measured, None)['passed'] is True
+
+
+def test_grade_compares_against_the_expected_class():
+    spec = {'generator': 'array', 'expected': 'O(n log n)', 'enforce': True}
+    report = grade(spec, timings(lambda n: n / 1000), None)
+    assert report['class'] == 'O(n)' and report['passed'] is True and report['enforced']
+
+    report = grade(spec, timings(lambda n: n * n / 100_000), None)
+    assert report['class'] == 'O(n^2)' and report['passed'] is False
+
+
+def test_grade_fails_aborted_and_short_sweeps():
+    spec = {'generator': 'array', 'expected': 'O(n^2)'}
+    aborted = grade(spec, timings(lambda n: n / 1000, DEFAULT_SIZES[:3]), 8_000)
+    assert aborted['error'] == "Time budget exceeded at n=8000" and aborted['passed'] is False
+
+    short = grade(spec, timings(lambda n: n / 1000, DEFAULT_SIZES[:2]), None)
+    assert short['class'] is None and short['passed'] is False
+    assert short['error'] == "Not enough measurements to fit a growth curve"
+
+    # Without an expected class there is nothing to pass or fail
+    assert grade({'generator': 'array'}, timings(lambda n: n), None)['passed'] is None
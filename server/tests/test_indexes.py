@@ -0,0 +1,102 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from pymongo.errors import PyMongoError
+from pymongo.mongo_client import MongoClient
+
+from storage.indexes import (HOT_QUERIES, INDEXES, ensure_indexes, plan_stages, player_matches_query,
+                             verify_indexes)
+
+
+def index_keys(db, collection):
+    return {name: (list(info['key']), info.get('unique', False))
+            for name, info in db[collection].index_information().items()}
+
+
+def filter_fields(query: dict) -> set:
+    if '$or' in query:
+        return set.union(*(filter_fields(branch) for branch in query['$or']))
+    return set(query)
+
+
+def test_every_hot_query_leads_with_an_indexed_field():
+    for collection, description, query, _ in HOT_QUERIES:
+        leading = {next(iter(index.document['key'])) for index in INDEXES[collection]}
+        assert filter_fields(query) & leading, description
+
+
+def test_ensure_indexes_creates_the_specs_and_is_idempotent():
+    db = mongomock.MongoClient().db
+    created = ensure_indexes(db)
+    assert created == {name: [index.document['name'] for index in indexes] for name, indexes in INDEXES.items()}
+
+    before = {collection: index_keys(db, collection) for collection in INDEXES}
+    assert before['users']['clerkId_unique'] == ([('clerkId', 1)], True)
+    assert before['matches']['player1_start_time'] == ([('player1.id', 1), ('start_time', -1)], False)
+
+    ensure_indexes(db)
+    assert {collection: index_keys(db, collection) for collection in INDEXES} == before
+
+
+def test_ensure_indexes_survives_data_that_breaks_a_unique_index():
+    db = mongomock.MongoClient().db
+    db.users.insert_many([{'clerkId': 'a'}, {'clerkId': 'a'}])
+    created = ensure_indexes(db)
+    assert 'users' not in created
+    assert 'match_id_unique' in db.matches.index_information()
+
+
+def test_player_matches_query_finds_both_sides_newest_first():
+    db = mongomock.MongoClient().db
+    db.matches.insert_many([
+        {'match_id': '1', 'player1': {'id': 'a'}, 'player2': {'id': 'b'}, 'start_time': 1},
+        {'match_id': '2', 'player1': {'id': 'c'}, 'player2': {'id': 'a'}, 'start_time': 2},
+        {'match_id': '3', 'player1': {'id': 'b'}, 'player2': {'id': 'c'}, 'start_time': 3},
+    ])
+    found = db.matches.find(player_matches_query('a')).sort('start_time', -1)
+    assert [match['match_id'] for match in found] == ['2', '1']
+    assert [match['match_id'] for match in db.matches.find(player_matches_query('a', before=2))] == ['1']
+
+
+def test_plan_stages_reads_nested_winning_plans():
+    plan = {'stage': 'SUBPLAN', 'inputStage': {'stage': 'OR', 'inputStages': [
+        {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}, {'stage': 'IXSCAN'}]}}
+    assert plan_stages(plan) == {'SUBPLAN', 'OR', 'FETCH', 'IXSCAN'}
+
+
+@pytest.fixture
+def mongo_db():
+    """A scratch database on the real server at MONGO_URI (conftest only swaps pymongo.MongoClient)."""
+    uri = os.getenv('MONGO_URI')
+    if not uri:
+        pytest.skip('MONGO_URI is not set')
+    client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+    except PyMongoError:
+        client.close()
+        pytest.skip('no MongoDB server reachable at MONGO_URI')
+    name = f'litcode_index_test_{uuid.uuid4().hex[:8]}'
+    yield client[name]
+    client.drop_database(name)
+    client.close()
+
+
+def test_hot_queries_use_indexes_on_a_real_server(mongo_db):
+    start = datetime(2024, 1, 1)
+    mongo_db.users.insert_many([{'clerkId': f'user-{i}', 'rating': 1200} for i in range(200)])
+    mongo_db.questions.insert_many([{'type': ('array', 'tree', 'graph')[i % 3], 'testCases': []} for i in range(60)])
+    mongo_db.matches.insert_many([{'match_id': str(i), 'player1': {'id': f'user-{i % 50}'},
+                                   'player2': {'id': f'user-{(i + 1) % 50}'}, 'start_time': start + timedelta(i)}
+                                  for i in range(500)])
+    ensure_indexes(mongo_db)
+
+    results = verify_indexes(mongo_db)
+    assert [description for description, _, _ in results] == [description for _, description, _, _ in HOT_QUERIES]
+    for description, indexed, stages in results:
+        assert 'COLLSCAN' not in stages, description
+        assert stages & {'IXSCAN', 'EXPRESS_IXSCAN'}, description
+        assert indexed, description
@@ -0,0 +1,33 @@
+from judge.stats import JudgeStats
+
+
+def judged(test_id, cpu_ms=1.0, error=None, peak_rss_kb=1000):
+    return {'test_id': test_id, 'passed': error is None, 'error': error,
+            'wall_ms': cpu_ms * 2, 'cpu_ms': cpu_ms, 'peak_rss_kb': peak_rss_kb}
+
+
+def test_costs_are_aggregated_per_question():
+    stats = JudgeStats()
+    stats.record('q', [judged('1', 1.0), judged('2', 9.0, peak_rss_kb=5000)])
+    stats.record('q', [judged('1', 3.0), judged('2', 11.0)])
+    stats.record('other', [judged('1')])
+
+    cost = stats.question('q')
+    assert (cost['submissions'], cost['tests_run']) == (2, 4)
+    assert cost['cpu_ms_total'] == 24.0 and cost['wall_ms_total'] == 48.0
+    assert cost['cpu_ms_per_submission'] == 12.0
+    assert cost['max_peak_rss_kb'] == 5000
+    assert cost['slowest_tests'][0] == {'test_id': '2', 'runs': 2, 'mean_cpu_ms': 10.0, 'max_cpu_ms': 11.0}
+    assert cost['slowest_tests'][1]['test_id'] == '1'
+    assert set(stats.snapshot()) == {'q', 'other'}
+    assert stats.question('unknown') == {}
+
+
+def test_limit_failures_are_counted_and_unmeasured_tests_skipped():
+    stats = JudgeStats()
+    timed_out = dict(judged('1', error="Execution timed out"), cpu_ms=None, peak_rss_kb=None)
+    stats.record('q', [timed_out, judged('2', error="Memory limit exceeded")])
+
+    cost = stats.question('q')
+    assert (cost['timeouts'], cost['memory_limit_failures']) == (1, 1)
+    assert [test['test_id'] for test in cost['slowest_tests']] == ['2']
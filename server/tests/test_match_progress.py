@@ -0,0 +1,27 @@
+from game.match import Match
+
+QUESTION = {'_id': 'q', 'testCases': [{'input': '1', 'output': '1'}] * 4}
+
+
+def test_progress_is_coalesced_into_both_event_shapes(server, emitted):
+    match = Match('p1', 'p2', QUESTION, 'array')
+    server.game_state.add_match(match)
+    server.game_state.connect_player('p1', 'sid-1')
+    server.game_state.connect_player('p2', 'sid-2')
+    try:
+        server.update_match_progress(match.match_id, 'p1', 1)
+        server.update_match_progress(match.match_id, 'p1', 3)
+        server.progress_broadcaster.flush()
+    finally:
+        server.game_state.finish_match(match.match_id)
+        server.game_state.disconnect_player('p1', 'sid-1')
+        server.game_state.disconnect_player('p2', 'sid-2')
+
+    assert emitted[0] == ('match_progress', {'match_id': match.match_id, 'players': {
+        'p1': {'tests_passed': 3, 'total_tests': 4}, 'p2': {'tests_passed': 0, 'total_tests': 4}
+    }}, match.match_id, None)
+    # Each player's progress reaches the room except that player
+    assert sorted(emitted[1:], key=lambda event: event[3]) == [
+        ('opponent_progress', {'tests_passed': 3, 'total_tests': 4}, match.match_id, 'sid-1'),
+        ('opponent_progress', {'tests_passed': 0, 'total_tests': 4}, match.match_id, 'sid-2'),
+    ]
@@ -0,0 +1,40 @@
+def ended(emitted):
+    return [data for event, data, _, _ in emitted if event == 'match_ended']
+
+
+def test_client_reported_results_are_ignored(server, emitted, live_match):
+    server.on_submit_result('sid-1', {'match_id': live_match.match_id, 'clerkId': 'p1', 'tests_passed': 4})
+    assert server.game_state.get_player_progress(live_match.match_id, 'p1') == 0
+    assert [event for event, *_ in emitted] == ['error']
+
+
+def test_the_better_score_wins_and_moves_ratings(server, emitted, live_match):
+    server.update_match_progress(live_match.match_id, 'p2', 3)
+    before = server.leaderboard.rating('p2')
+    server.end_match(live_match.match_id)
+
+    result, = ended(emitted)
+    assert result['winner_id'] == 'p2'
+    assert result['rating_changes']['p2']['new'] > before
+    # Only the first caller ends a match
+    server.end_match(live_match.match_id)
+    assert len(ended(emitted)) == 1
+
+
+def test_a_match_without_tests_ends_in_a_draw(server, emitted, live_match):
+    live_match.player1['total_tests'] = live_match.player2['total_tests'] = 0
+    server.end_match(live_match.match_id)
+    assert ended(emitted)[0]['winner_id'] is None
+
+
+def test_a_scoring_failure_still_ends_and_records_the_match(server, emitted, live_match, monkeypatch):
+    def fail(match, winner_id):
+        raise RuntimeError('leaderboard unavailable')
+
+    monkeypatch.setattr(server, 'record_match_result', fail)
+    pending = server.write_behind.depth()
+    server.end_match(live_match.match_id)
+
+    assert ended(emitted)[0]['rating_changes'] == {}
+    assert server.write_behind.depth() == pending + 1
+    assert server.game_state.get_match(live_match.match_id) is None
@@ -0,0 +1,57 @@
+from game.match import Match
+from game.timers import MatchTimerScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_extended_timer_fires_at_the_new_deadline():
+    clock = FakeClock()
+    expired = []
+    timers = MatchTimerScheduler(expired.append, clock=clock)
+    timers.schedule('m', 60)
+    assert timers.extend('m', 30) == 90
+    clock.now = 60
+    assert timers.timers.pop_due(clock()) == []
+    clock.now = 90
+    assert timers.timers.pop_due(clock()) == ['m']
+    assert timers.extend('m', 30) is None
+
+
+def start_match(server):
+    question = {'_id': 'q', 'testCases': [{'input': '1', 'output': '1'}]}
+    match = Match('p1', 'p2', question, 'array', duration=60)
+    server.game_state.add_match(match)
+    server.start_match_timer(match.match_id, 60)
+    return match
+
+
+def test_extend_route_extends_the_match_and_tells_the_room(server, admin, monkeypatch):
+    emitted = []
+    monkeypatch.setattr(server.realtime, 'emit',
+                        lambda event, data, to=None, skip_sid=None: emitted.append((event, to)))
+    match = start_match(server)
+    http = server.app.test_client()
+
+    response = http.post(f'/matches/{match.match_id}/extend?seconds=120', headers=admin)
+
+    assert response.status_code == 200
+    assert 175 < response.json['time_remaining'] <= 180
+    assert server.game_state.get_match(match.match_id).duration == 180
+    assert emitted == [('match_extended', match.match_id)]
+    server.match_timers.cancel(match.match_id)
+
+
+def test_extend_route_rejects_bad_requests(server, admin):
+    match = start_match(server)
+    http = server.app.test_client()
+
+    assert http.post(f'/matches/{match.match_id}/extend?seconds=120').status_code == 404
+    assert http.post(f'/matches/{match.match_id}/extend?seconds=-5', headers=admin).status_code == 400
+    assert http.post('/matches/unknown/extend?seconds=10', headers=admin).status_code == 404
+    server.match_timers.cancel(match.match_id)
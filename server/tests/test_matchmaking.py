@@ -0,0 +1,68 @@
+from game.matchmaking import MatchmakingEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def player(sid: str, rating: float) -> dict:
+    return {'sid': sid, 'clerkId': sid, 'player_name': sid, 'rating': rating}
+
+
+def make_engine():
+    clock = FakeClock()
+    return clock, MatchmakingEngine(base_window=100, widen_per_second=10, max_window=1000, clock=clock)
+
+
+def test_players_pair_once_their_window_covers_the_gap():
+    clock, engine = make_engine()
+    engine.add(player('a', 1000), 'array')
+    engine.add(player('b', 1250), 'array')
+    assert engine.tick() == []
+
+    # 100 + 10 * 14 < 250
+    clock.now = 14
+    assert engine.tick() == []
+    clock.now = 15
+    [(player1, player2, matched_type)] = engine.tick()
+    assert (player1['sid'], player2['sid'], matched_type) == ('a', 'b', 'array')
+    assert engine.players == {}
+
+
+def test_idle_tick_checks_nobody():
+    clock, engine = make_engine()
+    for i in range(100):
+        engine.add(player(f"p{i}", i * 2000), 'array')
+    engine.tick()
+    # Nobody can ever come into range without a new arrival
+    assert engine._due == []
+    clock.now = 3600
+    assert engine.tick() == []
+
+
+def test_new_arrival_inside_a_wide_window_is_paired_on_the_next_tick():
+    clock, engine = make_engine()
+    engine.add(player('veteran', 1000), 'graph')
+    clock.now = 30
+    engine.tick()
+
+    # Outside the newcomer's own window, inside the veteran's
+    engine.add(player('newcomer', 1300), 'random')
+    assert engine.find_match('newcomer') == (None, None, None)
+    [(player1, player2, matched_type)] = engine.tick()
+    assert (player1['sid'], player2['sid'], matched_type) == ('veteran', 'newcomer', 'graph')
+
+
+def test_left_players_are_not_paired():
+    clock, engine = make_engine()
+    engine.add(player('a', 1000), 'tree')
+    engine.add(player('b', 1500), 'tree')
+    engine.remove('b')
+    engine.add(player('c', 1600), 'tree')
+    clock.now = 60
+    [(player1, player2, _)] = engine.tick()
+    assert (player1['sid'], player2['sid']) == ('a', 'c')
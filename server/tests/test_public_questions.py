@@ -0,0 +1,37 @@
+import gzip
+import json
+
+import pytest
+
+
+@pytest.fixture
+def question_id(server):
+    inserted = server.questions_collection.insert_one({
+        'title': 'Missing number', 'description': 'Find it.', 'type': 'array',
+        'testCases': [{'testId': str(i), 'input': f'[{i}]', 'output': str(i)} for i in range(5)]
+    }).inserted_id
+    yield str(inserted)
+    server.questions_collection.delete_one({'_id': inserted})
+    server.question_store.remove(str(inserted))
+
+
+def test_each_encoding_gets_its_own_etag(server, question_id):
+    http = server.app.test_client()
+    plain = http.get(f'/questions/{question_id}', headers={'Accept-Encoding': 'identity'})
+    gzipped = http.get(f'/questions/{question_id}', headers={'Accept-Encoding': 'gzip'})
+
+    assert plain.headers['Vary'] == gzipped.headers['Vary'] == 'Accept-Encoding'
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert plain.headers['ETag'] != gzipped.headers['ETag']
+    assert json.loads(gzip.decompress(gzipped.data)) == plain.json
+    assert len(plain.json['testCases']) == 2
+
+
+def test_revalidation_only_matches_the_same_representation(server, question_id):
+    http = server.app.test_client()
+    url = f'/questions/{question_id}'
+    gzip_etag = http.get(url, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    assert http.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzip_etag}).status_code == 304
+    assert http.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'W/{gzip_etag}'}).status_code == 304
+    assert http.get(url, headers={'Accept-Encoding': 'identity', 'If-None-Match': gzip_etag}).status_code == 200
@@ -0,0 +1,52 @@
+import mongomock
+
+from storage.question_store import QuestionStore
+
+
+def make_store():
+    collection = mongomock.MongoClient().db.questions
+    store = QuestionStore(collection)
+    notified = []
+    store.on_change(notified.append)
+    return collection, store, notified
+
+
+def test_poll_without_changes_notifies_nobody():
+    collection, store, notified = make_store()
+    collection.insert_many([{'title': 'A', 'type': 'array'}, {'title': 'B', 'type': 'graph'}])
+    store.load()
+    assert len(notified) == 2
+
+    store.poll()
+    store.poll()
+    assert len(notified) == 2
+
+
+def test_poll_notifies_changed_and_deleted_questions():
+    collection, store, notified = make_store()
+    first = collection.insert_one({'title': 'A', 'type': 'array'}).inserted_id
+    second = collection.insert_one({'title': 'B', 'type': 'array'}).inserted_id
+    store.load()
+    notified.clear()
+
+    collection.update_one({'_id': first}, {'$set': {'title': 'A2'}})
+    collection.delete_one({'_id': second})
+    store.poll()
+
+    assert sorted(notified) == sorted([str(first), str(second)])
+    assert store.get(str(first))['title'] == 'A2'
+    assert len(store) == 1
+
+
+def test_updated_at_poll_drops_deleted_questions():
+    collection, store, notified = make_store()
+    kept = collection.insert_one({'title': 'A', 'type': 'array', 'updatedAt': 1}).inserted_id
+    deleted = collection.insert_one({'title': 'B', 'type': 'array', 'updatedAt': 2}).inserted_id
+    store.load()
+    notified.clear()
+
+    collection.delete_one({'_id': deleted})
+    store.poll()
+
+    assert notified == [str(deleted)]
+    assert store.random('array')['_id'] == str(kept)
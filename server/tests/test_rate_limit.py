@@ -0,0 +1,118 @@
+import pytest
+
+from judge.rate_limit import SubmissionLimiter, TokenBucket, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    bucket = TokenBucket(capacity=2, rate=0.5, now=0)
+    bucket.tokens = 0
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    assert bucket.wait_time(2) == 0
+    assert not bucket.is_full(3)
+    assert bucket.is_full(100) and bucket.tokens == 2
+
+
+def test_player_burst_then_retry_after_the_refill():
+    clock = FakeClock()
+    limiter = SubmissionLimiter(player_burst=2, player_rate=0.5, match_burst=10, match_rate=1, clock=clock)
+    assert limiter.acquire('a', 'm')[1] is None
+    assert limiter.acquire('a', 'm')[1] is None
+    wait, limited_by, _ = limiter.acquire('a', 'm')
+    assert (wait, limited_by) == (pytest.approx(2.0), 'player')
+    # Another player in the same match is not held back
+    assert limiter.acquire('b', 'm')[1] is None
+    clock.now = 2.0
+    assert limiter.acquire('a', 'm')[1] is None
+    assert limiter.stats()['limited_by_player'] == 1
+
+
+def test_match_bucket_caps_cycled_clerk_ids_and_rejections_cost_nothing():
+    clock = FakeClock()
+    limiter = SubmissionLimiter(player_burst=5, player_rate=1, match_burst=2, match_rate=0.1, clock=clock)
+    assert limiter.acquire('a', 'm')[1] is None
+    assert limiter.acquire('b', 'm')[1] is None
+    assert limiter.acquire('c', 'm')[1] == 'match'
+    # 'c' took no player token for the rejected attempt
+    assert limiter._players['c'].tokens == 5
+
+
+def test_resubmits_within_the_window_are_flagged():
+    clock = FakeClock()
+    limiter = SubmissionLimiter(player_rate=0, match_rate=0, resubmit_window=10, clock=clock)
+    assert limiter.acquire('a', 'm') == (0.0, None, False)
+    clock.now = 5
+    assert limiter.acquire('a', 'm')[2] is True
+    assert limiter.acquire('a', 'other')[2] is False
+    clock.now = 20
+    assert limiter.acquire('a', 'm')[2] is False
+
+
+def test_forget_match_drops_its_state_and_refilled_players():
+    clock = FakeClock()
+    limiter = SubmissionLimiter(player_burst=1, player_rate=1, clock=clock)
+    limiter.acquire('a', 'm')
+    limiter.acquire('b', 'other')
+    clock.now = 0.5
+    limiter.forget_match('m')
+    stats = limiter.stats()
+    assert (stats['tracked_matches'], stats['tracked_players']) == (1, 2)
+    clock.now = 5
+    limiter.forget_match('other')
+    assert limiter.stats()['tracked_players'] == 0
+    assert limiter.acquire('a', 'm')[2] is False
+
+
+def test_retry_after_rounds_up_to_a_tenth():
+    assert retry_after_seconds(0.01) == 0.1
+    assert retry_after_seconds(1.23) == 1.3
+    assert retry_after_seconds(2.0) == 2.0
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, job, priority, on_queued=None):
+        on_queued(len(self.jobs) + 1)
+        self.jobs.append(job)
+        return len(self.jobs)
+
+
+@pytest.fixture
+def submit(server, emitted, monkeypatch):
+    scheduler = RecordingScheduler()
+    monkeypatch.setattr(server, 'submission_scheduler', scheduler)
+    monkeypatch.setattr(server, 'submission_limiter', SubmissionLimiter())
+
+    def submit(sid, match_id, clerkId):
+        server.on_submit_code(sid, {'code': 'def f(nums):\n    return nums[0]\n',
+                                    'match_id': match_id, 'clerkId': clerkId})
+        return [event for event, *_ in emitted]
+
+    submit.scheduler = scheduler
+    return submit
+
+
+def test_submissions_outside_the_callers_match_are_refused(server, submit, live_match):
+    assert submit('sid-1', 'made-up-match', 'p1') == ['error']
+    assert submit('sid-1', live_match.match_id, 'stranger') == ['error'] * 2
+    # p2's match, but not p2's connection
+    assert submit('sid-1', live_match.match_id, 'p2') == ['error'] * 3
+    assert submit('sid-x', live_match.match_id, 'p1') == ['error'] * 4
+
+    assert submit.scheduler.jobs == []
+    assert server.submission_limiter.stats()['tracked_players'] == 0
+    assert server.submission_limiter.stats()['tracked_matches'] == 0
+
+
+def test_a_players_own_submission_is_queued_and_acknowledged(server, submit, live_match):
+    assert submit('sid-2', live_match.match_id, 'p2') == ['submission_queued']
+    assert [job['clerkId'] for job in submit.scheduler.jobs] == ['p2']
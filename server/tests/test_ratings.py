@@ -0,0 +1,48 @@
+import pytest
+
+from game.ratings import Leaderboard, elo_update, expected_score, match_stats_update, summarize_stats
+
+
+def test_elo_is_zero_sum_and_favours_the_underdog():
+    assert expected_score(1200, 1200) == 0.5
+    assert expected_score(1600, 1200) == pytest.approx(10 / 11)
+
+    assert elo_update(1200, 1200, 1, 32) == (1216, 1184)
+    assert elo_update(1200, 1200, 0.5, 32) == (1200, 1200)
+    underdog, favourite = elo_update(1200, 1600, 1, 32)
+    assert underdog - 1200 == pytest.approx(32 * 10 / 11)
+    assert underdog + favourite == pytest.approx(2800)
+
+
+def test_leaderboard_ranks_players_and_shares_ties():
+    board = Leaderboard(k_factor=32)
+    assert board.seed([('a', 1500), ('b', 1300), ('c', 1300)]) == 3
+    assert board.seed([('a', 1), ('d', 1100)]) == 1
+    assert board.rating('a') == 1500
+
+    assert [board.rank(clerkId) for clerkId in 'abcd'] == [1, 2, 2, 4]
+    assert board.rank('unknown') is None
+    assert board.top(2, offset=1) == [(2, 'b', 1300), (2, 'c', 1300)]
+    assert board.size() == 4
+
+
+def test_recording_a_match_moves_both_players():
+    board = Leaderboard(k_factor=32)
+    changes = board.record_match('a', 'b', 1)
+    assert changes == {'a': (1200, 1216), 'b': (1200, 1184)}
+    assert [rank for rank, _, _ in board.top()] == [1, 2]
+    board.record_match('a', 'b', 0)
+    assert board.rating('a') < 1216 and board.rating('b') > 1184
+    assert board.top()[0][1] == 'b'
+
+
+def test_match_stats_fold_into_overall_and_per_type_counters():
+    update = match_stats_update('tree', 'win', 3, 4)
+    assert update['stats.wins'] == 1 and update['stats.by_type.tree.tests_total'] == 4
+
+    stats = {'matches': 4, 'wins': 1, 'draws': 1, 'tests_passed': 6, 'tests_total': 12,
+             'by_type': {'tree': {'matches': 0}}}
+    summary = summarize_stats(stats)
+    assert (summary['win_rate'], summary['average_tests_passed'], summary['pass_rate']) == (0.25, 1.5, 0.5)
+    assert summary['losses'] == 0
+    assert summary['by_type']['tree']['win_rate'] is None
@@ -0,0 +1,59 @@
+from bson import ObjectId
+
+
+def test_match_found_carries_a_token_per_player(server, emitted, monkeypatch):
+    monkeypatch.setattr(server.realtime, 'enter_room', lambda sid, room: None)
+    monkeypatch.setattr(server, 'start_match_timer', lambda match_id, duration: None)
+    question = {'_id': str(ObjectId()), 'testCases': [{'testId': '1', 'input': '[1]', 'output': '1'}]}
+    monkeypatch.setattr(server, 'get_random_question', lambda algorithm_type: question)
+
+    server.create_match({'sid': 'sid-a', 'clerkId': 'a', 'player_name': 'A'},
+                        {'sid': 'sid-b', 'clerkId': 'b', 'player_name': 'B'}, 'array')
+
+    found = {to: data for event, data, to, _ in emitted if event == 'match_found'}
+    match = server.game_state.finish_match(found['sid-a']['match_id'])
+    assert found['sid-a']['rejoin_token'] == match.rejoin_tokens['a']
+    assert found['sid-b']['rejoin_token'] == match.rejoin_tokens['b']
+    assert found['sid-a']['rejoin_token'] != found['sid-b']['rejoin_token']
+    assert 'rejoin_tokens' not in match.to_dict()
+
+
+def test_rejoining_needs_the_issued_token(server, emitted, live_match):
+    attempts = [
+        {'clerkId': 'p1', 'match_id': live_match.match_id},
+        {'clerkId': 'p1', 'match_id': live_match.match_id, 'rejoin_token': live_match.rejoin_tokens['p2']},
+        {'clerkId': 'intruder', 'match_id': live_match.match_id, 'rejoin_token': live_match.rejoin_tokens['p1']},
+        {'clerkId': 'p1', 'match_id': 'unknown', 'rejoin_token': live_match.rejoin_tokens['p1']},
+        {'clerkId': 'p1', 'match_id': ['not', 'an', 'id'], 'rejoin_token': live_match.rejoin_tokens['p1']},
+    ]
+    for attempt in attempts:
+        server.on_rejoin_match('sid-x', attempt)
+
+    assert [event for event, *_ in emitted] == ['rejoin_failed'] * len(attempts)
+    assert server.connections.clerk_for('sid-x') is None
+    assert server.game_state.player_sid('p1') == 'sid-1'
+
+
+def test_rejoining_rebinds_the_player_and_sends_the_match_state(server, emitted, live_match):
+    server.update_match_progress(live_match.match_id, 'p2', 3)
+    server.on_rejoin_match('sid-new', {'clerkId': 'p1', 'match_id': live_match.match_id,
+                                       'rejoin_token': live_match.rejoin_tokens['p1']})
+
+    assert server.connections.clerk_for('sid-new') == 'p1'
+    assert server.game_state.player_sid('p1') == 'sid-new'
+    event, data, to, _ = emitted[0]
+    assert (event, to) == ('match_rejoined', 'sid-new')
+    assert data['opponent'] == {'id': 'p2'}
+    assert data['progress']['p2'] == {'tests_passed': 3, 'total_tests': 4}
+    assert data['question_id'] == live_match.question_id
+    assert emitted[1][:3] == ('opponent_reconnected', {'clerkId': 'p1'}, live_match.match_id)
+    server.connections.unbind('sid-new')
+
+
+def test_rejoining_survives_a_deleted_question(server, emitted, live_match):
+    server.question_store.remove(live_match.question_id)
+    server.on_rejoin_match('sid-new', {'clerkId': 'p1', 'match_id': live_match.match_id,
+                                       'rejoin_token': live_match.rejoin_tokens['p1']})
+    event, data, _, _ = emitted[0]
+    assert event == 'match_rejoined' and 'question_id' not in data
+    server.connections.unbind('sid-new')
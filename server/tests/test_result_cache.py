@@ -0,0 +1,76 @@
+import pytest
+
+from executor.result_cache import SubmissionResultCache, is_cacheable
+
+TESTS = [{'testId': '1', 'input': '[1]', 'output': '1'}]
+CODE = "def f(nums):\n    return nums[0]\n"
+
+
+def results(passed=1, errors=(), **extra):
+    return dict({'passed': passed, 'total': 1, 'errors': list(errors), 'test_results': []}, **extra)
+
+
+def test_key_ignores_comments_and_formatting():
+    cache = SubmissionResultCache()
+    reformatted = "# first element\ndef f(nums):\n\n    return nums[0]   # done\n"
+    assert cache.key(CODE, 'q', TESTS) == cache.key(reformatted, 'q', TESTS)
+    assert cache.key(CODE, 'q', TESTS) != cache.key(CODE.replace('[0]', '[-1]'), 'q', TESTS)
+    assert cache.key(CODE, 'q', TESTS) != cache.key(CODE, 'q', TESTS, fail_fast=True)
+    assert cache.key(CODE, 'q', TESTS) != cache.key(CODE, 'q', TESTS, memory_limit_mb=64)
+    with pytest.raises(SyntaxError):
+        cache.key('def f(:', 'q', TESTS)
+
+
+def test_hits_hand_out_copies_and_count_saved_time():
+    cache = SubmissionResultCache()
+    key = cache.key(CODE, 'q', TESTS)
+    assert cache.get(key) is None
+    cache.put(key, results(), elapsed=0.5)
+    hit = cache.get(key)
+    hit['passed'] = 0
+    assert cache.get(key)['passed'] == 1
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+    assert cache.saved_seconds == 1.0
+
+
+def test_invalidating_a_question_picks_up_its_new_test_set():
+    cache = SubmissionResultCache()
+    old_key = cache.key(CODE, 'q', TESTS)
+    cache.put(old_key, results())
+    cache.put(cache.key(CODE, 'other', TESTS), results())
+
+    edited = [dict(TESTS[0], output='2')]
+    # The version is remembered per question until it is invalidated
+    assert cache.key(CODE, 'q', edited) == old_key
+    cache.invalidate('q')
+    assert cache.get(old_key) is None
+    assert cache.key(CODE, 'q', edited) != old_key
+    assert len(cache) == 1
+
+
+def test_entry_and_byte_bounds_evict_least_recently_used():
+    cache = SubmissionResultCache(max_entries=2)
+    keys = [cache.key(f"def f(nums):\n    return {i}\n", 'q', TESTS) for i in range(3)]
+    cache.put(keys[0], results())
+    cache.put(keys[1], results())
+    cache.get(keys[0])
+    cache.put(keys[2], results())
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+    small = SubmissionResultCache(max_bytes=100)
+    small.put(keys[0], results(errors=['x' * 200]))
+    assert len(small) == 0 and small.current_bytes == 0
+
+
+@pytest.mark.parametrize('outcome, cacheable', [
+    (results(), True),
+    (results(passed=0, errors=['Test 1: wrong answer']), True),
+    (results(passed=0, errors=['Execution timed out']), False),
+    (results(passed=0, errors=['Runtime error: out of memory']), False),
+    (results(passed=0, errors=['Runtime error: Worker process crashed']), False),
+    (results(complexity={'expected': 'O(n)', 'measured': 'O(n)', 'passed': True}), False),
+    (results(complexity={'error': 'Not enough samples'}), False),
+])
+def test_load_dependent_results_are_not_cacheable(outcome, cacheable):
+    assert is_cacheable(outcome) is cacheable
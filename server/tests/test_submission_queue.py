@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from judge.submission_queue import PRIORITY_FIRST, PRIORITY_RESUBMIT, SubmissionQueueFull, SubmissionScheduler
+
+
+def test_first_submissions_are_judged_before_resubmits():
+    judged = []
+    scheduler = SubmissionScheduler(judged.append, workers=1)
+    assert scheduler.submit('resubmit-1', PRIORITY_RESUBMIT) == 1
+    assert scheduler.submit('first-1', PRIORITY_FIRST) == 1
+    assert scheduler.submit('resubmit-2', PRIORITY_RESUBMIT) == 3
+    assert scheduler.submit('first-2', PRIORITY_FIRST) == 2
+    scheduler.start()
+    scheduler.stop()
+    assert judged == ['first-1', 'first-2', 'resubmit-1', 'resubmit-2']
+    assert scheduler.in_flight() == 0
+
+
+def test_capacity_rejections_carry_a_retry_after():
+    scheduler = SubmissionScheduler(lambda job: None, workers=1, max_in_flight=4, resubmit_share=0.5)
+    scheduler.submit('a', PRIORITY_RESUBMIT)
+    scheduler.submit('b', PRIORITY_RESUBMIT)
+    # Resubmits may only fill half the cap...
+    with pytest.raises(SubmissionQueueFull) as rejected:
+        scheduler.submit('c', PRIORITY_RESUBMIT)
+    assert rejected.value.retry_after >= 1.0
+    # ...which leaves room for first submissions
+    scheduler.submit('d', PRIORITY_FIRST)
+    scheduler.submit('e', PRIORITY_FIRST)
+    with pytest.raises(SubmissionQueueFull):
+        scheduler.submit('f', PRIORITY_FIRST)
+    assert scheduler.rejected == 2
+    assert scheduler.depth() == 4
+
+
+def test_a_full_queue_rejects_without_acknowledging():
+    scheduler = SubmissionScheduler(lambda job: None, max_pending=1, workers=1, max_in_flight=10)
+    acks = []
+    scheduler.submit('a', on_queued=acks.append)
+    with pytest.raises(SubmissionQueueFull):
+        scheduler.submit('b', on_queued=acks.append)
+    assert acks == [1]
+    assert scheduler.in_flight() == 1
+
+
+def test_the_acknowledgement_precedes_judging():
+    events = []
+    judged = threading.Event()
+
+    def judge(job):
+        events.append(('judged', job))
+        judged.set()
+
+    scheduler = SubmissionScheduler(judge, workers=2)
+    scheduler.start()
+    try:
+        scheduler.submit('job', on_queued=lambda position: events.append(('queued', position)))
+        assert judged.wait(5)
+    finally:
+        scheduler.stop()
+    assert events == [('queued', 1), ('judged', 'job')]
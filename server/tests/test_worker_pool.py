@@ -0,0 +1,50 @@
+import operator
+import os
+import time
+
+import pytest
+
+from executor.worker_pool import TimeoutException, WorkerCrashedException, WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(1, preload=[])
+    yield pool
+    pool.shutdown()
+
+
+def test_runs_tasks_and_reraises_their_exceptions(pool):
+    assert pool.run(operator.add, (2, 3)) == 5
+    with pytest.raises(ValueError):
+        pool.run(int, ('x',))
+    # The same warm worker served both
+    assert pool.respawns == 0
+
+
+def test_timeout_kills_and_replaces_the_worker(pool):
+    with pytest.raises(TimeoutException):
+        pool.run(time.sleep, (10,), timeout=0.2)
+    assert pool.respawns == 1
+    assert pool.run(operator.mul, (6, 7), timeout=5) == 42
+
+
+def test_crashed_worker_is_replaced(pool):
+    with pytest.raises(WorkerCrashedException):
+        pool.run(os._exit, (3,), timeout=5)
+    assert pool.respawns == 1
+    assert pool.run(operator.add, (1, 1), timeout=5) == 2
+
+
+def test_worker_that_died_while_idle_is_replaced_before_use(pool):
+    worker = pool._idle.queue[0]
+    worker.process.kill()
+    worker.process.join()
+    assert pool.run(operator.add, (1, 2), timeout=5) == 3
+    assert pool.respawns == 1
+
+
+def test_shut_down_pool_refuses_work(pool):
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.run(operator.add, (1, 2))
@@ -0,0 +1,70 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import mongomock
+
+from storage.write_behind import WriteBehindBuffer
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stop_flushes_everything_buffered():
+    db = mongomock.MongoClient().db
+    buffer = WriteBehindBuffer(max_batch=1000, flush_interval=3600)
+    buffer.start()
+
+    buffer.upsert(db.users, 'clerkId', 'a', {'name': 'A'}, {'stats.matches': 1})
+    buffer.upsert(db.users, 'clerkId', 'a', {'rating': 1216}, {'stats.matches': 1})
+    buffer.insert(db.matches, {'match_id': 'm1'})
+    assert db.users.count_documents({}) == 0
+
+    buffer.stop()
+
+    assert buffer.depth() == 0
+    user = db.users.find_one({'clerkId': 'a'})
+    assert (user['name'], user['rating'], user['stats']['matches']) == ('A', 1216, 2)
+    assert db.matches.count_documents({'match_id': 'm1'}) == 1
+
+
+# Buffers a match insert and waits; on SIGTERM, the atexit hook reports what reached the database
+SERVER_SCRIPT = textwrap.dedent("""
+    import atexit, os, signal, sys, time
+    import mongomock, pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    import lan_server
+
+    atexit.register(lambda: print('stored', lan_server.matches_collection.count_documents({}), flush=True))
+    lan_server.write_behind.start()
+    signal.signal(signal.SIGTERM, lan_server.handle_sigterm)
+    lan_server.write_behind.insert(lan_server.matches_collection, {'match_id': 'm1'})
+    print('ready', flush=True)
+    time.sleep(60)
+""")
+
+
+def test_sigterm_flushes_buffered_writes_before_exiting():
+    env = dict(os.environ, DB_FLUSH_INTERVAL='3600', LOG_FILE=os.devnull)
+    server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT], cwd=SERVER_DIR, env=env,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert server.stdout.readline().strip() == 'ready'
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=30)
+    finally:
+        server.kill()
+    assert server.returncode == 0
+    assert output.strip() == 'stored 1'
+
+
+def test_flush_stats_are_reported(server):
+    server.write_behind.flush()
+    stats = server.app.test_client().get('/stats/judge').get_json()['write_behind']
+    assert stats['pending_writes'] == 0 and stats['failed_flushes'] >= 0
+
+    metrics = server.app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'litcode_write_behind_flushes{result="failed"}' in metrics
+    assert 'litcode_write_behind_flush_ms{stat="max"}' in metrics
+    assert 'litcode_write_behind_flushed_writes ' in metrics